@@ -24,7 +24,12 @@ if not DISABLED:
     from gtimer.public.timedloop import *
     from gtimer.public.io import *
     from gtimer.public.report import *
+    from gtimer.public.calibrate import *
     del public, private, local, util
+    if 'GTIMER_CALIBRATE' in os.environ:
+        if os.environ['GTIMER_CALIBRATE'] != '0':
+            calibrate()
+            reset_root()  # (start timing after the calibration)
 else:
     from gtimer.disabled.public import *
     del disabled, util
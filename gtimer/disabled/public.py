@@ -22,6 +22,14 @@ def stamp(*args, **kwargs):
     pass
 
 
+def stamp_handle(*args, **kwargs):
+    return _untimed_stamp_handle
+
+
+def _untimed_stamp_handle():
+    pass
+
+
 def stop(*args, **kwargs):
     pass
 
@@ -46,6 +54,14 @@ def current_time():
     pass
 
 
+def calibrate(*args, **kwargs):
+    pass
+
+
+def clear_calibration():
+    pass
+
+
 #
 # loop
 #
@@ -95,10 +111,26 @@ def reset_root():
     pass
 
 
+def set_clock_ns(*args, **kwargs):
+    pass
+
+
+def set_asyncio_mode(*args, **kwargs):
+    pass
+
+
 def set_def_save_itrs(*args, **kwargs):
     pass
 
 
+def set_def_itrs_limit(*args, **kwargs):
+    pass
+
+
+def set_def_sketch(*args, **kwargs):
+    pass
+
+
 def set_def_keep_subdivisions(*args, **kwargs):
     pass
 
@@ -123,6 +155,10 @@ def attach_subdivision(*args, **kwargs):
     pass
 
 
+def join_thread_times(*args, **kwargs):
+    return []
+
+
 #
 # report
 #
@@ -145,6 +181,10 @@ def write_structure(*args, **kwargs):
 #
 
 
+def merge_many(*args, **kwargs):
+    pass
+
+
 def save_pkl(*args, **kwargs):
     pass
 
@@ -153,6 +193,38 @@ def load_pkl(*args, **kwargs):
     pass
 
 
+def save_bin(*args, **kwargs):
+    pass
+
+
+def load_bin(*args, **kwargs):
+    pass
+
+
+def load_and_merge(*args, **kwargs):
+    pass
+
+
+def start_exporter(*args, **kwargs):
+    pass
+
+
+def stop_exporter(*args, **kwargs):
+    pass
+
+
+def start_event_log(*args, **kwargs):
+    pass
+
+
+def stop_event_log(*args, **kwargs):
+    pass
+
+
+def replay_log(*args, **kwargs):
+    pass
+
+
 def open_mmap(*args, **kwargs):
     pass
 
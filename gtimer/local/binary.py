@@ -0,0 +1,607 @@
+
+"""
+Flat, versioned binary layout of Times data (an alternative to pickle), as
+tables in contiguous typed arrays, little-endian:
+
+    header      magic b'GTMB', version (uint16), flags (uint16), counts of
+                names, nodes, stamps, stamp stats, itrs, itr values, sketches,
+                buckets (uint32)
+    names       lengths (int32), then the UTF-8 bytes of all names
+    nodes       int32 x 9: parent, position, par name, name, pos_in_parent,
+                par_in_parent, save_itrs, first stamp, number of stamps;
+                double x 4: total, stamps_sum, self_agg, bias_agg
+    stamps      int32: name; double: cum
+    stamp stats int32: stamp; double x 4: itr_num, itr_max, itr_min, itr_m2
+                (only where not those of a single iteration: 1, cum, cum, 0)
+    itrs        int32 x 3: stamp, kind, number of values; double x 2: maxlen
+                or limit, seen; then all the values (double)
+    sketches    int32 x 2: stamp, number of buckets; double x 4: rel_acc,
+                unit, zeros, count; then bucket indexes (int32), counts (double)
+
+Nodes are in depth-first order, each after its parent (index, -1 for a
+root).  Stamps are indexed across all nodes.  Names are indexes into the name
+table (-1 for None, -2 for True in par_in_parent).  Missing values are NaN.
+"""
+from __future__ import absolute_import
+from array import array
+from bisect import bisect_left
+from collections import deque
+import copy
+import gc
+import mmap
+import struct
+import sys
+
+from gtimer.local.times import Times, Stamps, SubdvsnList
+from gtimer.local.itrs import Reservoir
+from gtimer.local.sketch import Sketch
+from gtimer.util import iteritems
+
+
+MAGIC = b'GTMB'
+VERSION = 1
+FLAG_LIST = 1  # (holds a list of Times, rather than one)
+
+HEADER = struct.Struct('<4sHH8I')
+NODE_INTS_S = struct.Struct('<9i')
+NODE_DOUBLES_S = struct.Struct('<4d')
+INT32 = 'i' if array('i').itemsize == 4 else 'l'
+NAN = float('nan')
+
+ITRS_ARRAY, ITRS_DEQUE, ITRS_RESERVOIR = 0, 1, 2
+NODE_INTS, NODE_DOUBLES = 9, 4
+
+
+def dumps(times):
+    """Encode one Times or a list of them (with their subdivisions)."""
+    flags = 0
+    if isinstance(times, (list, tuple)):
+        flags |= FLAG_LIST
+        roots = times
+    else:
+        roots = [times]
+    w = _Writer()
+    for root in roots:
+        w.add_node(root, -1, -1, -1)
+    name_bytes = [name.encode('utf-8') for name in w.names]
+    header = HEADER.pack(MAGIC, VERSION, flags, len(w.names),
+                         len(w.node_ints) // NODE_INTS, len(w.stamp_names),
+                         len(w.stats_ints), len(w.itrs_ints) // 3,
+                         len(w.itr_vals), len(w.sketch_ints) // 2,
+                         len(w.bucket_idxs))
+    parts = [header, _to_bytes(array(INT32, [len(b) for b in name_bytes])),
+             b''.join(name_bytes)]
+    for arr in (w.node_ints, w.node_doubles, w.stamp_names, w.stamp_cums,
+                w.stats_ints, w.stats_doubles, w.itrs_ints, w.itrs_doubles,
+                w.itr_vals, w.sketch_ints, w.sketch_doubles, w.bucket_idxs,
+                w.bucket_counts):
+        parts.append(_to_bytes(arr))
+    return b''.join(parts)
+
+
+def loads(data):
+    """Decode data from dumps(), returning one Times or a list of them."""
+    # (Collection passes while building many objects, none of them garbage,
+    # would only add time.)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _loads(data)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _loads(data):
+    if len(data) < HEADER.size or data[:4] != MAGIC:
+        raise ValueError("Not gtimer binary data.")
+    (_, version, flags, n_names, n_nodes, n_stamps, n_stats, n_itrs,
+     n_itr_vals, n_sketch, n_buckets) = HEADER.unpack_from(data)
+    if version > VERSION:
+        raise ValueError("Unsupported gtimer binary version: {} (this version "
+                         "reads up to {}).".format(version, VERSION))
+    r = _Reader(data, HEADER.size)
+    names = [r.read_bytes(n).decode('utf-8') for n in r.read(INT32, n_names)]
+    node_ints = r.read(INT32, n_nodes * NODE_INTS).tolist()
+    node_doubles = r.read('d', n_nodes * NODE_DOUBLES).tolist()
+    stamp_names = r.read(INT32, n_stamps)
+    cums = r.read('d', n_stamps).tolist()
+    stats_ints = r.read(INT32, n_stats).tolist()
+    stats_doubles = r.read('d', n_stats * 4).tolist()
+    itrs_ints = r.read(INT32, n_itrs * 3).tolist()
+    itrs_doubles = r.read('d', n_itrs * 2).tolist()
+    itr_vals = r.read('d', n_itr_vals)
+    sketch_ints = r.read(INT32, n_sketch * 2).tolist()
+    sketch_doubles = r.read('d', n_sketch * 4).tolist()
+    bucket_idxs = r.read(INT32, n_buckets).tolist()
+    bucket_counts = r.read('d', n_buckets).tolist()
+    if r.offset != len(data):
+        raise ValueError("Unexpected data after gtimer binary data.")
+    names_ext = names + [True, None]  # (index -2: True, -1: None)
+
+    # Stamps, indexed across all nodes (values of a single iteration unless
+    # listed in the stats).
+    stamp_names = [names[i] for i in stamp_names]
+    nums = [1] * n_stamps
+    maxs = list(cums)
+    mins = list(cums)
+    m2s = [0.] * n_stamps
+    for k, j in enumerate(stats_ints):
+        nums[j], maxs[j], mins[j], m2s[j] = _stats(stats_doubles[4 * k:4 * k + 4])
+
+    # Nodes (each after its parent).
+    nodes = list()
+    roots = list()
+    new_times, new_stamps, new_list = Times.__new__, Stamps.__new__, SubdvsnList.__new__
+    list_append = list.append
+    columns = [node_ints[i::NODE_INTS] for i in range(NODE_INTS)]
+    columns += [node_doubles[i::NODE_DOUBLES] for i in range(NODE_DOUBLES)]
+    for (parent, pos, par_name, name_i, pos_i, par_i, save_itrs, first, num,
+         total, stamps_sum, self_agg, bias_agg) in zip(*columns):
+        times = new_times(Times)
+        times.name = names_ext[name_i]
+        times.pos_in_parent = names_ext[pos_i]
+        times.par_in_parent = names_ext[par_i]
+        times.save_itrs = bool(save_itrs)
+        times.shared = False
+        times.total = total
+        times.stamps_sum = stamps_sum
+        times.self_agg = self_agg
+        times.bias_agg = bias_agg
+        times.subdvsn = dict()
+        times.par_subdvsn = dict()
+        stamps = times.stamps = new_stamps(Stamps)
+        end = first + num
+        stamps.order = order = stamp_names[first:end]
+        stamps.index = dict(zip(order, range(num)))
+        stamps.vals_cum = cums[first:end]
+        stamps.vals_num = nums[first:end]
+        stamps.vals_max = maxs[first:end]
+        stamps.vals_min = mins[first:end]
+        stamps.vals_m2 = m2s[first:end]
+        stamps.itrs = dict()
+        stamps.sketch = dict()
+        if parent == -1:
+            times.parent = None
+            roots.append(times)
+        else:
+            p = times.parent = nodes[parent]
+            if par_name == -1:
+                sub_dict, key = p.subdvsn, names[pos]
+            else:
+                sub_dict = p.par_subdvsn.get(names[pos])
+                if sub_dict is None:
+                    sub_dict = p.par_subdvsn[names[pos]] = dict()
+                key = names[par_name]
+            sub_list = sub_dict.get(key)
+            if sub_list is None:  # (as SubdvsnList([times]), but quicker)
+                sub_list = sub_dict[key] = new_list(SubdvsnList)
+                list_append(sub_list, times)
+                sub_list.by_name = {times.name: 0}
+            else:
+                sub_list.append(times)
+        nodes.append(times)
+
+    # Iteration values and sketches, by stamp index.
+    if n_itrs or n_sketch:
+        stamp_owner = list()
+        for times in nodes:
+            stamp_owner.extend([times.stamps] * len(times.stamps.order))
+    offset = 0
+    for k in range(n_itrs):
+        j, kind, num = itrs_ints[3 * k:3 * k + 3]
+        param, seen = itrs_doubles[2 * k:2 * k + 2]
+        itrs = _itrs(kind, param, seen, itr_vals[offset:offset + num])
+        offset += num
+        stamp_owner[j].itrs[stamp_names[j]] = itrs
+    offset = 0
+    for k in range(n_sketch):
+        j, num = sketch_ints[2 * k:2 * k + 2]
+        sketch = _sketch(sketch_doubles[4 * k:4 * k + 4],
+                         bucket_idxs[offset:offset + num],
+                         bucket_counts[offset:offset + num])
+        offset += num
+        stamp_owner[j].sketch[stamp_names[j]] = sketch
+    return roots if flags & FLAG_LIST else roots[0]
+
+
+def load_lazy(filename):
+    """Open a file holding data from dumps() for reading on demand: returns
+    the Times (or list of them) at once, and each node's stamps,
+    subdivisions, and iteration values are read from the (memory-mapped)
+    file when first accessed."""
+    source = _LazySource(filename)
+    if source.flags & FLAG_LIST:
+        return [source.node(k, end, None) for k, end in source.children(-1, source.n_nodes)]
+    return source.node(0, source.n_nodes, None)
+
+
+class LazyTimes(Times):
+    """ Times whose stamps and subdivisions are read from the file when
+    first accessed (until then, those slots are unset)."""
+
+    __slots__ = ('_source', '_node', '_end')
+
+    def __getattr__(self, attr):
+        # (Only called for attributes not set.)
+        if attr == 'stamps':
+            self.stamps = self._source.stamps(self._node)
+            return self.stamps
+        if attr in ('subdvsn', 'par_subdvsn'):
+            self._source.subdivisions(self)
+            return getattr(self, attr)
+        raise AttributeError(attr)
+
+    def __reduce__(self):  # (pickles as Times)
+        return (Times, (), self.__getstate__())
+
+    def __deepcopy__(self, memo):  # (copies as Times, also)
+        new = Times.__new__(Times)
+        memo[id(self)] = new
+        new.__setstate__(copy.deepcopy(self.__getstate__(), memo))
+        return new
+
+
+class LazyStamps(Stamps):
+    """ Stamps whose iteration values and sketches are read from the file
+    when first accessed."""
+
+    __slots__ = ('_source', '_first')
+
+    def __getattr__(self, attr):
+        if attr in ('itrs', 'sketch'):
+            self._source.itrs_and_sketches(self)
+            return getattr(self, attr)
+        raise AttributeError(attr)
+
+    def __reduce__(self):  # (pickles as Stamps)
+        return (Stamps, (), self.__getstate__())
+
+
+#
+# Private, helper classes and functions.
+#
+
+
+class _LazySource(object):
+    """ The tables of one file, located from the header but not read (apart
+    from the name lengths) until needed."""
+
+    def __init__(self, filename):
+        with open(str(filename), 'rb') as file:
+            try:
+                self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # (empty file)
+                raise ValueError("Not gtimer binary data.")
+        data = self.data
+        if len(data) < HEADER.size or data[:4] != MAGIC:
+            raise ValueError("Not gtimer binary data.")
+        (_, version, self.flags, n_names, self.n_nodes, n_stamps, n_stats,
+         n_itrs, n_itr_vals, n_sketch, n_buckets) = HEADER.unpack_from(data)
+        if version > VERSION:
+            raise ValueError("Unsupported gtimer binary version: {} (this version "
+                             "reads up to {}).".format(version, VERSION))
+        r = _Reader(data, HEADER.size)
+        lengths = r.read(INT32, n_names).tolist()
+        self.name_offsets = [r.offset]
+        for n in lengths:
+            self.name_offsets.append(self.name_offsets[-1] + n)
+        self.names = dict()  # index --> name (those decoded)
+        r.offset = self.name_offsets[-1]
+        self.at = dict()  # table --> offset in the file
+        for table, typecode, count in [
+                ('node_ints', INT32, self.n_nodes * NODE_INTS),
+                ('node_doubles', 'd', self.n_nodes * NODE_DOUBLES),
+                ('stamp_names', INT32, n_stamps), ('cums', 'd', n_stamps),
+                ('stats_ints', INT32, n_stats), ('stats_doubles', 'd', n_stats * 4),
+                ('itrs_ints', INT32, n_itrs * 3), ('itrs_doubles', 'd', n_itrs * 2),
+                ('itr_vals', 'd', n_itr_vals),
+                ('sketch_ints', INT32, n_sketch * 2),
+                ('sketch_doubles', 'd', n_sketch * 4),
+                ('bucket_idxs', INT32, n_buckets), ('bucket_counts', 'd', n_buckets)]:
+            self.at[table] = r.offset
+            r.offset += count * array(typecode).itemsize
+        if r.offset > len(data):
+            raise ValueError("Truncated gtimer binary data.")
+        if r.offset != len(data):
+            raise ValueError("Unexpected data after gtimer binary data.")
+        self.counts = {'stats_ints': n_stats, 'itrs_ints': n_itrs * 3,
+                       'sketch_ints': n_sketch * 2}
+        self.indexes = dict()  # (small tables, read once needed)
+
+    def read(self, table, typecode, start, count):
+        size = array(typecode).itemsize
+        return _Reader(self.data, self.at[table] + start * size).read(typecode, count)
+
+    def name(self, i):
+        if i == -1:
+            return None
+        if i == -2:
+            return True
+        name = self.names.get(i)
+        if name is None:
+            name = self.names[i] = self.data[
+                self.name_offsets[i]:self.name_offsets[i + 1]].decode('utf-8')
+        return name
+
+    def node_ints(self, k):
+        return NODE_INTS_S.unpack_from(self.data, self.at['node_ints'] + k * NODE_INTS_S.size)
+
+    def node(self, k, end, parent):
+        (_, _, _, name_i, pos_i, par_i, save_itrs, _, _) = self.node_ints(k)
+        times = LazyTimes.__new__(LazyTimes)
+        times.name = self.name(name_i)
+        times.pos_in_parent = self.name(pos_i)
+        times.par_in_parent = self.name(par_i)
+        times.save_itrs = bool(save_itrs)
+        times.shared = False
+        times.parent = parent
+        (times.total, times.stamps_sum, times.self_agg,
+         times.bias_agg) = NODE_DOUBLES_S.unpack_from(
+            self.data, self.at['node_doubles'] + k * NODE_DOUBLES_S.size)
+        times._source = self
+        times._node = k
+        times._end = end
+        return times
+
+    def children(self, k, end):
+        """Indexes of the children of node k (-1 for the roots) and where
+        each one's subtree ends, given where k's ends."""
+        # (Nodes are in depth-first order, so a subtree is contiguous, and
+        # the parent column need only be searched within it.)
+        first = k + 1
+        parents = self.read('node_ints', INT32, first * NODE_INTS,
+                            (end - first) * NODE_INTS)[::NODE_INTS].tolist()
+        kids = list()
+        i = 0
+        while True:
+            try:
+                i = parents.index(k, i)
+            except ValueError:
+                break
+            kids.append(first + i)
+            i += 1
+        return list(zip(kids, kids[1:] + [end]))
+
+    def index(self, table, step):
+        # (First column of a small table, which is sorted by stamp.)
+        if table not in self.indexes:
+            self.indexes[table] = self.read(table, INT32, 0, self.counts[table])[::step]
+        return self.indexes[table]
+
+    def stamps(self, k):
+        first, num = self.node_ints(k)[7:9]
+        stamps = LazyStamps.__new__(LazyStamps)
+        stamps.order = order = [self.name(i) for i in self.read('stamp_names', INT32, first, num)]
+        stamps.index = dict(zip(order, range(num)))
+        cums = stamps.vals_cum = self.read('cums', 'd', first, num).tolist()
+        nums = stamps.vals_num = [1] * num
+        maxs = stamps.vals_max = list(cums)
+        mins = stamps.vals_min = list(cums)
+        m2s = stamps.vals_m2 = [0.] * num
+        stats = self.index('stats_ints', 1)
+        lo = bisect_left(stats, first)
+        hi = bisect_left(stats, first + num, lo)
+        doubles = self.read('stats_doubles', 'd', 4 * lo, 4 * (hi - lo)).tolist()
+        for m in range(hi - lo):
+            i = stats[lo + m] - first
+            nums[i], maxs[i], mins[i], m2s[i] = _stats(doubles[4 * m:4 * m + 4])
+        stamps._source = self
+        stamps._first = first
+        return stamps
+
+    def itrs_and_sketches(self, stamps):
+        first, num = stamps._first, len(stamps.order)
+        stamps.itrs = dict()
+        stamps.sketch = dict()
+        js = self.index('itrs_ints', 3)
+        lo = bisect_left(js, first)
+        hi = bisect_left(js, first + num, lo)
+        if hi > lo:
+            offsets = self.value_offsets('itrs_ints', 3)
+            ints = self.read('itrs_ints', INT32, 3 * lo, 3 * (hi - lo)).tolist()
+            doubles = self.read('itrs_doubles', 'd', 2 * lo, 2 * (hi - lo)).tolist()
+            for k in range(hi - lo):
+                j, kind, n = ints[3 * k:3 * k + 3]
+                param, seen = doubles[2 * k:2 * k + 2]
+                values = self.read('itr_vals', 'd', offsets[lo + k], n)
+                stamps.itrs[stamps.order[j - first]] = _itrs(kind, param, seen, values)
+        js = self.index('sketch_ints', 2)
+        lo = bisect_left(js, first)
+        hi = bisect_left(js, first + num, lo)
+        if hi > lo:
+            offsets = self.value_offsets('sketch_ints', 2)
+            ints = self.read('sketch_ints', INT32, 2 * lo, 2 * (hi - lo)).tolist()
+            doubles = self.read('sketch_doubles', 'd', 4 * lo, 4 * (hi - lo)).tolist()
+            for k in range(hi - lo):
+                j, n = ints[2 * k:2 * k + 2]
+                start = offsets[lo + k]
+                stamps.sketch[stamps.order[j - first]] = _sketch(
+                    doubles[4 * k:4 * k + 4],
+                    self.read('bucket_idxs', INT32, start, n).tolist(),
+                    self.read('bucket_counts', 'd', start, n).tolist())
+
+    def value_offsets(self, table, step):
+        # (Where the values of each entry start, from the counts in its last
+        # column.)
+        key = table + '_offsets'
+        if key not in self.indexes:
+            offsets = [0]
+            for n in self.read(table, INT32, 0, self.counts[table])[step - 1::step]:
+                offsets.append(offsets[-1] + n)
+            self.indexes[key] = offsets
+        return self.indexes[key]
+
+    def subdivisions(self, times):
+        times.subdvsn = dict()
+        times.par_subdvsn = dict()
+        for k, end in self.children(times._node, times._end):
+            pos, par_name = self.node_ints(k)[1:3]
+            sub = self.node(k, end, times)
+            if par_name == -1:
+                sub_dict, key = times.subdvsn, self.name(pos)
+            else:
+                sub_dict = times.par_subdvsn.setdefault(self.name(pos), dict())
+                key = self.name(par_name)
+            if key in sub_dict:
+                sub_dict[key].append(sub)
+            else:
+                sub_dict[key] = SubdvsnList([sub])
+
+
+class _Writer(object):
+
+    def __init__(self):
+        self.names = list()
+        self.name_index = dict()
+        self.node_ints = array(INT32)
+        self.node_doubles = array('d')
+        self.stamp_names = array(INT32)
+        self.stamp_cums = array('d')
+        self.stats_ints = array(INT32)
+        self.stats_doubles = array('d')
+        self.itrs_ints = array(INT32)
+        self.itrs_doubles = array('d')
+        self.itr_vals = array('d')
+        self.sketch_ints = array(INT32)
+        self.sketch_doubles = array('d')
+        self.bucket_idxs = array(INT32)
+        self.bucket_counts = array('d')
+
+    def name(self, name):
+        if name is None:
+            return -1
+        i = self.name_index.get(name)
+        if i is None:
+            i = self.name_index[name] = len(self.names)
+            self.names.append(str(name))
+        return i
+
+    def add_node(self, times, parent, pos, par_name):
+        k = len(self.node_ints) // NODE_INTS
+        stamps = times.stamps
+        first = len(self.stamp_names)
+        par_in_parent = times.par_in_parent
+        par_i = -2 if par_in_parent is True else self.name(par_in_parent)
+        self.node_ints.extend([parent, pos, par_name, self.name(times.name),
+                               self.name(times.pos_in_parent), par_i,
+                               int(bool(times.save_itrs)), first,
+                               len(stamps.order)])
+        self.node_doubles.extend([times.total, times.stamps_sum,
+                                  times.self_agg, times.bias_agg])
+        self.stamp_names.extend([self.name(s) for s in stamps.order])
+        self.stamp_cums.fromlist([float(v) for v in stamps.vals_cum])
+        for i, (cum, num, v_max, v_min, m2) in enumerate(zip(
+                stamps.vals_cum, stamps.vals_num, stamps.vals_max,
+                stamps.vals_min, stamps.vals_m2)):
+            if num == 1 and v_max == cum and v_min == cum and m2 == 0:
+                continue  # (values of a single iteration, implied)
+            self.stats_ints.append(first + i)
+            self.stats_doubles.extend([_or_nan(num), _or_nan(v_max),
+                                       _or_nan(v_min), _or_nan(m2)])
+        for s, itrs in iteritems(stamps.itrs):
+            self.add_itrs(first + stamps.index[s], itrs)
+        for s, sketch in iteritems(stamps.sketch):
+            self.add_sketch(first + stamps.index[s], sketch)
+        for sub_pos, sub_list in iteritems(times.subdvsn):
+            pos_i = self.name(sub_pos)
+            for sub in sub_list:
+                self.add_node(sub, k, pos_i, -1)
+        for sub_pos, par_dict in iteritems(times.par_subdvsn):
+            pos_i = self.name(sub_pos)
+            for par_name, par_list in iteritems(par_dict):
+                par_name_i = self.name(par_name)
+                for sub in par_list:
+                    self.add_node(sub, k, pos_i, par_name_i)
+
+    def add_itrs(self, j, itrs):
+        if isinstance(itrs, Reservoir):
+            kind, param, seen = ITRS_RESERVOIR, itrs.limit, itrs.seen
+        elif isinstance(itrs, deque):
+            kind, param, seen = ITRS_DEQUE, _or_nan(itrs.maxlen), 0
+        else:
+            kind, param, seen = ITRS_ARRAY, NAN, 0
+        self.itrs_ints.extend([j, kind, len(itrs)])
+        self.itrs_doubles.extend([param, seen])
+        if isinstance(itrs, array) and itrs.typecode == 'd':
+            self.itr_vals.extend(itrs)
+        else:
+            self.itr_vals.fromlist([float(v) for v in itrs])
+
+    def add_sketch(self, j, sketch):
+        self.sketch_ints.extend([j, len(sketch.buckets)])
+        self.sketch_doubles.extend([sketch.rel_acc, sketch.unit, sketch.zeros,
+                                    sketch.count])
+        self.bucket_idxs.fromlist(list(sketch.buckets))
+        self.bucket_counts.fromlist([float(n) for n in sketch.buckets.values()])
+
+
+class _Reader(object):
+
+    def __init__(self, data, offset):
+        self.data = data
+        self.offset = offset
+
+    def read(self, typecode, count):
+        arr = array(typecode)
+        end = self.offset + count * arr.itemsize
+        if end > len(self.data):
+            raise ValueError("Truncated gtimer binary data.")
+        _frombytes(arr, self.data[self.offset:end])
+        if sys.byteorder == 'big':
+            arr.byteswap()
+        self.offset = end
+        return arr
+
+    def read_bytes(self, count):
+        end = self.offset + count
+        if end > len(self.data):
+            raise ValueError("Truncated gtimer binary data.")
+        b = self.data[self.offset:end]
+        self.offset = end
+        return b
+
+
+def _stats(doubles):
+    # (itr_num, itr_max, itr_min, itr_m2, with NaN for None)
+    num, v_max, v_min, m2 = doubles
+    return (None if num != num else int(num), None if v_max != v_max else v_max,
+            None if v_min != v_min else v_min, None if m2 != m2 else m2)
+
+
+def _itrs(kind, param, seen, values):
+    if kind == ITRS_ARRAY:
+        return values
+    if kind == ITRS_DEQUE:
+        return deque(values, maxlen=None if param != param else int(param))
+    itrs = Reservoir(int(param))
+    itrs.extend(values)  # (list.extend, not sampling)
+    itrs.seen = int(seen)
+    return itrs
+
+
+def _sketch(doubles, idxs, counts):
+    rel_acc, unit, zeros, count = doubles
+    sketch = Sketch(rel_acc, unit)
+    sketch.zeros = int(zeros)
+    sketch.count = int(count)
+    sketch.buckets = dict(zip(idxs, [int(n) for n in counts]))
+    return sketch
+
+
+def _or_nan(value):
+    return NAN if value is None else value
+
+
+def _to_bytes(arr):
+    if sys.byteorder == 'big':
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes() if hasattr(arr, 'tobytes') else arr.tostring()
+
+
+def _frombytes(arr, data):
+    if hasattr(arr, 'frombytes'):
+        arr.frombytes(data)
+    else:  # (Python 2)
+        arr.fromstring(data)
@@ -0,0 +1,114 @@
+
+"""
+Memory-mapped file through which one process publishes its latest timing
+data (in the binary format, see binary) and others read it.  After a header
+(magic, version, sequence number, data length) comes the data.  The writer
+makes the sequence number odd while writing and even when done, and readers
+retry until they see the same even number before and after copying the data
+(a sequence lock), so neither side waits on the other.  The writer grows the
+file as needed, and readers remap it when they find it has grown.
+"""
+from __future__ import absolute_import
+import mmap
+import os
+import struct
+import time
+
+
+MAGIC = b'GTMM'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQ')  # magic, version, (unused), sequence, length
+SEQ = struct.Struct('<Q')
+SEQ_OFFSET, LEN_OFFSET = 8, 16
+READ_TIMEOUT = 1.  # seconds spent retrying a read before giving up
+
+
+class MmapChannel(object):
+    """ One memory-mapped file, open for writing (by one process only) or
+    reading."""
+
+    def __init__(self, filename, init_size=10000, write=True):
+        self.filename = str(filename)
+        self.write = write
+        flags = os.O_RDWR | os.O_CREAT if write else os.O_RDONLY | os.O_CREAT
+        self.fd = os.open(self.filename, flags, 0o644)
+        self.mm = None
+        self.seq = 0
+        if write:
+            if os.fstat(self.fd).st_size < HEADER.size:
+                os.ftruncate(self.fd, max(int(init_size), HEADER.size))
+            self._map()
+            magic, version = HEADER.unpack_from(self.mm)[:2]
+            if magic == b'\0' * 4:
+                HEADER.pack_into(self.mm, 0, MAGIC, VERSION, 0, 0, 0)
+            else:
+                self._check_header(magic, version)
+                self.seq = SEQ.unpack_from(self.mm, SEQ_OFFSET)[0]
+                self.seq += self.seq % 2  # (in case a writer stopped midway)
+
+    def publish(self, data):
+        """Write data (bytes) for readers, replacing what was there."""
+        if not self.write:
+            raise ValueError("Channel {} not open for writing.".format(self.filename))
+        end = HEADER.size + len(data)
+        if end > len(self.mm):
+            os.ftruncate(self.fd, max(end, 2 * len(self.mm)))
+            self._map()
+        mm = self.mm
+        SEQ.pack_into(mm, SEQ_OFFSET, self.seq + 1)
+        mm[HEADER.size:end] = data
+        SEQ.pack_into(mm, LEN_OFFSET, len(data))
+        SEQ.pack_into(mm, SEQ_OFFSET, self.seq + 2)
+        self.seq += 2
+
+    def read(self):
+        """The data last published (bytes), or None if nothing yet."""
+        deadline = time.time() + READ_TIMEOUT
+        while True:
+            if self.mm is None:
+                if os.fstat(self.fd).st_size < HEADER.size:  # (no writer yet)
+                    return None
+                self._map()
+            mm = self.mm
+            magic, version = HEADER.unpack_from(mm)[:2]
+            if magic == b'\0' * 4:  # (writer still starting)
+                return None
+            self._check_header(magic, version)
+            # (Read the sequence number on its own, before the length.)
+            seq = SEQ.unpack_from(mm, SEQ_OFFSET)[0]
+            if seq == 0:
+                return None
+            end = HEADER.size + SEQ.unpack_from(mm, LEN_OFFSET)[0]
+            if seq % 2 == 0:
+                if end > len(mm):  # (grown, or else length is torn)
+                    if os.fstat(self.fd).st_size > len(mm):
+                        self._map()
+                else:
+                    data = mm[HEADER.size:end]
+                    if SEQ.unpack_from(mm, SEQ_OFFSET)[0] == seq:
+                        return data
+            if time.time() > deadline:
+                raise RuntimeError("Could not read consistent data from {} "
+                                   "(writer stalled?).".format(self.filename))
+            time.sleep(0)
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def _map(self):
+        if self.mm is not None:
+            self.mm.close()
+        access = mmap.ACCESS_WRITE if self.write else mmap.ACCESS_READ
+        self.mm = mmap.mmap(self.fd, 0, access=access)
+
+    def _check_header(self, magic, version):
+        if magic != MAGIC:
+            raise ValueError("Not a gtimer mmap file: {}".format(self.filename))
+        if version > VERSION:
+            raise ValueError("Unsupported gtimer mmap version: {} in {}".format(
+                version, self.filename))
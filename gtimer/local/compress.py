@@ -0,0 +1,69 @@
+
+"""
+Compressed streams for saved Times data, through the standard library's
+file objects (gzip, bz2, lzma), so that a pickle passes through the
+compressor as it is written and through the decompressor as it is read.  The
+format of a file is recognized from its first bytes (zlib is written with a
+gzip header, for this).
+"""
+from __future__ import absolute_import
+import bz2
+import gzip
+import sys
+try:
+    import lzma
+except ImportError:  # (Python 2)
+    lzma = None
+
+
+COMPRESSIONS = ('zlib', 'bz2', 'lzma')
+DEFAULT_LEVELS = {'zlib': 6, 'bz2': 9, 'lzma': 6}
+MAGICS = ((b'\x1f\x8b', 'zlib'), (b'BZh', 'bz2'), (b'\xfd7zXZ\x00', 'lzma'))
+MAGIC_LEN = 6
+
+
+def writer(file, compress, level=None):
+    """Wrap a binary file open for writing, to compress what is written
+    through the wrapper (close the wrapper to finish the stream; the file
+    stays open)."""
+    check(compress)
+    level = DEFAULT_LEVELS[compress] if level is None else int(level)
+    if compress == 'zlib':
+        return gzip.GzipFile(fileobj=file, mode='wb', compresslevel=level, mtime=0)
+    if compress == 'bz2':
+        return bz2.BZ2File(file, 'wb', compresslevel=level)
+    return lzma.LZMAFile(file, 'wb', preset=level)
+
+
+def check(compress):
+    """Raise ValueError unless compress is recognized and available."""
+    if compress not in COMPRESSIONS:
+        raise ValueError("Unrecognized compress: {}, expected one of {}.".format(
+            compress, COMPRESSIONS))
+    _check_available(compress)
+
+
+def detect(head):
+    """Compression of a file from its first bytes (at least MAGIC_LEN, if
+    there are that many), or None if not compressed."""
+    for magic, compress in MAGICS:
+        if head.startswith(magic):
+            return compress
+    return None
+
+
+def reader(file, compress):
+    """Wrap a binary file open for reading, to read decompressed data through
+    the wrapper."""
+    _check_available(compress)
+    if compress == 'zlib':
+        return gzip.GzipFile(fileobj=file, mode='rb')
+    if compress == 'bz2':
+        return bz2.BZ2File(file, 'rb')
+    return lzma.LZMAFile(file, 'rb')
+
+
+def _check_available(compress):
+    # (Python 2's BZ2File takes only a filename, and it has no lzma.)
+    if compress != 'zlib' and sys.version_info[0] < 3:
+        raise ValueError("Compress '{}' requires Python 3.".format(compress))
@@ -0,0 +1,125 @@
+
+"""
+Containers for individual iteration times, either unbounded (typed array, of
+the clock's type) or keeping a bounded number: the most recent (deque), or a
+uniform random sample (Reservoir).  Iteration count, sum, max, and min are
+kept separately in the Stamps, so those stay exact either way.
+"""
+from __future__ import absolute_import
+from array import array
+from collections import deque
+import random
+
+
+#
+# Retention policy for new containers (set through the public interface).
+#
+
+POLICY = {'LIMIT': None,  # (None: unbounded)
+          'MODE': 'last',  # 'last' or 'sample'
+          'TYPECODE': 'd',  # of unbounded arrays ('q' with the nanosecond clock)
+          }
+
+MODES = ('last', 'sample')
+
+
+def new_itrs(values=None, policy=None):
+    if policy is None:
+        policy = POLICY
+    limit = policy['LIMIT']
+    if limit is None:
+        itrs = array(policy['TYPECODE'])
+    elif policy['MODE'] == 'last':
+        itrs = deque(maxlen=limit)
+    else:
+        itrs = Reservoir(limit)
+    if values is not None:
+        for value in values:
+            itrs.append(value)
+    return itrs
+
+
+def extend_itrs(itrs, other):
+    """Append the values of other to itrs, returning the container."""
+    if isinstance(itrs, array) and not isinstance(other, array):
+        itrs.fromlist(list(other))
+    else:
+        itrs += other
+    return itrs
+
+
+def to_array(itrs):
+    """The values as a typed array (the same object if already one)."""
+    if isinstance(itrs, array):
+        return itrs
+    return array('d', itrs)
+
+
+def map_itrs(itrs, func, typecode='d'):
+    """Return a container of the same kind with func applied to each value
+    (arrays of the given type)."""
+    if isinstance(itrs, array):
+        return array(typecode, [func(v) for v in itrs])
+    if isinstance(itrs, Reservoir):
+        new = Reservoir(itrs.limit)
+        new.extend(func(v) for v in itrs)  # (list.extend, not sampling)
+        new.seen = itrs.seen
+        return new
+    if isinstance(itrs, deque):
+        return deque((func(v) for v in itrs), maxlen=itrs.maxlen)
+    return [func(v) for v in itrs]
+
+
+class Reservoir(list):
+    """ Uniform random sample of at most limit values, out of all appended."""
+
+    def __init__(self, limit):
+        super(Reservoir, self).__init__()
+        self.limit = limit
+        self.seen = 0
+
+    def append(self, value):
+        self.seen += 1
+        if len(self) < self.limit:
+            super(Reservoir, self).append(value)
+        else:
+            i = random.randrange(self.seen)
+            if i < self.limit:
+                self[i] = value
+
+    def __reduce__(self):
+        # (Default list pickling and copying re-append the values.)
+        return (_rebuild_reservoir, (self.limit, self.seen, list(self)))
+
+    def __iadd__(self, other):
+        if isinstance(other, Reservoir):
+            self._merge(other)
+        else:
+            for value in other:
+                self.append(value)
+        return self
+
+    def _merge(self, other):
+        # How many members of the combined sample come from each side follows
+        # drawing (without replacement) from all the values seen.
+        left, right = list(self), list(other)
+        random.shuffle(left)
+        random.shuffle(right)
+        n_left, n_right = self.seen, other.seen
+        sample = []
+        while len(sample) < self.limit and (left or right):
+            if right and (not left or random.randrange(n_left + n_right) >= n_left):
+                sample.append(right.pop())
+                n_right -= 1
+            else:
+                sample.append(left.pop())
+                n_left -= 1
+        self[:] = sample
+        self.seen += other.seen
+
+
+def _rebuild_reservoir(limit, seen, values):
+    new = Reservoir(limit)
+    new.extend(values)
+    new.seen = seen
+    return new
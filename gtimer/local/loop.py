@@ -3,16 +3,27 @@
 Class which holds loop data regarding stamp names and accumulated times
 on a per-iteration basis.
 """
+from __future__ import absolute_import
+
+from gtimer.local.sketch import POLICY as SKETCH_POLICY
 
 
 class Loop(object):
     """Hold info for name checking and assigning."""
 
+    __slots__ = ('name', 'stamps', 'stamp_set', 'rgstr_stamps', 'save_itrs',
+                 'itr_stamps', 'sketch', 'first_itr')
+
     def __init__(self, name=None, rgstr_stamps=None, save_itrs=True):
         self.name = None if name is None else str(name)
         self.stamps = list()
+        self.stamp_set = set()  # (same as stamps, for membership)
         self.rgstr_stamps = rgstr_stamps
-        self.itr_stamp_used = dict()
         self.save_itrs = save_itrs
-        self.itr_stamps = dict()
+        self.itr_stamps = dict()  # (only those used in this iteration)
+        self.sketch = SKETCH_POLICY['ON']
         self.first_itr = True
+
+    def add_stamp(self, name):
+        self.stamps.append(name)
+        self.stamp_set.add(name)
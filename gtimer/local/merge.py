@@ -3,8 +3,11 @@
 Merging data from a new times instances into the receiving instance
 (e.g. when they correspond to the same code segments.).
 """
-from __future__ import absolute_import
+from __future__ import absolute_import, division
+import copy
 
+from gtimer.local.itrs import new_itrs, extend_itrs
+from gtimer.local.times import SubdvsnList, unshare, iter_subdivisions
 from gtimer.util import iteritems
 
 
@@ -13,13 +16,34 @@ from gtimer.util import iteritems
 #
 
 
-def merge_times(rcvr, new):
+def merge_times(rcvr, new, itrs_policy=None):
+    # (rcvr must not be shared, see unshare(); new is left intact if shared.
+    # New itrs containers follow itrs_policy, default the global one.)
+    if new.shared:  # (its subdivisions become held by rcvr as well)
+        for sub in iter_subdivisions(new):
+            sub.shared = True
     rcvr.total += new.total
     rcvr.stamps_sum += new.stamps_sum
     rcvr.self_agg += new.self_agg
-    _merge_stamps(rcvr, new)
-    _merge_subdivisions(rcvr, new)
-    _merge_par_subdivisions(rcvr, new)
+    rcvr.bias_agg += new.bias_agg
+    _merge_stamps(rcvr, new, itrs_policy)
+    _merge_subdivisions(rcvr, new, itrs_policy)
+    _merge_par_subdivisions(rcvr, new, itrs_policy)
+
+
+def merge_all(times_list, itrs_policy=None):
+    """Merge times into one, by balanced pairwise reduction (each merged into
+    another, not copied), returning the one holding the result."""
+    times_list = [unshare(times, times.parent) for times in times_list]
+    while len(times_list) > 1:
+        merged = list()
+        for i in range(0, len(times_list) - 1, 2):
+            merge_times(times_list[i], times_list[i + 1], itrs_policy)
+            merged.append(times_list[i])
+        if len(times_list) % 2:
+            merged.append(times_list[-1])
+        times_list = merged
+    return times_list[0]
 
 
 #
@@ -27,98 +51,135 @@ def merge_times(rcvr, new):
 #
 
 
-def _merge_stamps(rcvr, new):
+def _merge_stamps(rcvr, new, itrs_policy=None):
     save_itrs = rcvr.save_itrs
+    shared = new.shared
     rcvr = rcvr.stamps
     new = new.stamps
-    for s in new.order:
-        if s not in rcvr.order:
-            rcvr.order.append(s)
     if save_itrs:
-        _stamps_as_itr(rcvr, new)  # do this before cum
-    _merge_dict(rcvr, new, 'itrs')  # (in any case, maybe loop with save_itrs)
-    _merge_dict(rcvr, new, 'cum')
-    _merge_dict(rcvr, new, 'itr_num')
-    _merge_dict_itr(rcvr, new, 'itr_max', max)
-    _merge_dict_itr(rcvr, new, 'itr_min', min)
-
-
-def _merge_dict(rcvr, new, attr):
-    rcvr_dict = getattr(rcvr, attr)
-    new_dict = getattr(new, attr)
-    for k, v in iteritems(new_dict):
-        if k in rcvr_dict:
-            rcvr_dict[k] += v
+        _stamps_as_itr(rcvr, new, itrs_policy)  # do this before cum
+    _merge_itrs(rcvr, new, shared)  # (in any case, maybe loop with save_itrs)
+    _merge_sketch(rcvr, new, shared)
+    for j, s in enumerate(new.order):
+        i = rcvr.index.get(s)
+        if i is None:
+            i = rcvr.add(s, new.vals_cum[j])
+            rcvr.vals_num[i] = new.vals_num[j]
+            rcvr.vals_max[i] = new.vals_max[j]
+            rcvr.vals_min[i] = new.vals_min[j]
+            rcvr.vals_m2[i] = new.vals_m2[j]
+            continue
+        n_a, n_b = rcvr.vals_num[i], new.vals_num[j]
+        if n_b is not None:
+            if n_a is None:
+                rcvr.vals_num[i] = n_b
+                rcvr.vals_max[i] = new.vals_max[j]
+                rcvr.vals_min[i] = new.vals_min[j]
+                rcvr.vals_m2[i] = new.vals_m2[j]
+            else:
+                rcvr.vals_m2[i] = _combine_m2(rcvr.vals_m2[i], new.vals_m2[j],
+                    rcvr.vals_cum[i], new.vals_cum[j], n_a, n_b)
+                rcvr.vals_num[i] = n_a + n_b
+                # (A registered stamp never used holds max and min 0, not
+                # values of any iteration, see dump_times().)
+                if n_a == 0:
+                    rcvr.vals_max[i] = new.vals_max[j]
+                    rcvr.vals_min[i] = new.vals_min[j]
+                elif n_b > 0:
+                    rcvr.vals_max[i] = max(new.vals_max[j], rcvr.vals_max[i])
+                    rcvr.vals_min[i] = min(new.vals_min[j], rcvr.vals_min[i])
+        rcvr.vals_cum[i] += new.vals_cum[j]
+
+
+def _combine_m2(m2_a, m2_b, cum_a, cum_b, n_a, n_b):
+    # Combine variances of two sets of iterations (Chan et al.).
+    if m2_a is None or m2_b is None:
+        return m2_b if m2_a is None else m2_a
+    m2 = m2_a + m2_b
+    if n_a > 0 and n_b > 0:
+        delta = cum_b / n_b - cum_a / n_a
+        m2 += delta * delta * n_a * n_b / (n_a + n_b)
+    return m2
+
+
+def _merge_itrs(rcvr, new, shared=False):
+    for k, v in iteritems(new.itrs):
+        if k in rcvr.itrs:
+            rcvr.itrs[k] = extend_itrs(rcvr.itrs[k], v)
         else:
-            rcvr_dict[k] = v
+            rcvr.itrs[k] = copy.copy(v) if shared else v
 
 
-def _merge_dict_itr(rcvr, new, attr, itr_func):
-    rcvr_dict = getattr(rcvr, attr)
-    new_dict = getattr(new, attr)
-    for k, v in iteritems(new_dict):
-        if k in rcvr_dict:
-            rcvr_dict[k] = itr_func(v, rcvr_dict[k])
+def _merge_sketch(rcvr, new, shared=False):
+    for k, v in iteritems(new.sketch):
+        if k in rcvr.sketch:
+            rcvr.sketch[k].merge(v)
         else:
-            rcvr_dict[k] = v
-
-
-def _stamps_as_itr(rcvr, new):
-    for k, v in iteritems(new.cum):
-        if new.itr_num[k] == 1:  # (then it won't be in new.itrs)
-            if k in rcvr.itrs:
-                rcvr.itrs[k].append(v)
-            elif k in rcvr.cum:
-                rcvr.itrs[k] = [rcvr.cum[k], v]
-
-
-def _merge_subdivisions(rcvr, new):
+            rcvr.sketch[k] = copy.deepcopy(v) if shared else v
+
+
+def _stamps_as_itr(rcvr, new, itrs_policy=None):
+    # (A stamp timed once outside of loops has no itrs: its value is the cum.
+    # A loop of one iteration has itrs, merged as such.)
+    for j, s in enumerate(new.order):
+        if s in new.itrs:
+            i = rcvr.index.get(s)
+            if s not in rcvr.itrs and i is not None and rcvr.vals_num[i] == 1:
+                rcvr.itrs[s] = new_itrs([rcvr.vals_cum[i]], itrs_policy)  # (then extended)
+        elif new.vals_num[j] == 1:
+            if s in rcvr.itrs:
+                rcvr.itrs[s].append(new.vals_cum[j])
+            elif s in rcvr.index:
+                rcvr.itrs[s] = new_itrs([rcvr.vals_cum[rcvr.index[s]], new.vals_cum[j]],
+                                        itrs_policy)
+
+
+def _merge_subdivisions(rcvr, new, itrs_policy=None):
     for sub_pos, new_sub_list in iteritems(new.subdvsn):
         if sub_pos in rcvr.subdvsn:
-            add_list = []  # to avoid writing to loop iterate
-            for new_sub in new_sub_list:
-                for rcvr_sub in rcvr.subdvsn[sub_pos]:
-                    if rcvr_sub.name == new_sub.name:
-                        merge_times(rcvr_sub, new_sub)
-                        break
-                else:
-                    new_sub.parent = rcvr
-                    add_list.append(new_sub)
-            rcvr.subdvsn[sub_pos] += add_list
+            _merge_sub_list(rcvr, rcvr.subdvsn[sub_pos], new_sub_list,
+                            itrs_policy=itrs_policy)
         else:
             for sub in new_sub_list:
-                sub.parent = rcvr
-            rcvr.subdvsn[sub_pos] = new_sub_list
+                _adopt(rcvr, sub)
+            rcvr.subdvsn[sub_pos] = SubdvsnList(new_sub_list)
     # Clean up references to old data as we go (not sure if helpful?).
-    new.subdvsn.clear()
+    if not new.shared:
+        new.subdvsn.clear()
 
 
-def _merge_par_subdivisions(rcvr, new):
+def _merge_par_subdivisions(rcvr, new, itrs_policy=None):
     for sub_pos, par_dict in iteritems(new.par_subdvsn):
-        if sub_pos in rcvr.par_subdvsn:
-            for par_name, new_list in iteritems(par_dict):
-                if par_name in rcvr.par_subdvsn[sub_pos]:
-                    rcvr_list = rcvr.par_subdvsn[sub_pos][par_name]
-                    add_list = []  # to avoid writing to loop iterate
-                    for new_sub in new_list:
-                        for rcvr_sub in rcvr_list:
-                            if rcvr_sub.name == new_sub.name:
-                                merge_times(rcvr_sub, new_sub)
-                                break
-                        else:
-                            new_sub.parent = rcvr
-                            new_sub.par_in_parent = True
-                            add_list.append(new_sub)
-                    rcvr.par_subdvsn[sub_pos][par_name] += add_list
-                else:
-                    for new_sub in new_list:
-                        new_sub.parent = rcvr
-                        new_sub.par_in_parent = True
-                    rcvr.par_subdvsn[sub_pos][par_name] = new_list
+        if sub_pos not in rcvr.par_subdvsn:
+            rcvr.par_subdvsn[sub_pos] = dict()
+        rcvr_dict = rcvr.par_subdvsn[sub_pos]
+        for par_name, new_list in iteritems(par_dict):
+            if par_name in rcvr_dict:
+                _merge_sub_list(rcvr, rcvr_dict[par_name], new_list, par=True,
+                                itrs_policy=itrs_policy)
+            else:
+                for new_sub in new_list:
+                    _adopt(rcvr, new_sub, par=True)
+                rcvr_dict[par_name] = SubdvsnList(new_list)
+    if not new.shared:
+        new.par_subdvsn.clear()
+
+
+def _merge_sub_list(rcvr, rcvr_list, new_list, par=False, itrs_policy=None):
+    # (Names are unique within each list, so matching by name is a lookup.)
+    for new_sub in new_list:
+        i = rcvr_list.find(new_sub.name)
+        if i is None:
+            _adopt(rcvr, new_sub, par=par)
+            rcvr_list.append(new_sub)
         else:
-            for par_name, par_list in iteritems(par_dict):
-                for new_sub in par_list:
-                    new_sub.parent = rcvr
-                    new_sub.par_in_parent = True
-            rcvr.par_subdvsn[sub_pos] = par_dict
-    new.par_subdvsn.clear()
+            rcvr_sub = rcvr_list[i] = unshare(rcvr_list[i], rcvr)
+            merge_times(rcvr_sub, new_sub, itrs_policy)
+
+
+def _adopt(rcvr, sub, par=False):
+    # (A shared one keeps its parent, a times of the same name and lineage.)
+    if not sub.shared:
+        sub.parent = rcvr
+        if par:
+            sub.par_in_parent = True
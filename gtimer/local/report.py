@@ -4,8 +4,10 @@ Internal reporting functions acting on locally provided variables (user is
 provided global versions which call to these, see .public.report).
 """
 from __future__ import absolute_import, division
+import copy
 
 from gtimer.private.const import UNASGN
+from gtimer.local.sketch import QUANTILES
 from gtimer.util import iteritems, itervalues
 
 #
@@ -129,6 +131,7 @@ def _define_report_formats(delim_mode, fmt_opts=None):
             'STMP': "\n{}",  # accepts: name
             'FLT': "{}{{}}".format(DELIM),  # accepts: float
             'INT': "{}{{}}".format(DELIM),  # accepts: int
+            'NON': DELIM,
             'LNG': DELIM
         }
     else:
@@ -176,6 +179,7 @@ def _define_report_formats(delim_mode, fmt_opts=None):
             'STMP': "\n{{:<{}}}".format(ITR_NAME),  # accepts: name
             'FLT': "{}{{:{}.2f}}".format(' ' * ITR_TAB, ITR_NUM),  # accepts: float
             'INT': "{}{{:>{},d}}".format(' ' * ITR_TAB, ITR_NUM),  # accepts: int
+            'NON': ' ' * (ITR_TAB + ITR_NUM),
             'LNG': ' '
         }
 
@@ -189,6 +193,8 @@ def _report_header(times, timer_state):
     rep += FMT['HDR_FLT'].format('Total Time (s)' + FMT['APND'], times.total)
     rep += FMT['HDR_FLT'].format('Stamps Sum' + FMT['APND'], times.stamps_sum)
     rep += FMT['HDR_FLT'].format('Self Time (Agg.)' + FMT['APND'], times.self_agg)
+    if times.bias_agg:
+        rep += FMT['HDR_FLT'].format('Calib. Bias (Agg.)' + FMT['APND'], times.bias_agg)
     return rep
 
 
@@ -237,30 +243,45 @@ def _report_itr_stats(times, delim_mode):
     # FMT1 = FMTS_RPT['Stamps']
     rep = ''
     rep += "\n" + FMT['STMP'].format('')
-    headers = ['Total', 'Mean', 'Max', 'Min', 'Num']
+    stamps = times.stamps
+    headers = ['Total', 'Mean', 'StDev', 'Max', 'Min', 'Num']
+    if stamps.sketch:
+        headers += _quantile_headers()
     for hdr in headers:
         rep += FMT['HDR'].format(hdr)
     if not delim_mode:
         rep += FMT['STMP'].format('')
         for _ in range(len(headers)):
             rep += FMT['HDR'].format('------')
-    stamps = times.stamps
     for s, num in iteritems(stamps.itr_num):
         if num > 1:
             rep += FMT['STMP'].format(s)
             values = [stamps.cum[s],
                       stamps.cum[s] / stamps.itr_num[s],
+                      (stamps.itr_m2[s] / stamps.itr_num[s]) ** 0.5,
                       stamps.itr_max[s],
                       stamps.itr_min[s]]
             for val in values:
                 rep += FMT['FLT'].format(val)
             rep += FMT['INT'].format(stamps.itr_num[s])
+            if s in stamps.sketch:
+                for q in QUANTILES:
+                    rep += FMT['FLT'].format(stamps.sketch[s].quantile(q))
+            elif stamps.sketch:
+                rep += FMT['NON'] * len(QUANTILES)
     rep += "\n"
     return rep
 
 
-def _report_itrs(times, delim_mode=False, include_itrs=True, include_stats=True):
+def _quantile_headers():
+    return ['p{:g}'.format(100 * q) for q in QUANTILES]
+
+
+def _report_itrs(times, delim_mode=False, include_itrs=True, include_stats=True,
+                 lineage=None):
     FMT = FMTS_RPT['Itrs']
+    if lineage is None:
+        lineage = _get_lineage(times)
     rep = ''
     stamps = times.stamps
     any_itrs = False
@@ -271,8 +292,8 @@ def _report_itrs(times, delim_mode=False, include_itrs=True, include_stats=True)
     if any_itrs:
         rep += "\n"
         rep += FMT['HDR'].format('Timer' + FMT['APND'], times.name)
-        if times.parent is not None:
-            lin_str = _fmt_lineage(_get_lineage(times))
+        if lineage:
+            lin_str = _fmt_lineage(lineage)
             rep += FMT['HDR'].format('Lineage' + FMT['APND'], lin_str)
         if include_stats:
             rep += _report_itr_stats(times, delim_mode)
@@ -307,13 +328,19 @@ def _report_itrs(times, delim_mode=False, include_itrs=True, include_stats=True)
                 rep += next_line
             itr += 1
         rep += "\n"
+    # (Lineage passed down rather than read from parents, which may be shared
+    # with another hierarchy, see collapse.)
     for subdvsn in itervalues(times.subdvsn):
         for sub_times in subdvsn:
-            rep += _report_itrs(sub_times, delim_mode, include_itrs)
+            sub_lineage = lineage + ((times.name, sub_times.pos_in_parent), )
+            rep += _report_itrs(sub_times, delim_mode, include_itrs,
+                                lineage=sub_lineage)
     for par_subdvsn in itervalues(times.par_subdvsn):
         for par_list in itervalues(par_subdvsn):
             sub_with_max_tot = max(par_list, key=lambda x: x.total)
-            rep += _report_itrs(sub_with_max_tot, delim_mode, include_itrs)
+            sub_lineage = lineage + ((times.name, sub_with_max_tot.pos_in_parent), )
+            rep += _report_itrs(sub_with_max_tot, delim_mode, include_itrs,
+                                lineage=sub_lineage)
     return rep
 
 
@@ -356,6 +383,11 @@ def _build_master_single(master, times, index, num_times):
             if stamp not in master.stamps:
                 master.stamps[stamp] = [''] * num_times
             master.stamps[stamp][index] = val
+        for stamp, sketch in iteritems(times.stamps.sketch):
+            if stamp in master.sketch:
+                master.sketch[stamp].merge(sketch)
+            else:
+                master.sketch[stamp] = copy.deepcopy(sketch)
         for stamp, sub_list in iteritems(times.subdvsn):
             if stamp not in master.subdvsn:
                 master.subdvsn[stamp] = list()
@@ -388,6 +420,7 @@ class CompareTimes(object):
         self.parent = parent
         self.stamps = dict()
         self.stats = dict()
+        self.sketch = dict()  # (merged over all times)
         self.subdvsn = dict()
         self.par_subdvsn = dict()  # (layout of contents not same as in Times!)
 
@@ -514,6 +547,50 @@ def _compare_stats(times_list, master, delim_mode):
     rep += "\n\n"
     rep += _compare_stamps(master, stats_mode=True)
     rep += "\n"
+    if _any_sketch(master):
+        if not delim_mode:
+            rep += FMT['NM_BLNK']
+        headers = _quantile_headers() + ['Num']
+        for hdr in headers:
+            rep += FMT['HDR'].format(hdr)
+        if not delim_mode:
+            rep += FMT['NM_BLNK']
+            for _ in range(len(headers)):
+                rep += FMT['HDR'].format('------')
+        rep += _compare_quantiles(master)
+        rep += "\n\n"
+    return rep
+
+
+def _any_sketch(master):
+    if master.sketch:
+        return True
+    for sub_list in itervalues(master.subdvsn):
+        for master_sub in sub_list:
+            if _any_sketch(master_sub):
+                return True
+    for sub_dict in itervalues(master.par_subdvsn):
+        for master_sub in itervalues(sub_dict):
+            if _any_sketch(master_sub):
+                return True
+    return False
+
+
+def _compare_quantiles(master, indent=0):
+    """Quantiles of iteration times, over all the times compared."""
+    FMT = FMTS_CMP['Stats']
+    rep = ''
+    for stamp in master.stamps:
+        if stamp in master.sketch:
+            sketch = master.sketch[stamp]
+            rep += FMT['NAME'].format(FMT['IDT_SYM'] * indent, stamp + FMT['APND'])
+            for q in QUANTILES:
+                rep += FMT['FLT'].format(sketch.quantile(q))
+            rep += FMT['INT'].format(sketch.count)
+        for master_sub in master.subdvsn.get(stamp, []):
+            rep += _compare_quantiles(master_sub, indent + 1)
+        for master_sub in itervalues(master.par_subdvsn.get(stamp, {})):
+            rep += _compare_quantiles(master_sub, indent + 1)
     return rep
 
 
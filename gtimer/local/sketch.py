@@ -0,0 +1,71 @@
+
+"""
+Streaming quantile sketch of iteration times: a histogram with logarithmic
+buckets (as in DDSketch), giving quantiles within a fixed relative accuracy,
+in constant time per value and bounded memory, and merging exactly.
+"""
+from __future__ import absolute_import
+import math
+
+from gtimer.util import iteritems
+
+
+#
+# Policy for new loops (set through the public interface).
+#
+
+POLICY = {'ON': False,
+          'REL_ACC': 0.01,  # relative accuracy of quantiles
+          'UNIT': 1.,  # seconds per clock unit (1e-9 with the nanosecond clock)
+          }
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def new_sketch():
+    return Sketch(POLICY['REL_ACC'], POLICY['UNIT'])
+
+
+class Sketch(object):
+    """ Counts of values (held in seconds) in logarithmic buckets."""
+
+    def __init__(self, rel_acc=0.01, unit=1.):
+        self.rel_acc = rel_acc
+        self.gamma = (1. + rel_acc) / (1. - rel_acc)
+        self.inv_log_gamma = 1. / math.log(self.gamma)
+        self.unit = unit  # (of values added, converted to seconds)
+        self.buckets = dict()  # index --> count
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value > 0:
+            i = int(math.ceil(math.log(value * self.unit) * self.inv_log_gamma))
+            buckets = self.buckets
+            buckets[i] = buckets.get(i, 0) + 1
+        else:
+            self.zeros += 1
+
+    def merge(self, other):
+        if other.rel_acc != self.rel_acc:
+            raise ValueError("Cannot merge sketches of different accuracy.")
+        buckets = self.buckets
+        for i, n in iteritems(other.buckets):
+            buckets[i] = buckets.get(i, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q):
+        """Value (seconds) at quantile q in [0, 1] (0 if empty)."""
+        if self.count == 0:
+            return 0.
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if rank < seen:
+                return 2. * self.gamma ** i / (self.gamma + 1.)
+        return 2. * self.gamma ** max(self.buckets) / (self.gamma + 1.)
@@ -4,10 +4,10 @@ Class which holds temporary timing data which does not need to persis after
 timing is complete.
 """
 from __future__ import absolute_import
-from timeit import default_timer as timer
 import copy
 
 from gtimer.local.times import Times
+from gtimer.private import clock
 from gtimer.util import itervalues
 
 
@@ -16,6 +16,11 @@ class Timer(object):
     (Disappears or irrelevant after timing is complete.)
     """
 
+    __slots__ = ('name', 'rgstr_stamps', 'dump', 'is_named_loop', 'in_loop',
+                 'times', 'is_user_subdvsn', 'stopped', 'paused', 'tmp_total',
+                 'self_cut', 'bias_pending', 'subdvsn_awaiting',
+                 'par_subdvsn_awaiting', 'start_t', 'last_t', 'log_id')
+
     def __init__(self,
                  name,
                  rgstr_stamps=None,
@@ -30,12 +35,14 @@ class Timer(object):
         self.in_loop = bool(in_loop)
         self.times = None
         self.is_user_subdvsn = False
+        self.log_id = None  # (see private.eventlog)
         self.reset()
         self.times = Times(name, **kwargs)
 
     def __deepcopy__(self, memo):
-        new = type(self)(self.name)
-        new.__dict__.update(self.__dict__)
+        new = type(self).__new__(type(self))
+        for attr in Timer.__slots__:
+            setattr(new, attr, getattr(self, attr))
         new.subdvsn_awaiting = copy.deepcopy(self.subdvsn_awaiting, memo)
         new.par_subdvsn_awaiting = copy.deepcopy(self.par_subdvsn_awaiting, memo)
         for sub_times in itervalues(new.subdvsn_awaiting):
@@ -51,11 +58,12 @@ class Timer(object):
     def reset(self):
         self.stopped = False
         self.paused = False
-        self.tmp_total = 0.
-        self.self_cut = 0.
+        self.tmp_total = 0
+        self.self_cut = 0
+        self.bias_pending = 0
         self.subdvsn_awaiting = dict()
         self.par_subdvsn_awaiting = dict()
-        self.start_t = timer()
+        self.start_t = clock.timer()
         self.last_t = self.start_t
         if self.times is not None:
             self.times.reset()
@@ -3,10 +3,15 @@
 Class which holds permanent timing data which needs to persist after timing is
 complete.
 """
-from __future__ import absolute_import
+from __future__ import absolute_import, division
 import copy
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # (Python 2)
+    from collections import MutableMapping
 
-from gtimer.util import itervalues
+from gtimer.local.itrs import to_array
+from gtimer.util import iteritems, itervalues
 
 
 class Times(object):
@@ -14,6 +19,10 @@ class Times(object):
     (Survives after timing is complete).
     """
 
+    __slots__ = ('name', 'parent', 'pos_in_parent', 'save_itrs', 'stamps',
+                 'total', 'stamps_sum', 'self_agg', 'bias_agg', 'subdvsn',
+                 'par_subdvsn', 'par_in_parent', 'shared')
+
     def __init__(self,
                  name=None,
                  parent=None,
@@ -23,11 +32,14 @@ class Times(object):
         self.parent = parent  # refer to another Times instance.
         self.pos_in_parent = pos_in_parent  # refers to a stamp name.
         self.save_itrs = save_itrs
+        self.shared = False  # (also held by a snapshot: copy before writing)
         self.reset()
 
     def __deepcopy__(self, memo):
-        new = type(self)()
-        new.__dict__.update(self.__dict__)
+        new = type(self).__new__(type(self))
+        for attr in Times.__slots__:
+            setattr(new, attr, getattr(self, attr))
+        new.shared = False
         new.stamps = copy.deepcopy(self.stamps, memo)
         new.subdvsn = copy.deepcopy(new.subdvsn, memo)
         new.par_subdvsn = copy.deepcopy(self.par_subdvsn, memo)
@@ -41,22 +53,276 @@ class Times(object):
                     sub.parent = new
         return new
 
+    def __getstate__(self):
+        # (Parent left out: shared subdivisions may refer to one outside the
+        # data pickled, so relink instead.)
+        return dict((attr, getattr(self, attr)) for attr in Times.__slots__
+                    if attr not in ('parent', 'shared'))
+
+    def __setstate__(self, state):
+        # (Also loads pickles from older versions: dict state, maybe lacking
+        # attributes added since.)
+        state.setdefault('bias_agg', 0)
+        self.parent = None
+        for attr, value in iteritems(state):
+            setattr(self, attr, value)
+        self.shared = False
+        self.subdvsn = dict((pos, SubdvsnList(sub_list))
+                            for pos, sub_list in iteritems(self.subdvsn))
+        self.par_subdvsn = dict((pos, dict((par_name, SubdvsnList(par_list))
+                                           for par_name, par_list in iteritems(par_dict)))
+                                for pos, par_dict in iteritems(self.par_subdvsn))
+        for sub in iter_subdivisions(self):
+            sub.parent = self
+
     def reset(self):
         self.stamps = Stamps()
-        self.total = 0.
-        self.stamps_sum = 0.
-        self.self_agg = 0.
+        self.total = 0  # (int zeros keep nanosecond clock data integer)
+        self.stamps_sum = 0
+        self.self_agg = 0
+        self.bias_agg = 0
         self.subdvsn = dict()
         self.par_subdvsn = dict()
         self.par_in_parent = None
 
+    def itrs_array(self, stamp):
+        """
+        Individual iteration times of a stamp, as a typed array.
+
+        Notes:
+            The array supports the buffer protocol, so e.g.
+            numpy.frombuffer(times.itrs_array(stamp)) views it without copying
+            (while the view exists, the array cannot grow).  Iterations held
+            under a retention limit (see set_def_itrs_limit()) are copied into
+            a new array.  Data from get_times() or load_pkl() is in seconds
+            (typecode 'd').
+
+        Args:
+            stamp (any): Stamp name, passed through str().
+
+        Returns:
+            array.array: Iteration times.
+
+        Raises:
+            KeyError: If no iterations were saved for the stamp.
+        """
+        return to_array(self.stamps.itrs[str(stamp)])
+
+
+def share_copy(times, open_sub=None):
+    """Copy of times to write to, sharing its subdivisions, which are marked
+    shared (so they are copied in turn before any write), except open_sub, the
+    times of a running subdivision."""
+    new = type(times).__new__(type(times))
+    for attr in Times.__slots__:
+        setattr(new, attr, getattr(times, attr))
+    new.shared = False
+    new.stamps = times.stamps.copy()
+    new.subdvsn = dict((pos, SubdvsnList(sub_list))
+                       for pos, sub_list in iteritems(times.subdvsn))
+    new.par_subdvsn = dict((pos, dict((par_name, SubdvsnList(par_list))
+                                      for par_name, par_list in iteritems(par_dict)))
+                           for pos, par_dict in iteritems(times.par_subdvsn))
+    for sub in iter_subdivisions(times):
+        if sub is not open_sub:
+            sub.shared = True
+    return new
+
+
+def unshare(times, parent):
+    """Return times, or if shared, a copy of it (under parent) to write to."""
+    if not times.shared:
+        return times
+    new = share_copy(times)
+    new.parent = parent
+    return new
+
+
+def iter_subdivisions(times):
+    for sub_list in itervalues(times.subdvsn):
+        for sub in sub_list:
+            yield sub
+    for par_dict in itervalues(times.par_subdvsn):
+        for par_list in itervalues(par_dict):
+            for sub in par_list:
+                yield sub
+
+
+class SubdvsnList(list):
+    """ Subdivisions at one position (or of one parallel group), in order,
+    with their positions in the list by name (by_name)."""
+
+    __slots__ = ('by_name', )
+
+    def __init__(self, subs=()):
+        super(SubdvsnList, self).__init__(subs)
+        self.by_name = {sub.name: i for i, sub in enumerate(self)}
+
+    def append(self, sub):
+        self.by_name[sub.name] = len(self)
+        super(SubdvsnList, self).append(sub)
+
+    def extend(self, subs):
+        for sub in subs:
+            self.append(sub)
+
+    def __iadd__(self, subs):
+        self.extend(subs)
+        return self
+
+    def find(self, name):
+        """Position in the list of the subdivision with this name, or None."""
+        return self.by_name.get(name)
+
+    def __reduce__(self):
+        # (Pickles and copies as a list, index rebuilt.)
+        return (SubdvsnList, (list(self), ))
+
 
 class Stamps(object):
-    """ Detailed timing breakdown resides here."""
+    """ Detailed timing breakdown resides here.
+
+    Values of each stamp are held in parallel lists, at the slot given by
+    index (stamp name --> slot), which is also the stamp's position in order.
+    The dict-style attributes cum, itr_num, itr_max, itr_min, and itr_m2 are
+    views onto these (a stamp with no iteration data yet holds None).
+    """
+
+    __slots__ = ('index', 'order', 'vals_cum', 'vals_num', 'vals_max',
+                 'vals_min', 'vals_m2', 'itrs', 'sketch')
+
     def __init__(self):
-        self.cum = dict()
-        self.itrs = dict()
-        self.itr_num = dict()
-        self.itr_max = dict()
-        self.itr_min = dict()
+        self.index = dict()
         self.order = list()
+        self.vals_cum = list()
+        self.vals_num = list()
+        self.vals_max = list()
+        self.vals_min = list()
+        self.vals_m2 = list()  # sum of squared deviations from the mean (Welford)
+        self.itrs = dict()
+        self.sketch = dict()
+
+    def add(self, name, cum=0):
+        """Make a slot for a new stamp, returning it."""
+        slot = len(self.order)
+        self.index[name] = slot
+        self.order.append(name)
+        self.vals_cum.append(cum)
+        self.vals_num.append(None)
+        self.vals_max.append(None)
+        self.vals_min.append(None)
+        self.vals_m2.append(None)
+        return slot
+
+    def copy(self):
+        """Copy of the values and iteration data (not sharing containers)."""
+        new = type(self).__new__(type(self))
+        new.index = dict(self.index)
+        for attr in ('order', 'vals_cum', 'vals_num', 'vals_max', 'vals_min',
+                     'vals_m2'):
+            setattr(new, attr, list(getattr(self, attr)))
+        new.itrs = dict((k, copy.copy(v)) for k, v in iteritems(self.itrs))
+        new.sketch = dict((k, copy.deepcopy(v)) for k, v in iteritems(self.sketch))
+        return new
+
+    @property
+    def cum(self):
+        return StampsView(self, self.vals_cum)
+
+    @property
+    def itr_num(self):
+        return StampsView(self, self.vals_num)
+
+    @property
+    def itr_max(self):
+        return StampsView(self, self.vals_max)
+
+    @property
+    def itr_min(self):
+        return StampsView(self, self.vals_min)
+
+    @property
+    def itr_m2(self):
+        return StampsView(self, self.vals_m2)
+
+    def __getstate__(self):
+        return dict((attr, getattr(self, attr)) for attr in Stamps.__slots__
+                    if attr != 'index')
+
+    def __setstate__(self, state):
+        # (Also loads pickles from older versions, see Times.)
+        if 'cum' in state:
+            state = _state_from_dicts(state)
+        for attr, value in iteritems(state):
+            setattr(self, attr, value)
+        self.index = dict((name, slot) for slot, name in enumerate(self.order))
+
+
+class StampsView(MutableMapping):
+    """ Dict-style access by stamp name to one of the values in Stamps."""
+
+    __slots__ = ('stamps', 'vals')
+
+    def __init__(self, stamps, vals):
+        self.stamps = stamps
+        self.vals = vals
+
+    def __getitem__(self, name):
+        value = self.vals[self.stamps.index[name]]
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __setitem__(self, name, value):
+        slot = self.stamps.index.get(name)
+        if slot is None:
+            slot = self.stamps.add(name)
+        self.vals[slot] = value
+
+    def __delitem__(self, name):
+        raise TypeError("Stamps cannot be removed.")
+
+    def __contains__(self, name):
+        slot = self.stamps.index.get(name)
+        return slot is not None and self.vals[slot] is not None
+
+    def __iter__(self):
+        for name, value in zip(self.stamps.order, self.vals):
+            if value is not None:
+                yield name
+
+    def __len__(self):
+        return sum(1 for value in self.vals if value is not None)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+def _state_from_dicts(state):
+    order = list(state['order'])
+    in_order = set(order)
+    for name in state['cum']:
+        if name not in in_order:
+            order.append(name)
+    if 'itr_m2' not in state:
+        state['itr_m2'] = _itr_m2_from_itrs(state)
+    new_state = dict(order=order,
+                     itrs=state['itrs'],
+                     sketch=state.get('sketch', dict()))
+    for attr, key in (('vals_cum', 'cum'), ('vals_num', 'itr_num'),
+                      ('vals_max', 'itr_max'), ('vals_min', 'itr_min'),
+                      ('vals_m2', 'itr_m2')):
+        new_state[attr] = [state[key].get(name) for name in order]
+    return new_state
+
+
+def _itr_m2_from_itrs(state):
+    itr_m2 = dict()
+    for s, num in iteritems(state['itr_num']):
+        itrs = [v for v in state['itrs'].get(s, []) if v > 0]
+        if num > 1 and len(itrs) == num:
+            mean = sum(itrs) / num
+            itr_m2[s] = float(sum((v - mean) ** 2 for v in itrs))
+        else:
+            itr_m2[s] = 0.  # (spread not recoverable)
+    return itr_m2
@@ -0,0 +1,48 @@
+
+"""
+Timing of asyncio tasks, each in its own hierarchy (uses Python 3.5+ syntax,
+so imported only when asyncio mode is turned on).
+"""
+import asyncio
+
+from gtimer.private import focus
+from gtimer.private import clock
+from gtimer.private import collapse
+from gtimer.public import io
+
+
+def task_factory(loop, coro, **kwargs):
+    """Create tasks which time into their own hierarchy, joined into that of
+    the spawning code when done."""
+    return asyncio.Task(_timed_task(coro, focus.get_focus()), loop=loop, **kwargs)
+
+
+async def _timed_task(coro, spawner):
+    task_focus = focus.Focus(_task_name())
+    focus.set_task_focus(task_focus)
+    try:
+        return await coro
+    finally:
+        _join_task(task_focus, spawner, _coro_name(coro))
+
+
+def _join_task(task_focus, spawner, par_name):
+    if task_focus.root.stopped:
+        times = task_focus.root.times
+    else:
+        times = collapse.collapse_times()  # (the task's focus)
+    if times.stamps.order or times.subdvsn or times.par_subdvsn:
+        focus.set_task_focus(spawner)
+        io.attach_par_subdivision(par_name, [clock.export_times(times)])
+
+
+def _task_name():
+    task = asyncio.current_task() if hasattr(asyncio, 'current_task') else asyncio.Task.current_task()
+    try:
+        return task.get_name()
+    except AttributeError:  # (Python < 3.8)
+        return 'Task-{}'.format(id(task))
+
+
+def _coro_name(coro):
+    return getattr(coro, '__qualname__', type(coro).__name__)
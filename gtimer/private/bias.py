@@ -0,0 +1,36 @@
+
+"""
+Estimated per-call overhead of timing functions which leaks into recorded
+intervals (measured in .public.calibrate), and its removal from them.
+"""
+
+BIAS = {'ON': False,
+        'ST': 0,  # stamp()
+        'LE': 0,  # end of a timed loop iteration
+        'SB': 0,  # entering a subdivision
+        'SP': 0,  # stop() and close of a subdivision
+        }
+
+
+def set_bias(stamp, loop_end, subdivide, stop):
+    BIAS['ST'] = stamp
+    BIAS['LE'] = loop_end
+    BIAS['SB'] = subdivide
+    BIAS['SP'] = stop
+    BIAS['ON'] = True
+
+
+def clear():
+    set_bias(0, 0, 0, 0)
+    BIAS['ON'] = False
+
+
+def correct(timer, elapsed, bias):
+    """Remove the bias (and any pending from subdivisions) from an interval
+    recorded in the timer; the amount removed aggregates in its times."""
+    bias += timer.bias_pending
+    timer.bias_pending = 0
+    if bias > elapsed:
+        bias = elapsed
+    timer.times.bias_agg += bias
+    return elapsed - bias
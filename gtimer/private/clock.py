@@ -0,0 +1,107 @@
+
+"""
+The clock read throughout gtimer, either float seconds (default) or integer
+nanoseconds.  Nanosecond data held in the running timer is converted to
+seconds only on the way out to the user.
+"""
+from __future__ import absolute_import, division
+from timeit import default_timer
+import copy
+try:
+    from time import perf_counter_ns
+except ImportError:  # (Python < 3.7)
+    perf_counter_ns = None
+
+from gtimer.local import itrs as itrs_loc
+from gtimer.local import sketch as sketch_loc
+from gtimer.util import iteritems, itervalues
+
+
+#
+# Clock state (modules read these as clock.<name>, so they can be switched).
+#
+
+timer = default_timer
+NS = False
+time_type = float
+
+
+def set_ns(setting):
+    global timer, NS, time_type
+    setting = bool(setting)
+    if setting and perf_counter_ns is None:
+        raise RuntimeError("Nanosecond clock requires time.perf_counter_ns (Python 3.7+).")
+    NS = setting
+    itrs_loc.POLICY['TYPECODE'] = 'q' if setting else 'd'
+    sketch_loc.POLICY['UNIT'] = 1e-9 if setting else 1.
+    timer = perf_counter_ns if setting else default_timer
+    time_type = int if setting else float
+    return setting
+
+
+def to_sec(value):
+    return value / 1e9 if NS else value
+
+
+#
+# Conversion of whole Times data structures.
+#
+
+
+def export_times(times):
+    """Convert (in place) from clock units to seconds, for handing to user."""
+    if NS:
+        _scale_times(times, _ns_to_sec, 'd')
+    return times
+
+
+def import_times(times):
+    """Return a copy of user-provided times in clock units (or the same object
+    if the clock already runs in seconds)."""
+    if NS:
+        times = copy.deepcopy(times)
+        _scale_times(times, _sec_to_ns, 'q')
+    return times
+
+
+def _ns_to_sec(value):
+    return value / 1e9
+
+
+def _sec_to_ns(value):
+    if value == float('Inf'):
+        return value
+    return int(round(value * 1e9))
+
+
+def _scale_times(times, func, typecode):
+    times.total = func(times.total)
+    times.stamps_sum = func(times.stamps_sum)
+    times.self_agg = func(times.self_agg)
+    times.bias_agg = func(times.bias_agg)
+    stamps = times.stamps
+    for vals in (stamps.vals_cum, stamps.vals_max, stamps.vals_min):
+        for i, v in enumerate(vals):
+            if v is not None:
+                vals[i] = func(v)
+    for k, itrs in iteritems(stamps.itrs):
+        stamps.itrs[k] = itrs_loc.map_itrs(itrs, func, typecode)
+    m2_scale = 1e-18 if typecode == 'd' else 1e18  # (squared units, kept float)
+    for i, v in enumerate(stamps.vals_m2):
+        if v is not None:
+            stamps.vals_m2[i] = v * m2_scale
+    for sketch in itervalues(stamps.sketch):  # (held in seconds already)
+        sketch.unit = 1e-9 if typecode == 'q' else 1.
+    for sub_list in itervalues(times.subdvsn):
+        _scale_sub_list(sub_list, times, func, typecode)
+    for par_dict in itervalues(times.par_subdvsn):
+        for par_list in itervalues(par_dict):
+            _scale_sub_list(par_list, times, func, typecode)
+
+
+def _scale_sub_list(sub_list, parent, func, typecode):
+    for i, sub in enumerate(sub_list):
+        if sub.shared:  # (with the running timer, see collapse)
+            sub = sub_list[i] = copy.deepcopy(sub)
+            sub.parent = parent
+        _scale_times(sub, func, typecode)
@@ -3,37 +3,66 @@
 When the timer is still active and the user requests times data or reports,
 this internal functionality retrieves the current data from the active timer
 data structure.
+
+Only the active lineage (the timers and loops on the stacks) is copied.
+Subdivisions already closed are shared between the result and the running
+timer, marked as such, and whichever side writes to one next copies it first
+(see local.times.unshare()).
 """
 from __future__ import absolute_import
 import copy
 
-from gtimer.private import focus as f
+from gtimer.private import focus
+from gtimer.private import clock
 from gtimer.private import loop
+from gtimer.private.eventlog import LOG
 from gtimer.public import timer as timer_pub
+from gtimer.local.times import SubdvsnList, share_copy
+from gtimer.util import iteritems, itervalues
 
 
-def collapse_times():
-    """Make copies of everything, assign to global shortcuts so functions work
-    on them, extract the times, then restore the running stacks.
+def collapse_times(end_t=None):
+    """Make copies of the active lineage, assign to global shortcuts so
+    functions work on them, extract the times, then restore the running
+    stacks.  With end_t (past), the open timers close as of then instead of
+    now.
     """
+    f = focus.get_focus()
+    logged = LOG['F'] is f
+    if logged:
+        LOG['F'] = None  # (closing the copies is not an event)
     orig_ts = f.timer_stack
     orig_ls = f.loop_stack
     copy_ts = _copy_timer_stack()
+    if end_t is not None:
+        # (A timer's only clock readings are start_t and last_t, None while
+        # paused, so on the copies, moving them later by the gap moves now
+        # back to end_t.)
+        shift = clock.timer() - end_t
+        for timer in copy_ts.stack:
+            if timer.start_t is not None:
+                timer.start_t += shift
+                timer.last_t += shift
     copy_ls = copy.deepcopy(f.loop_stack)
     f.timer_stack = copy_ts
     f.loop_stack = copy_ls
     f.refresh_shortcuts()
-    while (len(f.timer_stack) > 1) or f.t.in_loop:
-        _collapse_subdivision()
-    timer_pub.stop()
-    collapsed_times = f.r
-    f.timer_stack = orig_ts  # (loops throw error if not same object!)
-    f.loop_stack = orig_ls
-    f.refresh_shortcuts()
+    try:
+        while (len(f.timer_stack) > 1) or f.t.in_loop:
+            _collapse_subdivision()
+        timer_pub.stop()
+        collapsed_times = f.r
+    finally:
+        f.timer_stack = orig_ts  # (loops throw error if not same object!)
+        f.loop_stack = orig_ls
+        f.refresh_shortcuts()
+        if logged:
+            LOG['F'] = f
     return collapsed_times
 
 
 def _collapse_subdivision():
+    f = focus.get_focus()
     if f.t.in_loop:
         loop.loop_end(end_stamp_unique=False)
         loop.exit_loop()
@@ -43,18 +72,39 @@ def _collapse_subdivision():
 
 
 def _copy_timer_stack():
-    stack_copy = copy.deepcopy(f.timer_stack)
-    # Recreate the dump relationships.
-    for i in range(1, len(f.timer_stack)):
+    f = focus.get_focus()
+    timer_stack = f.timer_stack
+    stack_copy = copy.copy(timer_stack)
+    stack_copy.stack = list()
+    for i in range(len(timer_stack)):
+        open_sub = timer_stack[i + 1].times if i + 1 < len(timer_stack) else None
+        stack_copy.stack.append(_copy_timer(timer_stack[i], open_sub))
+    # Recreate the relationships to the open subdivisions (a dump, already
+    # closed, stays shared until written to, see dump_times()).
+    for i in range(1, len(timer_stack)):
         name = stack_copy[i].name
-        if f.timer_stack[i].dump is None:
-            if stack_copy[i].named_loop:
-                stack_copy[i - 1].times.subdvsn[name] = [stack_copy[i].times]
+        if timer_stack[i].times.parent is not None:
+            stack_copy[i].times.parent = stack_copy[i - 1].times
+        if timer_stack[i].dump is None:
+            if stack_copy[i].is_named_loop:
+                stack_copy[i - 1].times.subdvsn[name] = SubdvsnList([stack_copy[i].times])
             else:
                 stack_copy[i - 1].subdvsn_awaiting[name] = stack_copy[i].times
-        else:
-            if stack_copy[i].named_loop:
-                stack_copy[i].dump = stack_copy[i - 1].times.subdvsn[name]
-            else:
-                stack_copy[i].dump = stack_copy[i - 1].subdvsn_awaiting[name]
     return stack_copy
+
+
+def _copy_timer(timer, open_sub):
+    new = type(timer).__new__(type(timer))
+    for attr in type(timer).__slots__:
+        setattr(new, attr, getattr(timer, attr))
+    new.times = share_copy(timer.times, open_sub)
+    new.subdvsn_awaiting = dict(timer.subdvsn_awaiting)
+    new.par_subdvsn_awaiting = dict((par_name, SubdvsnList(sub_list)) for par_name, sub_list
+                                    in iteritems(timer.par_subdvsn_awaiting))
+    for sub_times in itervalues(new.subdvsn_awaiting):
+        if sub_times is not open_sub:
+            sub_times.shared = True
+    for sub_list in itervalues(new.par_subdvsn_awaiting):
+        for sub_times in sub_list:
+            sub_times.shared = True
+    return new
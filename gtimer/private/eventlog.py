@@ -0,0 +1,500 @@
+
+"""
+Append-only log of timing events, from which the timing data can be rebuilt
+(e.g. after the process died before saving).  Each record is written as the
+event happens, through a buffered file, little-endian:
+
+    header      magic b'GTML', version (uint16), flags (uint16: nanosecond
+                clock, itrs sampled), itrs limit (int32, -1 for none),
+                sketch accuracy (double)
+    record      kind (uint8), payload length (uint32), time (double), then
+                the payload, by kind:
+    NAME        UTF-8 bytes (the next name index)
+    OPEN        timer, parent (-1 for a root), name (int32), flags (uint8)
+    STAMP       timer, name (int32), elapsed (double)
+    INIT        timer, name (int32), new itrs, new sketch (uint8): a loop
+                stamp (re)started
+    ITR         timer (int32), flags (uint8), numbers of stamps and of unused
+                registered stamps (uint32), then (name, elapsed) pairs, names,
+                and the elapsed for the parent's stamp of a named loop
+    ASSIGN      timer, position (int32), keep subdivisions (uint8)
+    STOP        timer (int32), total, self cut (double), save_itrs (uint8),
+                number of registered stamps (uint32), then their names
+    ATTACH      timer, par name (int32, -1 for none), then the Times in the
+                binary format (see local.binary)
+    RESET       timer (int32)
+    RENAME      timer, name (int32)
+    CLEAR       timer (int32), parallel (uint8)
+    POLICY      itrs limit (int32, -1 for none), itrs sampled (uint8),
+                sketch accuracy (double): the defaults changed
+
+Timers are numbered as they open, names are indexes into the names as
+recorded.  Replay repeats each event on stand-in timers, through the same
+functions as in timing (with the itrs and sketch policy as logged, rather than
+the process's own), so the result matches what the timers held.
+"""
+from __future__ import absolute_import, division
+import struct
+
+from gtimer.private import clock
+from gtimer.local import binary
+from gtimer.local import itrs as itrs_loc
+from gtimer.local import sketch as sketch_loc
+from gtimer.local.timer import Timer
+from gtimer.local.times import SubdvsnList
+from gtimer.local.sketch import Sketch
+from gtimer.private.const import UNASGN
+from gtimer.util import iteritems
+
+
+MAGIC = b'GTML'
+VERSION = 1
+FLAG_NS, FLAG_SAMPLE = 1, 2
+
+HEADER = struct.Struct('<4sHHid')
+RECORD = struct.Struct('<BId')
+
+(NAME, OPEN, STAMP, INIT, ITR, ASSIGN, STOP, ATTACH, RESET, RENAME, CLEAR,
+ POLICY) = range(12)
+
+OPEN_S = struct.Struct('<iiiB')
+STAMP_S = struct.Struct('<iid')
+INIT_S = struct.Struct('<iiBB')
+ITR_S = struct.Struct('<iBII')
+ASSIGN_S = struct.Struct('<iiB')
+STOP_S = struct.Struct('<iddBI')
+ATTACH_S = struct.Struct('<ii')
+RESET_S = struct.Struct('<i')
+RENAME_S = struct.Struct('<ii')
+CLEAR_S = struct.Struct('<iB')
+POLICY_S = struct.Struct('<iBd')
+
+OPEN_NAMED_LOOP, OPEN_SAVE_ITRS = 1, 2
+ITR_SAVE_ITRS, ITR_SKETCH, ITR_NAMED_LOOP = 1, 2, 4
+
+
+#
+# Checked in the hot path as: LOG['F'] is f.
+#
+
+LOG = {'F': None,  # Focus whose events are logged
+       'WRITER': None,
+       }
+
+
+def start(path, buffer_size, f):
+    writer = LOG['WRITER'] = EventLog(path, buffer_size)
+    for i in range(len(f.timer_stack)):  # (the timers already open)
+        log_open(f.timer_stack[i], f.timer_stack[i - 1] if i > 0 else None)
+    LOG['F'] = f
+    return writer
+
+
+def stop():
+    writer = LOG['WRITER']
+    LOG['F'] = None
+    LOG['WRITER'] = None
+    if writer is not None:
+        writer.close()
+
+
+class EventLog(object):
+
+    def __init__(self, path, buffer_size):
+        self.path = str(path)
+        self.file = open(self.path, 'wb', buffer_size)
+        self.names = dict()  # name --> index
+        self.next_id = 0
+        self.itr_structs = dict()  # (numbers of values) --> Struct
+        limit, sample, rel_acc = _policy_values()
+        flags = FLAG_NS if clock.NS else 0
+        if sample:
+            flags |= FLAG_SAMPLE
+        self.file.write(HEADER.pack(MAGIC, VERSION, flags, limit, rel_acc))
+
+    def write(self, kind, t, payload):
+        self.file.write(RECORD.pack(kind, len(payload), t) + payload)
+
+    def name_id(self, name):
+        i = self.names.get(name)
+        if i is None:
+            i = self.names[name] = len(self.names)
+            self.write(NAME, 0., name.encode('utf-8'))
+        return i
+
+    def itr_struct(self, n, n_zeros, named_loop):
+        key = (n, n_zeros, named_loop)
+        s = self.itr_structs.get(key)
+        if s is None:
+            s = self.itr_structs[key] = struct.Struct(
+                '<' + 'id' * n + 'i' * n_zeros + ('d' if named_loop else ''))
+        return s
+
+    def close(self):
+        self.file.close()
+
+
+#
+# Events (called only while logging that focus).
+#
+
+
+def log_open(timer, parent):
+    w = LOG['WRITER']
+    timer.log_id = w.next_id
+    w.next_id += 1
+    flags = OPEN_NAMED_LOOP if timer.is_named_loop else 0
+    if timer.times.save_itrs:
+        flags |= OPEN_SAVE_ITRS
+    w.write(OPEN, timer.start_t, OPEN_S.pack(
+        timer.log_id, -1 if parent is None else parent.log_id,
+        w.name_id(timer.name), flags))
+
+
+def log_stamp(f, name, elapsed):
+    w = LOG['WRITER']
+    w.write(STAMP, f.t.last_t + elapsed, STAMP_S.pack(f.t.log_id, w.name_id(name), elapsed))
+
+
+def log_init(f, name, save_itrs, sketch):
+    w = LOG['WRITER']
+    w.write(INIT, 0., INIT_S.pack(f.t.log_id, w.name_id(name), bool(save_itrs),
+                                  bool(sketch)))
+
+
+def log_iteration(f, t, elapsed=None):
+    w = LOG['WRITER']
+    lp = f.lp
+    name_id = w.name_id
+    vals = list()
+    for s, val in iteritems(lp.itr_stamps):
+        vals.append(name_id(s))
+        vals.append(val)
+    n = len(lp.itr_stamps)
+    if lp.rgstr_stamps:
+        vals.extend(name_id(s) for s in lp.rgstr_stamps if s not in lp.itr_stamps)
+    flags = ITR_SAVE_ITRS if lp.save_itrs else 0
+    if lp.sketch:
+        flags |= ITR_SKETCH
+    if elapsed is not None:
+        flags |= ITR_NAMED_LOOP
+        vals.append(elapsed)
+    n_zeros = len(vals) - 2 * n - (elapsed is not None)
+    w.write(ITR, t, ITR_S.pack(f.t.log_id, flags, n, n_zeros) +
+            w.itr_struct(n, n_zeros, elapsed is not None).pack(*vals))
+
+
+def log_assign(f, position, keep_subdivisions):
+    w = LOG['WRITER']
+    w.write(ASSIGN, f.t.last_t, ASSIGN_S.pack(f.t.log_id, w.name_id(position),
+                                              bool(keep_subdivisions)))
+
+
+def log_stop(f):
+    w = LOG['WRITER']
+    rgstr = [w.name_id(s) for s in f.t.rgstr_stamps]
+    w.write(STOP, f.t.last_t,
+            STOP_S.pack(f.t.log_id, f.t.tmp_total, f.t.self_cut,
+                        bool(f.r.save_itrs), len(rgstr)) +
+            struct.pack('<{}i'.format(len(rgstr)), *rgstr))
+
+
+def log_attach(f, par_name, times_list):
+    w = LOG['WRITER']
+    par_i = -1 if par_name is None else w.name_id(par_name)
+    w.write(ATTACH, f.t.last_t, ATTACH_S.pack(f.t.log_id, par_i) +
+            binary.dumps(times_list))
+
+
+def log_reset(f):
+    LOG['WRITER'].write(RESET, f.t.start_t, RESET_S.pack(f.t.log_id))
+
+
+def log_rename(f):
+    w = LOG['WRITER']
+    w.write(RENAME, 0., RENAME_S.pack(f.root.log_id, w.name_id(f.root.name)))
+
+
+def log_clear(f, par):
+    LOG['WRITER'].write(CLEAR, 0., CLEAR_S.pack(f.t.log_id, bool(par)))
+
+
+def log_policy():
+    # (From the setters, in whichever thread: one write, so not interleaved.)
+    LOG['WRITER'].write(POLICY, 0., POLICY_S.pack(*_policy_values()))
+
+
+def _policy_values():
+    limit = itrs_loc.POLICY['LIMIT']
+    return (-1 if limit is None else limit, itrs_loc.POLICY['MODE'] == 'sample',
+            sketch_loc.POLICY['REL_ACC'])
+
+
+#
+# Replay.
+#
+
+
+def replay(path):
+    """Rebuild the Times held by the (latest) root timer in the log, as of
+    its last complete record."""
+    with open(str(path), 'rb') as fobj:
+        data = fobj.read()
+    if len(data) < HEADER.size or data[:4] != MAGIC:
+        raise ValueError("Not a gtimer event log: {}".format(path))
+    _, version, flags, limit, rel_acc = HEADER.unpack_from(data)
+    if version > VERSION:
+        raise ValueError("Unsupported gtimer event log version: {} in {}".format(
+            version, path))
+    ns = bool(flags & FLAG_NS)
+    # (Rebuilt in the clock units of the log, as floats.)
+    r = _Replay(1e-9 if ns else 1.)
+    r.set_policy(limit, flags & FLAG_SAMPLE, rel_acc)
+    data = memoryview(data)
+    offset = HEADER.size
+    while offset + RECORD.size <= len(data):
+        kind, n, t = RECORD.unpack_from(data, offset)
+        start = offset + RECORD.size
+        if start + n > len(data):  # (cut off, e.g. the process died)
+            break
+        r.apply(kind, t, data[start:start + n])
+        offset = start + n
+    times = r.finish(path)
+    if ns:
+        clock._scale_times(times, clock._ns_to_sec, 'd')
+    return times
+
+
+class _Frame(object):
+    """Stands in for the focus, for the functions of private.times."""
+
+    def __init__(self, timer, parent, itrs_policy):
+        self.t = timer
+        self.r = timer.times
+        self.s = timer.times.stamps
+        self.tm1 = parent
+        self.rm1 = None if parent is None else parent.times
+        self.sm1 = None if parent is None else parent.times.stamps
+        self.itrs_policy = itrs_policy
+
+
+class _Replay(object):
+
+    def __init__(self, unit):
+        from gtimer.private import times as times_priv  # (which imports this module)
+        from gtimer.private import loop  # (likewise)
+        self.times_priv = times_priv
+        self.loop = loop
+        self.itrs_policy = {'LIMIT': None, 'MODE': 'last', 'TYPECODE': 'd'}
+        self.rel_acc = None
+        self.unit = unit
+        self.names = list()
+        self.timers = dict()  # timer index --> Timer (open, or stopped root)
+        self.parents = dict()  # timer index --> parent index
+        self.last = dict()  # timer index --> latest time recorded in it
+        self.root = None
+        self.handlers = {NAME: self.name, OPEN: self.open, STAMP: self.stamp,
+                         INIT: self.init, ITR: self.iteration, ASSIGN: self.assign,
+                         STOP: self.stop, ATTACH: self.attach,
+                         RESET: self.reset, RENAME: self.rename,
+                         CLEAR: self.clear, POLICY: self.policy}
+
+    def apply(self, kind, t, payload):
+        handler = self.handlers.get(kind)
+        if handler is None:
+            raise ValueError("Unknown gtimer event log record: {}".format(kind))
+        handler(t, payload)
+
+    def frame(self, i):
+        return _Frame(self.timers[i], self.timers.get(self.parents[i]),
+                      self.itrs_policy)
+
+    def touch(self, i, t):
+        if t > self.last[i]:
+            self.last[i] = t
+
+    def name(self, t, payload):
+        self.names.append(payload.tobytes().decode('utf-8'))
+
+    def open(self, t, payload):
+        i, parent_i, name_i, flags = OPEN_S.unpack(payload)
+        name = self.names[name_i]
+        save_itrs = bool(flags & OPEN_SAVE_ITRS)
+        if parent_i == -1:  # (a new root replaces any previous)
+            timer = Timer(name, save_itrs=save_itrs)
+            self.timers.clear()
+            self.parents.clear()
+            self.last.clear()
+            self.root = i
+        else:
+            parent = self.timers.get(parent_i)
+            if parent is None:
+                return
+            # (As in loop._subdivide_named_loop() and timer._auto_subdivide().)
+            if flags & OPEN_NAMED_LOOP:
+                if name in parent.times.subdvsn:
+                    timer = Timer(name, is_named_loop=True, in_loop=True,
+                                  save_itrs=save_itrs)
+                    timer.dump = parent.times.subdvsn[name][0]
+                else:
+                    timer = Timer(name, is_named_loop=True, in_loop=True,
+                                  parent=parent.times, pos_in_parent=name,
+                                  save_itrs=save_itrs)
+                    parent.times.subdvsn[name] = SubdvsnList([timer.times])
+            elif name in parent.subdvsn_awaiting:
+                timer = Timer(name, dump=parent.subdvsn_awaiting[name],
+                              save_itrs=save_itrs)
+            else:
+                timer = Timer(name, save_itrs=save_itrs, parent=parent.times)
+                parent.subdvsn_awaiting[name] = timer.times
+        timer.start_t = timer.last_t = t
+        self.timers[i] = timer
+        self.parents[i] = parent_i
+        self.last[i] = t
+
+    def stamp(self, t, payload):
+        i, name_i, elapsed = STAMP_S.unpack(payload)
+        if i not in self.timers:
+            return
+        stamps = self.timers[i].times.stamps
+        name = self.names[name_i]
+        slot = stamps.index.get(name)
+        if slot is None:
+            stamps.add(name, elapsed)
+        else:
+            stamps.vals_cum[slot] += elapsed
+        self.touch(i, t)
+
+    def init(self, t, payload):
+        i, name_i, save_itrs, sketch = INIT_S.unpack(payload)
+        if i in self.timers:
+            self._init_loop_stamp(self.timers[i].times.stamps, self.names[name_i],
+                                  save_itrs, sketch)
+
+    def iteration(self, t, payload):
+        i, flags, n, n_zeros = ITR_S.unpack_from(payload)
+        if i not in self.timers:
+            return
+        named_loop = bool(flags & ITR_NAMED_LOOP)
+        vals = struct.unpack_from('<' + 'id' * n + 'i' * n_zeros +
+                                  ('d' if named_loop else ''),
+                                  payload, ITR_S.size)
+        save_itrs = bool(flags & ITR_SAVE_ITRS)
+        sketch = bool(flags & ITR_SKETCH)
+        timer = self.timers[i]
+        stamps = timer.times.stamps
+        for k in range(0, 2 * n, 2):
+            self._loop_value(stamps, self.names[vals[k]], vals[k + 1],
+                             save_itrs, sketch)
+        for k in range(2 * n, 2 * n + n_zeros):  # (registered, unused)
+            name = self.names[vals[k]]
+            if name not in stamps.index:
+                self._init_loop_stamp(stamps, name, save_itrs, sketch)
+            if save_itrs and name in stamps.itrs:
+                stamps.itrs[name].append(0)
+        if named_loop:  # (the loop's stamp in the parent)
+            parent_i = self.parents[i]
+            self._loop_value(self.timers[parent_i].times.stamps, timer.name,
+                             vals[-1], save_itrs, sketch)
+            self.touch(parent_i, t)
+        self.touch(i, t)
+
+    def assign(self, t, payload):
+        i, position_i, keep = ASSIGN_S.unpack(payload)
+        if i not in self.timers:
+            return
+        self.times_priv.assign_subdivisions(self.frame(i), self.names[position_i],
+                                            bool(keep))
+        self.touch(i, t)
+
+    def stop(self, t, payload):
+        i, tmp_total, self_cut, save_itrs, n = STOP_S.unpack_from(payload)
+        if i not in self.timers:
+            return
+        timer = self.timers[i]
+        for name_i in struct.unpack_from('<{}i'.format(n), payload, STOP_S.size):
+            name = self.names[name_i]
+            if name not in timer.times.stamps.index:
+                timer.times.stamps.add(name)
+        timer.tmp_total = tmp_total
+        timer.self_cut = self_cut
+        timer.times.save_itrs = bool(save_itrs)
+        self.touch(i, t)
+        self._close(i)
+
+    def attach(self, t, payload):
+        i, par_i = ATTACH_S.unpack_from(payload)
+        if i not in self.timers:
+            return
+        times_list = binary.loads(payload[ATTACH_S.size:].tobytes())
+        if par_i == -1:
+            self.times_priv.attach_subdvsn(self.frame(i), times_list[0])
+        else:
+            self.times_priv.attach_par_subdvsn(self.frame(i), self.names[par_i],
+                                               times_list)
+
+    def reset(self, t, payload):
+        i, = RESET_S.unpack(payload)
+        if i in self.timers:
+            timer = self.timers[i]
+            timer.reset()
+            timer.start_t = timer.last_t = self.last[i] = t
+
+    def rename(self, t, payload):
+        i, name_i = RENAME_S.unpack(payload)
+        if i in self.timers:
+            self.timers[i].name = self.timers[i].times.name = self.names[name_i]
+
+    def clear(self, t, payload):
+        i, par = CLEAR_S.unpack(payload)
+        if i in self.timers:
+            if par:
+                self.timers[i].par_subdvsn_awaiting.clear()
+            else:
+                self.timers[i].subdvsn_awaiting.clear()
+
+    def policy(self, t, payload):
+        self.set_policy(*POLICY_S.unpack(payload))
+
+    def set_policy(self, limit, sample, rel_acc):
+        self.itrs_policy['LIMIT'] = None if limit < 0 else limit
+        self.itrs_policy['MODE'] = 'sample' if sample else 'last'
+        self.rel_acc = rel_acc
+
+    def finish(self, path):
+        """Stop the timers still open (deepest first), as get_times() would."""
+        if self.root is None:
+            raise ValueError("No timer in gtimer event log: {}".format(path))
+        for i in sorted(self.timers, reverse=True):
+            timer = self.timers[i]
+            if timer.stopped:
+                continue
+            self.times_priv.assign_subdivisions(self.frame(i), UNASGN)
+            timer.tmp_total = self.last[i] - timer.start_t
+            self._close(i)
+        return self.timers[self.root].times
+
+    def _close(self, i):
+        # (As in stop(), after the timer's own events.)
+        self.times_priv.dump_times(self.frame(i))
+        self.timers[i].stopped = True
+        parent_i = self.parents[i]
+        if parent_i != -1:
+            self.touch(parent_i, self.last[i])
+            del self.timers[i]
+
+    def _init_loop_stamp(self, stamps, name, save_itrs, sketch):
+        # (As in timer._init_loop_stamp().)
+        self.loop.init_stamp(stamps, name)
+        if save_itrs:
+            stamps.itrs[name] = itrs_loc.new_itrs(policy=self.itrs_policy)
+        if sketch:
+            stamps.sketch[name] = Sketch(self.rel_acc, self.unit)
+
+    def _loop_value(self, stamps, name, val, save_itrs, sketch):
+        # (As in loop.loop_end().)
+        i = stamps.index.get(name)
+        if i is None or stamps.vals_num[i] is None:
+            self._init_loop_stamp(stamps, name, save_itrs, sketch)
+        self.loop.add_itr(stamps, name, val, save_itrs and name in stamps.itrs,
+                          sketch and name in stamps.sketch)
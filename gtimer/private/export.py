@@ -0,0 +1,91 @@
+
+"""
+Periodic export of snapshots of the timing data to file.  A background thread
+marks a snapshot due each interval, the timed thread takes it at its next
+stamp (cheaply, see collapse), and the background thread then converts,
+pickles, and writes it, replacing the file only once complete.
+"""
+from __future__ import absolute_import
+import os
+import tempfile
+import threading
+try:
+    import queue
+except ImportError:  # (Python 2)
+    import Queue as queue
+try:
+    from os import replace as _replace
+except ImportError:  # (Python 2, atomic on POSIX only)
+    from os import rename as _replace
+
+from gtimer.private import clock
+
+
+#
+# Checked in the hot path as: EXPORT['DUE'] is f.
+#
+
+EXPORT = {'DUE': None,  # Focus from which a snapshot is due
+          'EXPORTER': None,
+          }
+
+
+def take_snapshot(f):
+    """Hand the current data to the exporter (call from f's own thread)."""
+    from gtimer.private import collapse  # (imports the public timer functions)
+    EXPORT['DUE'] = None  # (before collapsing, which runs loop_end())
+    exporter = EXPORT['EXPORTER']
+    if exporter is not None:
+        exporter.queue.put(collapse.collapse_times())
+
+
+class Exporter(object):
+
+    def __init__(self, path, interval, focus):
+        self.path = os.path.abspath(str(path))
+        self.interval = interval
+        self.focus = focus
+        self.queue = queue.Queue()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name='gtimer-exporter')
+        self.thread.daemon = True
+
+    def start(self):
+        EXPORT['EXPORTER'] = self
+        self.thread.start()
+
+    def stop(self):
+        """Write whatever snapshots are queued, then end the thread."""
+        EXPORT['EXPORTER'] = None
+        EXPORT['DUE'] = None
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        timeout = self.interval
+        while True:
+            try:
+                times = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                EXPORT['DUE'] = self.focus
+                timeout = None  # (until the timed thread takes it)
+                continue
+            if times is None:
+                return
+            try:
+                self._write(clock.export_times(times))
+            except Exception as e:  # (re-raised from stop_exporter())
+                self.error = e
+                return
+            timeout = self.interval
+
+    def _write(self, times):
+        from gtimer.public.io import save_pkl
+        fd, tmp = tempfile.mkstemp(prefix='.gtimer-', dir=os.path.dirname(self.path))
+        os.close(fd)
+        try:
+            save_pkl(tmp, times)
+            _replace(tmp, self.path)
+        except Exception:
+            os.remove(tmp)
+            raise
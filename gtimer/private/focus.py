@@ -1,92 +1,191 @@
 
 """
-Internal, global data holding timer hierarchy and state.  Provides shortcut
-references to the timer and loop currently in "focus".
+Internal data holding timer hierarchy and state, separately for each thread.
+Provides shortcut references to the timer and loop currently in "focus".
 """
 from __future__ import absolute_import
+import threading
+import weakref
 
 from gtimer.local.stack import Stack
 from gtimer.local.timer import Timer
 from gtimer.local.loop import Loop
+from gtimer.local import itrs as itrs_loc
+from gtimer.private import clock
+
+
+class Focus(object):
+    """Timer hierarchy of one thread, with shortcuts."""
+
+    def __init__(self, root_name='root'):
+        self.root_name = root_name
+        #
+        # Containers for management of timer hierarchy.
+        #
+        self.timer_stack = None
+        self.loop_stack = None
+        #
+        # Shortcut variables.
+        #
+        self.root = None  # base of timer stack
+        self.t = None  # active end of timer stack: 'Timer in Focus'
+        self.r = None  # t.times: 'Times (Record) in Focus'
+        self.s = None  # t.times.stamps: 'Stamps in Focus'
+        self.tm1 = None  # second from the top of timer stack 't minus 1' (used in named loops)
+        self.rm1 = None
+        self.sm1 = None
+        self.lp = None  # loop_stack.focus: 'Loop in Focus'
+        self.itrs_policy = itrs_loc.POLICY  # for itrs made in merges (the global)
+        self.end_t = None  # when its thread exited (other threads only)
+        self.hard_reset()
+
+    #
+    # Shortcut functions.
+    #
+
+    def create_next_timer(self, *args, **kwargs):
+        self.t, self.tm1 = self.timer_stack.create_next(*args, **kwargs)
+        self._refresh_times()
+        return self.t
+
+    def remove_last_timer(self):
+        self.t, self.tm1 = self.timer_stack.remove_last()
+        self._refresh_times()
+
+    def create_next_loop(self, *args, **kwargs):
+        self.lp, _ = self.loop_stack.create_next(*args, **kwargs)
+
+    def remove_last_loop(self):
+        self.lp, _ = self.loop_stack.remove_last()
+
+    def refresh_shortcuts(self):
+        self.t, self.tm1 = self.timer_stack.stack_return()
+        self._refresh_times()
+        self.lp, _ = self.loop_stack.stack_return()
+
+    def _refresh_times(self):
+        self.r = None if self.t is None else self.t.times
+        self.s = None if self.r is None else self.r.stamps
+        self.rm1 = None if self.tm1 is None else self.tm1.times
+        self.sm1 = None if self.rm1 is None else self.rm1.stamps
+
+    #
+    # Initialization.
+    #
+
+    def hard_reset(self):
+        self.timer_stack = Stack(Timer)
+        self.loop_stack = Stack(Loop)
+        self.root = self.create_next_timer(self.root_name)  # (this refreshes shortcuts)
+        self.lp = None
 
 
 #
-# Containers for management of timer hierarchy.
+# Per-thread access.
 #
-timer_stack = None
-loop_stack = None
 
+_local = threading.local()
+_import_thread = threading.current_thread()
+# Other threads which have timed: thread --> Focus (dropped with the thread
+# object, once nothing else holds it).
+_threads = weakref.WeakKeyDictionary()
+_threads_lock = threading.Lock()
 
-#
-# Shortcut variables.
-#
-root = None  # base of timer stack
-t = None  # active end of timer stack: 'Timer in Focus'
-r = None  # t.times: 'Times (Record) in Focus'
-s = None  # t.times.stamps: 'Stamps in Focus'
-tm1 = None  # second from the top of timer stack 't minus 1' (used in named loops)
-rm1 = None
-sm1 = None
-lp = None  # loop_stack.focus: 'Loop in Focus'
 
+class _ThreadExit(object):
+    """Held only in the thread's local storage, which is cleared as the
+    thread exits: records the time on its Focus."""
 
-#
-# Shortcut functions.
-#
+    def __init__(self, focus):
+        self.focus = focus
+
+    def __del__(self):
+        self.focus.end_t = clock.timer()
 
 
-def create_next_timer(*args, **kwargs):
-    global t, r, s, tm1, rm1, sm1
-    t, tm1 = timer_stack.create_next(*args, **kwargs)
-    r = None if t is None else t.times
-    s = None if r is None else r.stamps
-    rm1 = None if tm1 is None else tm1.times
-    sm1 = None if rm1 is None else rm1.stamps
-    return t
+def _get_thread_focus():
+    try:
+        return _local.focus
+    except AttributeError:
+        return _new_focus()
 
 
-def remove_last_timer():
-    global t, r, s, tm1, rm1, sm1
-    t, tm1 = timer_stack.remove_last()
-    r = None if t is None else t.times
-    s = None if r is None else r.stamps
-    rm1 = None if tm1 is None else tm1.times
-    sm1 = None if rm1 is None else rm1.stamps
+def _set_thread_focus(focus):
+    _local.focus = focus
 
 
-def create_next_loop(*args, **kwargs):
-    global lp
-    lp, _ = loop_stack.create_next(*args, **kwargs)
+def pop_finished_threads(threads=None):
+    """Release the timer hierarchies of finished threads (optionally only
+    among those given), returning (thread, focus) pairs."""
+    with _threads_lock:
+        finished = [th for th in list(_threads.keys()) if not th.is_alive() and
+                    (threads is None or th in threads)]
+        popped = [(th, _threads.pop(th)) for th in finished]
+    return popped
 
 
-def remove_last_loop():
-    global lp
-    lp, _ = loop_stack.remove_last()
+def _new_focus():
+    thread = threading.current_thread()
+    if thread is _import_thread:
+        focus = Focus()
+    else:
+        # Distinct names, since these become parallel subdivisions.
+        focus = Focus(thread.name)
+        with _threads_lock:
+            _threads[thread] = focus
+        _local.exit = _ThreadExit(focus)
+    _local.focus = focus
+    return focus
 
 
-def refresh_shortcuts():
-    global t, r, s, tm1, rm1, sm1, lp
-    t, tm1 = timer_stack.stack_return()
-    r = None if t is None else t.times
-    s = None if r is None else r.stamps
-    rm1 = None if tm1 is None else tm1.times
-    sm1 = None if rm1 is None else rm1.stamps
-    lp, _ = loop_stack.stack_return()
+_new_focus()  # (the thread importing gtimer starts timing now)
 
 
 #
-# Initialization.
+# Per-task access (asyncio mode): a timed task holds its own Focus in its
+# context, other code falls back to the thread's.  Modules call these through
+# the module (focus.get_focus()) so the mode can switch them.
 #
 
-def hard_reset():
-    global timer_stack, loop_stack, root, lp
-    timer_stack = Stack(Timer)
-    loop_stack = Stack(Loop)
-    root = create_next_timer('root')  # (this refreshes shortcuts)
-    lp = None
+try:
+    import contextvars
+except ImportError:  # (Python < 3.7)
+    contextvars = None
+
+TASKS_AVAILABLE = contextvars is not None
+
+if TASKS_AVAILABLE:
+    _task_focus = contextvars.ContextVar('gtimer_focus', default=None)
+
+    def _get_task_focus():
+        focus = _task_focus.get()
+        if focus is None:
+            return _get_thread_focus()
+        return focus
+
+    def _set_task_focus(focus):
+        if _task_focus.get() is None:
+            _local.focus = focus
+        else:
+            _task_focus.set(focus)
+
+    def set_task_focus(focus):
+        """Hold the focus in the current (task's) context."""
+        _task_focus.set(focus)
+
+
+get_focus = _get_thread_focus
+set_focus = _set_thread_focus
 
 
-hard_reset()
+def set_task_mode(setting):
+    global get_focus, set_focus
+    if setting:
+        get_focus = _get_task_focus
+        set_focus = _set_task_focus
+    else:
+        get_focus = _get_thread_focus
+        set_focus = _set_thread_focus
 
 
 #
@@ -94,5 +193,4 @@ hard_reset()
 #
 
 def get_current_timer():
-    global t
-    return t
+    return get_focus().t
@@ -2,12 +2,21 @@
 """
 Internal functionality for timed loops.
 """
-from __future__ import absolute_import, print_function
-from timeit import default_timer as timer
-
-from gtimer.private import focus as f
+from __future__ import absolute_import, division, print_function
+
+from gtimer.private import focus
+from gtimer.private import clock
+from gtimer.private import bias
+from gtimer.private.bias import BIAS
+from gtimer.private import export
+from gtimer.private.export import EXPORT
+from gtimer.private import eventlog
+from gtimer.private.eventlog import LOG
 from gtimer.private import times as times_priv
 from gtimer.public import timer as timer_pub
+from gtimer.local.itrs import new_itrs
+from gtimer.local.times import SubdvsnList
+from gtimer.local import sketch as sketch_loc
 from gtimer.util import iteritems
 from gtimer.private.const import UNASGN
 from gtimer.local.exceptions import StoppedError, PausedError, LoopError
@@ -17,45 +26,50 @@ def enter_loop(name=None,
                rgstr_stamps=None,
                save_itrs=True,
                keep_subdivisions=True):
-    t = timer()
+    f = focus.get_focus()
+    t = clock.timer()
     f.t.last_t = t
     if f.t.stopped:
         raise StoppedError("Timer already stopped when entering loop.")
     if f.t.paused:
         raise PausedError("Timer paused when entering loop.")
-    times_priv.assign_subdivisions(UNASGN, keep_subdivisions)
+    times_priv.assign_subdivisions(f, UNASGN, keep_subdivisions)
     if name is None:  # Entering anonynous loop.
         if f.t.in_loop:
             raise LoopError("Entering anonymous inner timed loop (not supported).")
         f.t.in_loop = True
-        f.t.self_cut += timer() - t
+        f.t.self_cut += clock.timer() - t
     else:  # Entering a named loop.
-        if not f.t.in_loop or name not in f.lp.stamps:  # double check this if-logic
-            timer_pub._init_loop_stamp(name, do_lp=False)
+        if not f.t.in_loop or name not in f.lp.stamp_set:  # double check this if-logic
+            timer_pub._init_loop_stamp(f, name, do_lp=False)
             if save_itrs:
-                f.s.itrs[name] = []
-        if f.t.in_loop and name not in f.lp.stamps:
-            f.lp.stamps.append(name)
-        f.t.self_cut += timer() - t
+                f.s.itrs[name] = new_itrs()
+            if LOG['F'] is f:
+                eventlog.log_init(f, name, save_itrs,
+                                  sketch_loc.POLICY['ON'] and name not in f.s.sketch)
+        if sketch_loc.POLICY['ON'] and name not in f.s.sketch:
+            f.s.sketch[name] = sketch_loc.new_sketch()
+        if f.t.in_loop and name not in f.lp.stamp_set:
+            f.lp.add_stamp(name)
+        f.t.self_cut += clock.timer() - t
         _subdivide_named_loop(name, rgstr_stamps, save_itrs=save_itrs)
     f.create_next_loop(name, rgstr_stamps, save_itrs)
 
 
 def loop_start():
+    f = focus.get_focus()
     if f.t.stopped:
         raise StoppedError("Timer already stopped at start of loop iteration.")
     if f.t.paused:
         raise PausedError("Timer paused at start of loop iteration.")
-    for k in f.lp.itr_stamps:
-        # (these are initialized together with same key)
-        f.lp.itr_stamps[k] = 0.
-        f.lp.itr_stamp_used[k] = False
+    f.lp.itr_stamps.clear()
 
 
 def loop_end(loop_end_stamp=None,
              end_stamp_unique=True,
              keep_subdivisions=True,
              quick_print=False):
+    f = focus.get_focus()
     if f.t.stopped:
         raise StoppedError("Timer already stopped at end of loop iteration.")
     if f.t.paused:
@@ -65,52 +79,54 @@ def loop_end(loop_end_stamp=None,
                         un=end_stamp_unique,
                         ks=keep_subdivisions,
                         qp=quick_print)
-        t = timer()
+        t = clock.timer()
     else:
-        t = timer()
+        t = clock.timer()
         f.t.last_t = t
-        times_priv.assign_subdivisions(UNASGN, keep_subdivisions)
+        times_priv.assign_subdivisions(f, UNASGN, keep_subdivisions)
 
     # Prevserve the ordering of stamp names as much as possible, wait until
     # after first pass to initialize any unused registered stamps.
     if f.lp.first_itr:
         f.lp.first_itr = False
+        rgstr_stamps = list()
+        for s in f.lp.rgstr_stamps:
+            if s not in f.lp.stamp_set:
+                timer_pub._init_loop_stamp(f, s)
+                rgstr_stamps.append(s)
+            elif s in f.lp.itr_stamps:
+                rgstr_stamps.append(s)
+        f.lp.rgstr_stamps = rgstr_stamps  # (those timed here, not named loops)
+    # Only the stamps used in this iteration.
+    stamps = f.s
+    itr_stamps = f.lp.itr_stamps
+    save_itrs, sketch = f.lp.save_itrs, f.lp.sketch
+    for s, val in iteritems(itr_stamps):
+        add_itr(stamps, s, val, save_itrs, sketch)
+    if save_itrs:
         for s in f.lp.rgstr_stamps:
-            if s not in f.lp.stamps:
-                timer_pub._init_loop_stamp(s)
-    for s, used in iteritems(f.lp.itr_stamp_used):
-        if used:
-            val = f.lp.itr_stamps[s]
-            f.s.cum[s] += val
-            if f.lp.save_itrs:
-                f.s.itrs[s].append(val)
-            else:
-                f.s.itr_num[s] += 1
-                if val > f.s.itr_max[s]:
-                    f.s.itr_max[s] = val
-                if val < f.s.itr_min[s]:
-                    f.s.itr_min[s] = val
-        elif f.lp.save_itrs and s in f.lp.rgstr_stamps:
-            f.s.itrs[s].append(0.)
+            if s not in itr_stamps:
+                stamps.itrs[s].append(0)
     if f.lp.name is not None:
         # Reach back and stamp in the parent timer.
         elapsed = t - f.tm1.last_t
-        f.sm1.cum[f.lp.name] += elapsed
-        if f.lp.save_itrs:
-            f.sm1.itrs[f.lp.name].append(elapsed)
-        else:
-            f.sm1.itr_num[f.lp.name] += 1
-            if elapsed > f.sm1.itr_max[f.lp.name]:
-                f.sm1.itr_max[f.lp.name] = elapsed
-            if elapsed < f.sm1.itr_min[f.lp.name]:
-                f.sm1.itr_min[f.lp.name] = elapsed
+        if BIAS['ON']:
+            elapsed = bias.correct(f.tm1, elapsed, BIAS['LE'])
+        add_itr(f.sm1, f.lp.name, elapsed, save_itrs, sketch)
         f.tm1.last_t = t
         if quick_print:
-            print("({}) {}: {:.4f}".format(f.tm1.name, f.lp.name, elapsed))
-    f.t.self_cut += timer() - t
+            print("({}) {}: {:.4f}".format(f.tm1.name, f.lp.name, clock.to_sec(elapsed)))
+    if LOG['F'] is f:
+        eventlog.log_iteration(f, t, elapsed if f.lp.name is not None else None)
+    if BIAS['ON']:
+        f.t.bias_pending += BIAS['LE']  # (leaks into next iteration's first stamp)
+    if EXPORT['DUE'] is f:
+        export.take_snapshot(f)
+    f.t.self_cut += clock.timer() - t
 
 
 def exit_loop():
+    f = focus.get_focus()
     if f.t.stopped:
         raise StoppedError("Timer already stopped when exiting loop.")
     if f.t.paused:
@@ -121,12 +137,45 @@ def exit_loop():
     f.remove_last_loop()
 
 
+def init_stamp(stamps, name):
+    """(Re)set a stamp timed in loops to no iterations yet, returning its
+    slot (the containers for itrs and sketch are made by the caller)."""
+    slot = stamps.index.get(name)
+    if slot is None:
+        slot = stamps.add(name)
+    else:
+        stamps.vals_cum[slot] = 0
+    stamps.vals_num[slot] = 0
+    stamps.vals_max[slot] = 0
+    stamps.vals_min[slot] = float('Inf')
+    stamps.vals_m2[slot] = 0.
+    return slot
+
+
+def add_itr(stamps, name, val, save_itrs, sketch):
+    """Add the value of one iteration to a stamp timed in loops."""
+    i = stamps.index[name]
+    cum = stamps.vals_cum[i] = stamps.vals_cum[i] + val
+    if save_itrs:
+        stamps.itrs[name].append(val)
+    n = stamps.vals_num[i] = stamps.vals_num[i] + 1
+    if n > 1:  # (Welford update, means from the sums)
+        stamps.vals_m2[i] += (val - cum / n) * (val - (cum - val) / (n - 1))
+    if val > stamps.vals_max[i]:
+        stamps.vals_max[i] = val
+    if val < stamps.vals_min[i]:
+        stamps.vals_min[i] = val
+    if sketch:
+        stamps.sketch[name].add(val)
+
+
 #
 # Private helper functions.
 #
 
 
 def _subdivide_named_loop(name, rgstr_stamps, save_itrs):
+    f = focus.get_focus()
     name = str(name)
     save_itrs = bool(save_itrs)
     if name in f.r.subdvsn:
@@ -147,10 +196,13 @@ def _subdivide_named_loop(name, rgstr_stamps, save_itrs):
                             parent=f.r,
                             pos_in_parent=name,
                             save_itrs=save_itrs)
-        f.rm1.subdvsn[name] = [f.r]
+        f.rm1.subdvsn[name] = SubdvsnList([f.r])
+    if LOG['F'] is f:
+        eventlog.log_open(f.t, f.tm1)
 
 
 def _end_subdivision_named_loop():
+    f = focus.get_focus()
     if f.t.is_user_subdvsn:
         raise LoopError("gtimer attempted to end user-generated subdivision at end of named loop.")
     if not f.t.stopped:
@@ -0,0 +1,87 @@
+
+"""
+Wrapping of generator, coroutine, and async generator functions, timing each
+resumption into the same subdivision (uses Python 3.6+ syntax, so imported
+only when such a function is wrapped).
+"""
+import functools
+import inspect
+
+from gtimer.public import timer as timer_pub
+
+
+def wrap_resumable(func, name, rgstr_stamps, wrap_save_itrs):
+    # (functools.wraps keeps the function's qualified name on the objects it
+    # makes, e.g. for naming tasks' subdivisions in asyncio mode.)
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def gtimer_wrapped(*args, **kwargs):
+            save_itrs = _save_itrs(wrap_save_itrs)
+            agen = func(*args, **kwargs)
+            step = agen.asend(None)
+            while True:
+                try:
+                    item = await _TimedAwait(step, name, rgstr_stamps, save_itrs)
+                except StopAsyncIteration:
+                    return
+                try:
+                    step = agen.asend((yield item))
+                except GeneratorExit:
+                    await agen.aclose()
+                    raise
+                except BaseException as exc:
+                    step = agen.athrow(exc)
+    elif inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def gtimer_wrapped(*args, **kwargs):
+            save_itrs = _save_itrs(wrap_save_itrs)
+            coro = func(*args, **kwargs)
+            return await _TimedAwait(coro, name, rgstr_stamps, save_itrs)
+    else:
+        @functools.wraps(func)
+        def gtimer_wrapped(*args, **kwargs):
+            save_itrs = _save_itrs(wrap_save_itrs)
+            gen = func(*args, **kwargs)
+            return (yield from _timed_steps(gen, name, rgstr_stamps, save_itrs))
+    return gtimer_wrapped
+
+
+def _save_itrs(wrap_save_itrs):
+    return timer_pub.SET['SI'] if wrap_save_itrs is None else wrap_save_itrs
+
+
+class _TimedAwait(object):
+
+    __slots__ = ('args',)
+
+    def __init__(self, *args):
+        self.args = args
+
+    def __await__(self):
+        return _timed_steps(*self.args)
+
+
+def _timed_steps(steps, name, rgstr_stamps, save_itrs):
+    """Drive a generator or coroutine (anything with send() and throw()),
+    inside the subdivision only while it runs, i.e. not while suspended."""
+    sent = None
+    exc = None
+    while True:
+        timer_pub._auto_subdivide(name, rgstr_stamps, save_itrs=save_itrs)
+        try:
+            if exc is None:
+                item = steps.send(sent)
+            else:
+                item = steps.throw(exc)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            timer_pub._end_auto_subdivision()
+        try:
+            sent = yield item
+            exc = None
+        except GeneratorExit:
+            steps.close()
+            raise
+        except BaseException as e:
+            exc = e
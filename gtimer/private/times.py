@@ -3,10 +3,13 @@
 Internal functions for managing times data objects.
 """
 from __future__ import absolute_import
-from timeit import default_timer as timer
+import copy
 
-from gtimer.private import focus as f
+from gtimer.private import clock
+from gtimer.private import eventlog
+from gtimer.private.eventlog import LOG
 from gtimer.local import merge
+from gtimer.local.times import SubdvsnList, unshare
 from gtimer.util import iteritems, itervalues
 
 
@@ -15,102 +18,141 @@ from gtimer.util import iteritems, itervalues
 #
 
 
-def dump_times():
+def dump_times(f):
     f.r.total = f.t.tmp_total - f.r.self_agg  # (have already subtracted self_cut)
-    f.r.stamps_sum = sum([v for v in itervalues(f.s.cum)])
+    f.r.stamps_sum = sum(f.s.vals_cum)
     f.r.self_agg += f.t.self_cut  # (now add self_cut including self time of stop())
-    if f.s.itrs:
-        for s, itr_list in iteritems(f.s.itrs):
-            f.s.itr_max[s] = max(itr_list)
-            nonzero_itrs = list(filter(lambda x: x > 0., itr_list))
-            f.s.itr_num[s] = len(nonzero_itrs)
-            if f.s.itr_num[s] > 0:
-                f.s.itr_min[s] = min(nonzero_itrs)
-            else:
-                f.s.itr_min[s] = 0.
-    for s, val in iteritems(f.s.cum):  # (for saving stamps_as_itr)
-        if s not in f.s.itr_num:
-            f.s.itr_num[s] = 1
-            f.s.itr_max[s] = val
-            f.s.itr_min[s] = val
-    merge_t = 0.
+    stamps = f.s
+    for i, num in enumerate(stamps.vals_num):  # (loop stats kept running)
+        if num is None:  # (for saving stamps_as_itr)
+            val = stamps.vals_cum[i]
+            stamps.vals_num[i] = 1
+            stamps.vals_max[i] = val
+            stamps.vals_min[i] = val
+            stamps.vals_m2[i] = 0.
+        elif num == 0:
+            stamps.vals_min[i] = 0
+    merge_t = 0
     if f.t.dump is not None:
-        t = timer()
-        merge.merge_times(f.t.dump, f.r)
-        merge_t += timer() - t
+        t = clock.timer()
+        if f.t.dump.shared:
+            _unshare_dump(f)
+        merge.merge_times(f.t.dump, f.r, f.itrs_policy)
+        merge_t += clock.timer() - t
         f.t.dump.self_agg += merge_t
     # Must aggregate up self time only in the case of named loop, because it
     # dumps directly to an already assigned subdivision, whereas normally self
     # time aggregates during subdivision assignment.
     if f.t.is_named_loop:
         f.r.parent.self_agg += f.r.self_agg + merge_t
+        f.r.parent.bias_agg += f.r.bias_agg
 
 
-def assign_subdivisions(position, keep_subdivisions=True):
+def assign_subdivisions(f, position, keep_subdivisions=True):
+    if LOG['F'] is f and (f.t.subdvsn_awaiting or f.t.par_subdvsn_awaiting):
+        eventlog.log_assign(f, position, keep_subdivisions)
     # Aggregate the self-time whether subdvisions kept or not.
     for times in itervalues(f.t.subdvsn_awaiting):
         f.r.self_agg += times.self_agg
+        f.r.bias_agg += times.bias_agg
     for sub_list in itervalues(f.t.par_subdvsn_awaiting):
         sub_with_max_tot = max(sub_list, key=lambda x: x.total)
         f.r.self_agg += sub_with_max_tot.self_agg
+        f.r.bias_agg += sub_with_max_tot.bias_agg
     if keep_subdivisions:
         if f.t.subdvsn_awaiting:
-            _assign_subdvsn(position)
+            _assign_subdvsn(f, position)
         if f.t.par_subdvsn_awaiting:
-            _assign_par_subdvsn(position)
+            _assign_par_subdvsn(f, position)
     f.t.subdvsn_awaiting.clear()
     f.t.par_subdvsn_awaiting.clear()
 
 
+def attach_subdvsn(f, times):
+    f.r.self_agg += times.self_agg
+    f.r.bias_agg += times.bias_agg
+    name = times.name
+    if name not in f.t.subdvsn_awaiting:
+        times_copy = copy.deepcopy(times)
+        times_copy.parent = f.r
+        f.t.subdvsn_awaiting[name] = times_copy
+    else:
+        old_times = f.t.subdvsn_awaiting[name] = unshare(f.t.subdvsn_awaiting[name], f.r)
+        merge.merge_times(old_times, times, f.itrs_policy)
+
+
+def attach_par_subdvsn(f, par_name, par_times):
+    sub_with_max_tot = max(par_times, key=lambda x: x.total)
+    f.r.self_agg += sub_with_max_tot.self_agg
+    f.r.bias_agg += sub_with_max_tot.bias_agg
+    if par_name not in f.t.par_subdvsn_awaiting:
+        f.t.par_subdvsn_awaiting[par_name] = SubdvsnList()
+        for times in par_times:
+            times_copy = copy.deepcopy(times)
+            times_copy.parent = f.r
+            times_copy.par_in_parent = par_name
+            f.t.par_subdvsn_awaiting[par_name].append(times_copy)
+    else:
+        old_list = f.t.par_subdvsn_awaiting[par_name]
+        for new_sub in par_times:
+            i = old_list.find(new_sub.name)
+            if i is not None:
+                old_sub = old_list[i] = unshare(old_list[i], f.r)
+                merge.merge_times(old_sub, new_sub, f.itrs_policy)
+            else:
+                new_sub_copy = copy.deepcopy(new_sub)
+                new_sub_copy.parent = f.r
+                new_sub_copy.par_in_parent = par_name
+                f.t.par_subdvsn_awaiting[par_name].append(new_sub_copy)
+
+
 #
 # Private helper functions.
 #
 
 
-def _assign_subdvsn(position):
+def _unshare_dump(f):
+    # Replace it where the parent holds it, see _auto_subdivide() and
+    # _subdivide_named_loop().
+    dump = f.t.dump = unshare(f.t.dump, f.rm1)
+    if f.t.is_named_loop:
+        f.rm1.subdvsn[f.t.name] = SubdvsnList([dump])
+    else:
+        f.tm1.subdvsn_awaiting[f.t.name] = dump
+
+
+def _assign_subdvsn(f, position):
     new_pos = position not in f.r.subdvsn and f.t.subdvsn_awaiting
     if new_pos:
-        f.r.subdvsn[position] = list()
+        f.r.subdvsn[position] = SubdvsnList()
         for sub_times in itervalues(f.t.subdvsn_awaiting):
+            sub_times = unshare(sub_times, f.r)
             sub_times.pos_in_parent = position
-            f.r.subdvsn[position] += [sub_times]
+            f.r.subdvsn[position].append(sub_times)
     else:
-        for sub_times in itervalues(f.t.subdvsn_awaiting):
-            is_prev_sub = False
-            for old_sub in f.r.subdvsn[position]:
-                if old_sub.name == sub_times.name:
-                    is_prev_sub = True
-                    break
-            if is_prev_sub:
-                merge.merge_times(old_sub, sub_times)
-            else:
-                sub_times.pos_in_parent = position
-                f.r.subdvsn[position].append(sub_times)
+        _assign_sub_list(f, f.r.subdvsn[position],
+                         itervalues(f.t.subdvsn_awaiting), position)
 
 
-def _assign_par_subdvsn(position):
+def _assign_par_subdvsn(f, position):
     new_pos = position not in f.r.par_subdvsn and f.t.par_subdvsn_awaiting
     if new_pos:
         f.r.par_subdvsn[position] = dict()
-        for par_name, sub_list in iteritems(f.t.par_subdvsn_awaiting):
-            for sub_times in sub_list:
-                sub_times.pos_in_parent = position
-            f.r.par_subdvsn[position][par_name] = sub_list
-    else:
-        for par_name, sub_list in iteritems(f.t.par_subdvsn_awaiting):
-            if par_name not in f.r.par_subdvsn[position]:
-                for sub_times in sub_list:
-                    sub_times.pos_in_parent = position
-                f.r.par_subdvsn[position][par_name] = sub_list
-            else:
-                for sub_times in sub_list:
-                    is_prev_sub = False
-                    for old_sub in f.r.par_subdvsn[position][par_name]:
-                        if old_sub.name == sub_times.name:
-                            is_prev_sub = True
-                            break
-                    if is_prev_sub:
-                        merge.merge_times(old_sub, sub_times)
-                    else:
-                        sub_times.pos_in_parent = position
-                        f.r.par_subdvsn[position][par_name].append(sub_times)
+    for par_name, sub_list in iteritems(f.t.par_subdvsn_awaiting):
+        if par_name not in f.r.par_subdvsn[position]:
+            f.r.par_subdvsn[position][par_name] = SubdvsnList()
+        _assign_sub_list(f, f.r.par_subdvsn[position][par_name], sub_list,
+                         position)
+
+
+def _assign_sub_list(f, old_list, sub_list, position):
+    # (Times shared with a snapshot are copied before writing.)
+    for sub_times in sub_list:
+        i = old_list.find(sub_times.name)
+        if i is None:
+            sub_times = unshare(sub_times, f.r)
+            sub_times.pos_in_parent = position
+            old_list.append(sub_times)
+        else:
+            old_sub = old_list[i] = unshare(old_list[i], f.r)
+            merge.merge_times(old_sub, sub_times, f.itrs_policy)
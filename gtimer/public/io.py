@@ -3,39 +3,57 @@
 Functions provided to user for saving / loading / combining times data objects.
 """
 from __future__ import absolute_import
-from timeit import default_timer as timer
 try:
     import cPickle as pickle
 except:
     import pickle
 import copy
-# import mmap
-# import os
+import io
+import multiprocessing
 
-from gtimer.private import focus as f
+from gtimer.private import focus
+from gtimer.private import clock
 from gtimer.private import collapse
+from gtimer.private import export
+from gtimer.private import eventlog
+from gtimer.private.eventlog import LOG
+from gtimer.private import times as times_priv
 from gtimer.local.times import Times
 from gtimer.local import merge
+from gtimer.local import itrs as itrs_loc
+from gtimer.local import binary
+from gtimer.local import compress as compress_priv
+from gtimer.local.channel import MmapChannel
 
 __all__ = ['get_times', 'attach_subdivision', 'attach_par_subdivision',
-           'save_pkl', 'load_pkl']
-#          'open_mmap', 'close_mmap', 'save_mmap', 'load_mmap']
+           'join_thread_times', 'merge_many', 'save_pkl', 'load_pkl',
+           'save_bin', 'load_bin', 'load_and_merge', 'open_mmap', 'save_mmap',
+           'load_mmap', 'close_mmap', 'start_exporter', 'stop_exporter',
+           'start_event_log', 'stop_event_log', 'replay_log']
 
 
 def get_times():
     """
-    Produce a deepcopy of the current timing data (no risk of interference
+    Produce a copy of the current timing data (no risk of interference
     with active timing or other operaitons).
 
+    Notes:
+        While timing is running, only the timers and loops currently open
+        are copied.  Subdivisions already closed are shared with the running
+        timer (which copies one before writing to it again), so the cost does
+        not grow with the size of the hierarchy.  Treat the result as
+        read-only, or copy.deepcopy() it before modifying.
+
     Returns:
         Times: gtimer timing data structure object.
     """
+    f = focus.get_focus()
     if f.root.stopped:
-        return copy.deepcopy(f.root.times)
+        return clock.export_times(copy.deepcopy(f.root.times))
     else:
-        t = timer()
-        times = collapse.collapse_times()
-        f.root.self_cut += timer() - t
+        t = clock.timer()
+        times = clock.export_times(collapse.collapse_times())
+        f.root.self_cut += clock.timer() - t
         return times
 
 
@@ -65,38 +83,20 @@ def attach_par_subdivision(par_name, par_times):
     Raises:
         TypeError: If par_times not a list or tuple of Times data objects.
     """
-    t = timer()
+    f = focus.get_focus()
+    t = clock.timer()
     if not isinstance(par_times, (list, tuple)):
         raise TypeError("Expected list or tuple for param 'par_times'.")
     for times in par_times:
         if not isinstance(times, Times):
             raise TypeError("Expected each element of param 'par_times' to be Times object.")
         assert times.total > 0., "An attached par subdivision has total time 0, appears empty."
+    par_times = [clock.import_times(times) for times in par_times]
     par_name = str(par_name)
-    sub_with_max_tot = max(par_times, key=lambda x: x.total)
-    f.r.self_agg += sub_with_max_tot.self_agg
-    if par_name not in f.t.par_subdvsn_awaiting:
-        f.t.par_subdvsn_awaiting[par_name] = []
-        for times in par_times:
-            times_copy = copy.deepcopy(times)
-            times_copy.parent = f.r
-            times_copy.par_in_parent = par_name
-            f.t.par_subdvsn_awaiting[par_name].append(times_copy)
-    else:
-        for new_sub in par_times:
-            is_prev_sub = False
-            for old_sub in f.t.par_subdvsn_awaiting[par_name]:
-                if old_sub.name == new_sub.name:
-                    is_prev_sub = True
-                    break
-            if is_prev_sub:
-                merge.merge_times(old_sub, new_sub)
-            else:
-                new_sub_copy = copy.deepcopy(new_sub)
-                new_sub_copy.parent = f.r
-                new_sub_copy.par_in_parent = par_name
-                f.t.par_subdvsn_awaiting[par_name].append(new_sub_copy)
-    f.t.self_cut += timer() - t
+    if LOG['F'] is f:
+        eventlog.log_attach(f, par_name, par_times)
+    times_priv.attach_par_subdvsn(f, par_name, par_times)
+    f.t.self_cut += clock.timer() - t
 
 
 def attach_subdivision(times):
@@ -116,30 +116,137 @@ def attach_subdivision(times):
     Raises:
         TypeError: If times not a Times data object.
     """
-    t = timer()
+    f = focus.get_focus()
+    t = clock.timer()
     if not isinstance(times, Times):
         raise TypeError("Expected Times object for param 'times'.")
     assert times.total > 0., "Attached subdivision has total time 0, appears empty."
-    name = times.name
-    f.r.self_agg += times.self_agg
-    if name not in f.t.subdvsn_awaiting:
-        times_copy = copy.deepcopy(times)
-        times_copy.parent = f.r
-        f.t.subdvsn_awaiting[name] = times_copy
-    else:
-        merge.merge_times(f.t.subdvsn_awaiting[name], times)
-    f.t.self_cut += timer() - t
+    times = clock.import_times(times)
+    if LOG['F'] is f:
+        eventlog.log_attach(f, None, [times])
+    times_priv.attach_subdvsn(f, times)
+    f.t.self_cut += clock.timer() - t
+
+
+def join_thread_times(par_name, threads=None):
+    """
+    Attach the timing data of finished threads as a parallel subdivision of
+    the running timer in this thread.
+
+    Notes:
+        Each thread times into its own hierarchy, rooted at a timer named
+        after the thread, so threads may stamp concurrently.  Once a thread
+        has finished, its data is collected here (its root is stopped as of
+        the thread's exit if the thread did not do so) and attached through
+        attach_par_subdivision().  Threads which finished without timing
+        anything are skipped.  Each thread's data is joined only once, and is
+        dropped if the thread object is no longer referenced anywhere.
+
+        Use after joining the threads, e.g. once a thread pool is shut down.
+
+    Args:
+        par_name (any): Identifier for the collection, passed through str()
+        threads (list or tuple, optional): Thread objects to join; default
+            is all finished threads.
 
+    Returns:
+        list: Names of the threads whose times were attached.
+    """
+    f = focus.get_focus()
+    t = clock.timer()
+    par_times = []
+    for thread, thread_focus in focus.pop_finished_threads(threads):
+        if thread_focus.root.stopped:
+            times = thread_focus.root.times
+        else:
+            focus.set_focus(thread_focus)
+            try:
+                times = collapse.collapse_times(thread_focus.end_t)
+            finally:
+                focus.set_focus(f)
+        if times.total > 0:
+            par_times.append(clock.export_times(times))
+    f.t.self_cut += clock.timer() - t
+    if par_times:
+        attach_par_subdivision(par_name, par_times)
+    return [times.name for times in par_times]
+
+
+def merge_many(times_list, mode='sum'):
+    """
+    Combine many (stopped) Times objects at once, e.g. from worker processes.
+
+    Notes:
+        In 'sum' mode, all are merged into one Times: totals, stamps, and
+        iterations add up, and subdivisions are matched by name (the result
+        keeps the name of the first).  In 'par' mode, only those with the same
+        name are merged, giving one list (in order of first appearance) to use
+        as a parallel subdivision group, e.g. with attach_par_subdivision().
 
-def save_pkl(filename=None, times=None):
+        Merging is a balanced pairwise reduction, and the objects provided are
+        merged into one another rather than copied (also with the nanosecond
+        clock: they are merged in seconds, as given), so they are consumed:
+        do not use them afterwards (pass copies to keep them).
+
+    Args:
+        times_list (list or tuple): Collection of Times data objects.
+        mode (str, optional): 'sum' or 'par'.
+
+    Returns:
+        Times: In 'sum' mode, the merged data object.
+        list: In 'par' mode, the merged Times objects, one per name.
+
+    Raises:
+        TypeError: If times_list not a list or tuple of Times data objects.
+        ValueError: If times_list is empty or holds the same object twice, or
+            if mode is not recognized.
+    """
+    if not isinstance(times_list, (list, tuple)):
+        raise TypeError("Expected list or tuple for param 'times_list'.")
+    for times in times_list:
+        if not isinstance(times, Times):
+            raise TypeError("Expected each element of param 'times_list' to be Times object.")
+    if not times_list:
+        raise ValueError("Expected at least one Times object in param 'times_list'.")
+    if len(set(id(times) for times in times_list)) < len(times_list):
+        raise ValueError("A Times object appears more than once in param 'times_list'.")
+    if mode not in ('sum', 'par'):
+        raise ValueError("Unrecognized mode: {}, expected 'sum' or 'par'.".format(mode))
+    # (Merged in the seconds given, not clock units, so new itrs hold floats.)
+    itrs_policy = dict(itrs_loc.POLICY, TYPECODE='d')
+    if mode == 'sum':
+        return merge.merge_all(times_list, itrs_policy)
+    groups = dict()
+    names = list()
+    for times in times_list:
+        if times.name not in groups:
+            groups[times.name] = list()
+            names.append(times.name)
+        groups[times.name].append(times)
+    return [merge.merge_all(groups[name], itrs_policy) for name in names]
+
+
+def save_pkl(filename=None, times=None, compress=None, level=None):
     """
     Serialize and / or save a Times data object using pickle (cPickle).
 
+    Notes:
+        With compress, the pickle is passed through the compressor (the
+        standard library's file object) as it is written, so neither it nor
+        the compressed data is held whole in memory when saving to file.
+        Iteration times and repeated names compress well.  load_pkl()
+        recognizes compressed files by themselves.
+
     Args:
         filename (None, optional): Filename to dump to. If not provided,
             returns serialized object.
         times (None, optional): object to dump.  If non provided, uses
             current root.
+        compress (None, optional): 'zlib', 'bz2', or 'lzma' (the last two in
+            Python 3) to compress, using the standard library module of that
+            name.
+        level (None, optional): Compression level, 0-9 ('zlib', default 6),
+            1-9 ('bz2', default 9), or the preset 0-9 ('lzma', default 6).
 
     Returns:
         pkl: Pickled Times data object, only if no filename provided.
@@ -147,38 +254,47 @@ def save_pkl(filename=None, times=None):
     Raises:
         TypeError: If 'times' is not a Times object or a list of tuple of
             them.
+        ValueError: If compress is not recognized.
     """
-    if times is None:
-        if not f.root.stopped:
-            times = collapse.collapse_times()
+    times = _times_to_save(times)
+    if compress is None:
+        if filename is not None:
+            with open(str(filename), 'wb') as file:
+                pickle.dump(times, file)
         else:
-            times = f.root.times
+            return pickle.dumps(times)
     else:
-        if isinstance(times, (list, tuple)):
-            for t in times:
-                if not isinstance(t, Times):
-                    raise TypeError("Expected single Times instance or list/tuple of Times instances for param 'times'.")
-        elif not isinstance(times, Times):
-            raise TypeError("Expected single Times instance or list/tuple of Times instances for param 'times'.")
-    if filename is not None:
-        with open(str(filename), 'wb') as file:
-            pickle.dump(times, file)
-    else:
-        return pickle.dumps(times)
+        compress_priv.check(compress)  # (before creating the file)
+        file = open(str(filename), 'wb') if filename is not None else io.BytesIO()
+        try:
+            stream = compress_priv.writer(file, compress, level)
+            pickle.dump(times, stream)
+            stream.close()
+            if filename is None:
+                return file.getvalue()
+        finally:
+            file.close()
 
 
 def load_pkl(filenames):
     """
     Unpickle file contents.
 
+    Notes:
+        Files compressed by save_pkl() are recognized and decompressed as
+        they are read, so the files in one call may be compressed differently
+        or not at all.
+
     Args:
         filenames (str): Can be one or a list or tuple of filenames to retrieve.
 
     Returns:
-        Times: A single object, or from a collection of filenames, a list of Times objects.
+        Times: A single object, or from a collection of filenames, a list of Times
+            objects (or what was saved in each, if a list).
 
     Raises:
-        TypeError: If any loaded object is not a Times object.
+        TypeError: If any loaded object is not a Times object (or a list or
+            tuple of them).
     """
     if not isinstance(filenames, (list, tuple)):
         filenames = [filenames]
@@ -186,119 +302,405 @@ def load_pkl(filenames):
     for name in filenames:
         name = str(name)
         with open(name, 'rb') as file:
+            compress = compress_priv.detect(file.read(compress_priv.MAGIC_LEN))
+            file.seek(0)
+            if compress is not None:
+                file = compress_priv.reader(file, compress)
             loaded_obj = pickle.load(file)
-            if not isinstance(loaded_obj, Times):
+            if isinstance(loaded_obj, (list, tuple)):
+                valid = all(isinstance(t, Times) for t in loaded_obj)
+            else:
+                valid = isinstance(loaded_obj, Times)
+            if not valid:
                 raise TypeError("At least one loaded object is not a Times data object.")
             times.append(loaded_obj)
     return times if len(times) > 1 else times[0]
 
 
+def save_bin(filename=None, times=None):
+    """
+    Serialize and / or save a Times data object in gtimer's binary format.
+
+    Notes:
+        A flat layout of tables (names, nodes, stamps, and iteration times as
+        contiguous doubles), with a version number, rather than the pickled
+        object graph: smaller and faster to load, and not tied to the class
+        layout.  Values are stored as double precision floats (seconds).
+
+    Args:
+        filename (None, optional): Filename to write to. If not provided,
+            returns serialized object.
+        times (None, optional): object to save.  If non provided, uses
+            current root.
+
+    Returns:
+        bytes: Serialized Times data object, only if no filename provided.
+
+    Raises:
+        TypeError: If 'times' is not a Times object or a list of tuple of
+            them.
+    """
+    data = binary.dumps(_times_to_save(times))
+    if filename is not None:
+        with open(str(filename), 'wb') as file:
+            file.write(data)
+    else:
+        return data
+
+
+def load_bin(filenames, lazy=False):
+    """
+    Load files written by save_bin().
+
+    Notes:
+        With lazy=True, only the summary of each Times (name, totals) is read
+        at first, and its stamps, subdivisions, and iteration times are read
+        from the file the first time they are accessed (e.g. as report()
+        descends into them), so browsing part of a large file costs little
+        more than the part browsed.  The file is memory-mapped and must not be
+        changed while the data is in use; copying or pickling the data reads
+        all of it.
+
+    Args:
+        filenames (str): Can be one or a list or tuple of filenames to retrieve.
+        lazy (bool, optional): Read each part of the data when first accessed.
+
+    Returns:
+        Times: A single object, or from a collection of filenames, a list of Times
+            objects (or what was saved in each, if a list).
+
+    Raises:
+        ValueError: If any file is not in gtimer's binary format, or is of a
+            later version.
+    """
+    if not isinstance(filenames, (list, tuple)):
+        filenames = [filenames]
+    times = []
+    for name in filenames:
+        if lazy:
+            times.append(binary.load_lazy(name))
+        else:
+            with open(str(name), 'rb') as file:
+                times.append(binary.loads(file.read()))
+    return times if len(times) > 1 else times[0]
+
+
+def load_and_merge(filenames, mode='sum', processes=None):
+    """
+    Load saved Times files (see save_pkl()) and merge them, as merge_many(),
+    using a pool of processes.
+
+    Notes:
+        The files are split into one contiguous chunk per process; each
+        process loads and merges its chunk, and the partial results are then
+        merged here, so the order of first appearance of names ('par' mode)
+        follows the order of the files.
+
+    Args:
+        filenames (list or tuple): Names of files to load.
+        mode (str, optional): 'sum' or 'par', see merge_many().
+        processes (int, optional): Number of processes, default is the
+            number of CPUs (1 loads and merges in this process).
+
+    Returns:
+        Times: In 'sum' mode, the merged data object.
+        list: In 'par' mode, the merged Times objects, one per name.
+
+    Raises:
+        TypeError: If filenames not a list or tuple, or if any loaded object
+            is not a Times object.
+        ValueError: If filenames is empty or mode is not recognized.
+    """
+    if not isinstance(filenames, (list, tuple)):
+        raise TypeError("Expected list or tuple for param 'filenames'.")
+    if not filenames:
+        raise ValueError("Expected at least one filename in param 'filenames'.")
+    if mode not in ('sum', 'par'):
+        raise ValueError("Unrecognized mode: {}, expected 'sum' or 'par'.".format(mode))
+    filenames = [str(name) for name in filenames]
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(int(processes), len(filenames)))
+    if processes == 1:
+        return _load_and_merge_chunk((filenames, mode))
+    chunk_size = -(-len(filenames) // processes)  # (rounded up)
+    chunks = [(filenames[i:i + chunk_size], mode)
+              for i in range(0, len(filenames), chunk_size)]
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = pool.map(_load_and_merge_chunk, chunks)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    if mode == 'par':
+        results = [times for par_list in results for times in par_list]
+    return merge_many(results, mode)
+
+
+def open_mmap(filenames, init_size=10000, write=True):
+    """
+    Open memory-mapped files for sharing timing data between processes: a
+    process (e.g. a worker) publishes its latest data into its own file with
+    save_mmap(), and others (e.g. the master) read the latest from each with
+    load_mmap().
+
+    Notes:
+        Processes need only agree on the filenames (e.g. made from worker
+        ids), so the parallel call itself need not change, and the data
+        passes through shared memory rather than pipes.  For no disk writes
+        at all, use a memory-backed file system (e.g. /dev/shm on Linux).
+
+        Each file may have only one writer at a time.  The writer grows the
+        file as needed.  Neither side waits on the other: a read overlapping
+        a write is retried, so partial data is never seen.
+
+    Args:
+        filenames (str): Can be one or a list or tuple of filenames (created
+            if missing).
+        init_size (int, optional): Size in bytes of a new file opened for
+            writing.
+        write (bool, optional): Open for writing, else for reading only.
+
+    Returns:
+        MmapChannel: A single object, or from a collection of filenames, a
+            list of them (to pass to the other mmap functions).
+
+    Raises:
+        ValueError: If an existing file is not a gtimer mmap file, or is of
+            a later version.
+    """
+    if not isinstance(filenames, (list, tuple)):
+        return MmapChannel(filenames, init_size, write)
+    return [MmapChannel(name, init_size, write) for name in filenames]
+
+
+def save_mmap(channel, times=None):
+    """
+    Publish a Times data object into a memory-mapped file opened for writing,
+    replacing the data there.
+
+    Args:
+        channel (MmapChannel): From open_mmap().
+        times (None, optional): object to publish.  If non provided, uses
+            current root (as save_pkl()).
+
+    Returns:
+        None
+
+    Raises:
+        TypeError: If 'times' is not a Times object or a list of tuple of
+            them.
+        ValueError: If channel not open for writing.
+    """
+    channel.publish(binary.dumps(_times_to_save(times)))
+
+
+def load_mmap(channels):
+    """
+    Read the data last published into memory-mapped files.
+
+    Args:
+        channels (MmapChannel): Can be one or a list or tuple, from
+            open_mmap().
+
+    Returns:
+        Times: A single object (None if nothing published yet), or from a
+            collection of channels, a list of them.
+
+    Raises:
+        RuntimeError: If no consistent data can be read (i.e. a writer
+            stopped during a write).
+    """
+    if not isinstance(channels, (list, tuple)):
+        data = channels.read()
+        return None if data is None else binary.loads(data)
+    times = list()
+    for channel in channels:
+        data = channel.read()
+        times.append(None if data is None else binary.loads(data))
+    return times
+
+
+def close_mmap(channels):
+    """
+    Close memory-mapped files opened by open_mmap() (the files remain).
+
+    Args:
+        channels (MmapChannel): Can be one or a list or tuple.
+
+    Returns:
+        None
+    """
+    if not isinstance(channels, (list, tuple)):
+        channels = [channels]
+    for channel in channels:
+        channel.close()
+
+
+def start_exporter(path, interval=60.):
+    """
+    Periodically save a snapshot of the timing data to file (as save_pkl()),
+    while timing continues.
+
+    Notes:
+        Every interval seconds a snapshot is due, and is taken at the next
+        stamp() or end of a timed loop iteration of the hierarchy which
+        started the exporter (i.e. in this thread, or task in asyncio mode).
+        Only the open timers are copied (see get_times()), and the time taken
+        counts as self time.  Conversion, pickling, and writing happen on a
+        background thread, into a temporary file in the same directory which
+        then replaces the target, so readers never see a partial file.
+
+    Args:
+        path (str): File to write (replaced each time).
+        interval (float, optional): Seconds between snapshots.
+
+    Raises:
+        RuntimeError: If an exporter is already running.
+        ValueError: If interval is not positive.
+    """
+    if export.EXPORT['EXPORTER'] is not None:
+        raise RuntimeError("An exporter is already running, see stop_exporter().")
+    interval = float(interval)
+    if interval <= 0:
+        raise ValueError("Exporter interval must be positive.")
+    export.Exporter(path, interval, focus.get_focus()).start()
+
+
+def stop_exporter(final=True):
+    """
+    Stop the exporter started by start_exporter(), waiting until it has
+    written any snapshot already taken.
+
+    Args:
+        final (bool, optional): First write a last snapshot, if called from
+            the hierarchy which started the exporter.
+
+    Returns:
+        None
+
+    Raises:
+        Exception: The error which ended the exporter early, if writing a
+            snapshot failed.
+    """
+    exporter = export.EXPORT['EXPORTER']
+    if exporter is None:
+        return
+    f = focus.get_focus()
+    if final and f is exporter.focus:
+        t = clock.timer()
+        if f.root.stopped:
+            exporter.queue.put(copy.deepcopy(f.root.times))
+        else:
+            exporter.queue.put(collapse.collapse_times())
+        f.root.self_cut += clock.timer() - t
+    exporter.stop()
+    if exporter.error is not None:
+        raise exporter.error
+
+
+def start_event_log(path, buffer_size=65536):
+    """
+    Record timing as it happens in an append-only event log, from which
+    replay_log() rebuilds the timing data, e.g. of a run which died before
+    it could save.
+
+    Notes:
+        Events of the hierarchy which started the log (i.e. in this thread,
+        or task in asyncio mode) are recorded: each stop() of a timer, each
+        completed timed loop iteration, stamps outside loops, and the
+        assignment or attachment of subdivisions, and changes to the
+        defaults of set_def_itrs_limit() and set_def_sketch() (so that the
+        replay keeps the same iteration data).  Each is a compact record,
+        written through a buffer of buffer_size bytes, so the I/O cost is
+        amortized, and at most that much of the latest timing is lost with
+        the process.  Only timing from here on is recorded, so start the log
+        before timing, e.g. right after import or reset_root().  The file is
+        replaced.
+
+    Args:
+        path (str): File to write.
+        buffer_size (int, optional): Bytes buffered between writes.
+
+    Raises:
+        RuntimeError: If an event log is already open.
+    """
+    if LOG['WRITER'] is not None:
+        raise RuntimeError("An event log is already open, see stop_event_log().")
+    eventlog.start(path, int(buffer_size), focus.get_focus())
+
+
+def stop_event_log():
+    """
+    Write out and close the event log started by start_event_log().
+
+    Returns:
+        None
+    """
+    eventlog.stop()
+
+
+def replay_log(path):
+    """
+    Rebuild timing data from an event log written through
+    start_event_log(), as of its last complete record.
+
+    Notes:
+        Timers still open at the end of the log are stopped there, as by
+        get_times(): subdivisions awaiting assignment go to the 'UNASSIGNED'
+        position, and totals run to the latest record within the timer (its
+        self time since then, and any pause, are not known).  A loop
+        iteration in progress at the end of the log is not included.  If the
+        root timer was reset (reset_root()) while logging, the data since the
+        latest reset is returned.
+
+    Args:
+        path (str): File to read.
+
+    Returns:
+        Times: gtimer timing data structure object.
+
+    Raises:
+        ValueError: If the file is not a gtimer event log.
+    """
+    return eventlog.replay(path)
+
+
 #
-# These are still under construction...not tested and probably not functional:
+# Private helper functions.
 #
 
-# def open_mmap(filenames, init_size=10000, write=True):
-#     """
-#     EXPERIMENTAL: UNTESTED OR NOT FUNCTIONING.
-
-#     Args:
-#         filenames (TYPE): Description
-#         init_size (int, optional): Description
-#         write (bool, optional): Description
-#     """
-#     if not isinstance(filenames, (list, tuple)):
-#         filenames = [filenames]
-#     files = list()
-#     mmaps = list()
-#     for name in filenames:
-#         name = str(name)
-#         if not os.path.isfile(name):
-#             with open(name, 'w') as f:
-#                 f.write(init_size * b'\0')
-#         if write:
-#             access = mmap.ACCESS_COPY
-#         else:
-#             access = mmap.ACCESS_READ
-#         file = open(name, 'r+')
-#         mm = mmap.mmap(f.fileno(), 0, access=access)
-#         files.append(file)
-#         mmaps.append(mm)
-#     if len(files) > 1:
-#         return files, mmaps
-#     else:
-#         return file, mm
-
-
-# def close_mmap(mmaps, files):
-#     """
-#     EXPERIMENTAL: UNTESTED OR NOT FUNCTIONING.
-
-#     Args:
-#         mmaps (TYPE): Description
-#         files (TYPE): Description
-#     """
-#     mmaps = list(mmaps)
-#     files = list(files)
-#     for mm in mmaps:
-#         mm.close()
-#     for file in files:
-#         file.close()
-
-
-# def save_mmap(mm, file, times=None):
-#     """
-#     EXPERIMENTAL: UNTESTED OR NOT FUNCTIONING.
-
-#     Args:
-#         mm (TYPE): Description
-#         file (TYPE): Description
-#         times (None, optional): Description
-#     """
-#     if times is not None:
-#         assert isinstance(times, Times), "Input 'times' must be None or Times object."
-#     times_pkl = save_pkl(times)
-#     filesize = mm.size()
-#     data_len = len(times_pkl)
-#     if data_len > filesize:
-#         mm.close()
-#         file.seek(0, 2)
-#         file.write((data_len - filesize) * b'\0')
-#         mm = mmap.mmap(file.fileno(), data_len, access=mmap.ACCESS_COPY)
-#     mm.seek(0)
-#     mm.write(times_pkl)
-#     return mm, data_len
-
-
-# def load_mmap(mmaps, files, write=False):
-#     """
-#     EXPERIMENTAL: UNTESTED OR NOT FUNCTIONING.
-
-#     Args:
-#         mmaps (TYPE): Description
-#         files (TYPE): Description
-#         write (bool, optional): Description
-#     """
-#     mmaps = list(mmaps)
-#     files = list(files)
-#     times = list()
-#     if write:
-#         access = mmap.ACCESS_COPY
-#     else:
-#         access = mmap.ACCESS_READ
-#     mmaps_new = list()
-#     for file, mm in zip(files, mmaps):
-#         size = os.path.getsize(f)
-#         if size > mm.size():
-#             mm.close()
-#             mm_new = mmap.mmap(file.fileno(), 0, access=access)
-#             mmaps_new.append(mm_new)
-#             mm_new.seek(0)
-#             times.append(pickle.loads(mm_new.read(size)))
-#         else:
-#             mmaps_new.append(mm)
-#             mm.seek(0)
-#             times.append(pickle.loads(mm.read(size)))
-#     if len(times) > 1:
-#         return times, mmaps_new
-#     else:
-#         return times[0], mmaps_new[0]
+
+def _times_to_save(times):
+    f = focus.get_focus()
+    if times is None:
+        if not f.root.stopped:
+            times = clock.export_times(collapse.collapse_times())
+        elif clock.NS:
+            times = clock.export_times(copy.deepcopy(f.root.times))
+        else:
+            times = f.root.times
+    else:
+        if isinstance(times, (list, tuple)):
+            for t in times:
+                if not isinstance(t, Times):
+                    raise TypeError("Expected single Times instance or list/tuple of Times instances for param 'times'.")
+        elif not isinstance(times, Times):
+            raise TypeError("Expected single Times instance or list/tuple of Times instances for param 'times'.")
+    return times
+
+
+def _load_and_merge_chunk(args):
+    # (In a pool process, so at module level, and returns the result pickled.)
+    filenames, mode = args
+    times = []
+    for name in filenames:  # (a file may hold a list, see save_pkl())
+        loaded = load_pkl(name)
+        if isinstance(loaded, Times):
+            times.append(loaded)
+        else:
+            times.extend(loaded)
+    return merge_many(times, mode)
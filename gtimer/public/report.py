@@ -3,9 +3,10 @@
 Reporting functions provided to user.
 """
 from __future__ import absolute_import
-from timeit import default_timer as timer
+import copy
 
-from gtimer.private import focus as f
+from gtimer.private import focus
+from gtimer.private import clock
 from gtimer.local import report as report_loc
 from gtimer.local.times import Times
 from gtimer.private import collapse
@@ -59,22 +60,26 @@ def report(times=None,
     Raises:
         TypeError: If 'times' param is used and value is not a Times object.
     """
+    f = focus.get_focus()
     if times is None:
         if f.root.stopped:
-            return report_loc.report(f.root.times,
+            times = f.root.times
+            if clock.NS:
+                times = clock.export_times(copy.deepcopy(times))
+            return report_loc.report(times,
                                      include_itrs,
                                      include_stats,
                                      delim_mode,
                                      format_options)
         else:
-            t = timer()
-            rep = report_loc.report(collapse.collapse_times(),
+            t = clock.timer()
+            rep = report_loc.report(clock.export_times(collapse.collapse_times()),
                                     include_itrs,
                                     include_stats,
                                     delim_mode,
                                     format_options,
                                     timer_state='running')
-            f.root.self_cut += timer() - t
+            f.root.self_cut += clock.timer() - t
             return rep
     else:
         if not isinstance(times, Times):
@@ -131,9 +136,13 @@ def compare(times_list=None,
     Raises:
         TypeError: If any element of provided collection is not a Times object.
     """
+    f = focus.get_focus()
     if times_list is None:
         rep = ''
-        for par_dict in itervalues(f.root.times.par_subdvsn):
+        root_times = f.root.times
+        if clock.NS:
+            root_times = clock.export_times(copy.deepcopy(root_times))
+        for par_dict in itervalues(root_times.par_subdvsn):
             for par_name, par_list in iteritems(par_dict):
                 rep += report_loc.compare(par_list,
                                           par_name,
@@ -168,6 +177,7 @@ def write_structure(times=None):
     Raises:
         TypeError: If provided argument is not a Times object.
     """
+    f = focus.get_focus()
     if times is None:
         return report_loc.write_structure(f.root.times)
     else:
@@ -3,22 +3,34 @@
 Core timer functionality provided to user.
 """
 from __future__ import absolute_import, print_function
-from timeit import default_timer as timer
-
-from gtimer.private import focus as f
+import inspect
+import sys
+
+from gtimer.private import focus
+from gtimer.private import clock
+from gtimer.private import bias
+from gtimer.private.bias import BIAS
+from gtimer.private import export
+from gtimer.private.export import EXPORT
+from gtimer.private import eventlog
+from gtimer.private.eventlog import LOG
 from gtimer.private import times as times_priv
 from gtimer.local.util import sanitize_rgstr_stamps
-from gtimer.util import opt_arg_wrap
+from gtimer.local import itrs
+from gtimer.local.itrs import new_itrs
+from gtimer.local import sketch as sketch_loc
+from gtimer.util import opt_arg_wrap, intern
 from gtimer.private.const import UNASGN
 from gtimer.local.exceptions import (StartError, StoppedError, PausedError,
                                      LoopError, GTimerError, UniqueNameError,
                                      BackdateError)
 
 
-__all__ = ['start', 'stamp', 'stop', 'pause', 'resume', 'blank_stamp', 'reset', 'current_time',
+__all__ = ['start', 'stamp', 'stamp_handle', 'stop', 'pause', 'resume', 'blank_stamp', 'reset', 'current_time',
            'wrap', 'subdivide', 'end_subdivision',
-           'rename_root', 'set_save_itrs_root', 'rgstr_stamps_root', 'reset_root',
-           'set_def_save_itrs', 'set_def_keep_subdivisions', 'set_def_quick_print', 'set_def_unique']
+           'rename_root', 'set_save_itrs_root', 'rgstr_stamps_root', 'reset_root', 'set_clock_ns',
+           'set_asyncio_mode',
+           'set_def_save_itrs', 'set_def_itrs_limit', 'set_def_sketch', 'set_def_keep_subdivisions', 'set_def_quick_print', 'set_def_unique']
 
 
 #
@@ -47,7 +59,8 @@ def start(backdate=None):
         but more recent than the latest stamp in the parent timer.
 
     Args:
-        backdate (float, optional): time to use for start instead of current.
+        backdate (float, optional): time to use for start instead of current
+            (int if using the nanosecond clock).
 
     Returns:
         float: The current time.
@@ -57,29 +70,31 @@ def start(backdate=None):
         StartError: If the timer is not in a pristine state (if any stamps or
             subdivisions, must reset instead).
         StoppedError: If the timer is already stopped (must reset instead).
-        TypeError: If given backdate value is not type float.
+        TypeError: If given backdate value is not type float (int if using the
+            nanosecond clock).
     """
-    if f.s.cum:
+    f = focus.get_focus()
+    if f.s.order:
         raise StartError("Already have stamps, can't start again (must reset).")
     if f.t.subdvsn_awaiting or f.t.par_subdvsn_awaiting:
         raise StartError("Already have subdivisions, can't start again (must reset).")
     if f.t.stopped:
         raise StoppedError("Timer already stopped (must open new or reset).")
-    t = timer()
+    t = clock.timer()
     if backdate is None:
         t_start = t
     else:
         if f.t is f.root:
             raise BackdateError("Cannot backdate start of root timer.")
-        if not isinstance(backdate, float):
-            raise TypeError("Backdate must be type float.")
+        if not isinstance(backdate, clock.time_type):
+            raise TypeError("Backdate must be type {}.".format(clock.time_type.__name__))
         if backdate > t:
             raise BackdateError("Cannot backdate to future time.")
         if backdate < f.tm1.last_t:
             raise BackdateError("Cannot backdate start to time previous to latest stamp in parent timer.")
         t_start = backdate
     f.t.paused = False
-    f.t.tmp_total = 0.  # (In case previously paused.)
+    f.t.tmp_total = 0  # (In case previously paused.)
     f.t.start_t = t_start
     f.t.last_t = t_start
     return t
@@ -126,9 +141,11 @@ def stamp(name, backdate=None,
         BackdateError: If the given backdate time is out of range.
         PausedError: If the timer is paused.
         StoppedError: If the timer is stopped.
-        TypeError: If the given backdate value is not type float.
+        TypeError: If the given backdate value is not type float (int if
+            using the nanosecond clock).
     """
-    t = timer()
+    f = focus.get_focus()
+    t = clock.timer()
     if f.t.stopped:
         raise StoppedError("Cannot stamp stopped timer.")
     if f.t.paused:
@@ -136,8 +153,8 @@ def stamp(name, backdate=None,
     if backdate is None:
         t_stamp = t
     else:
-        if not isinstance(backdate, float):
-            raise TypeError("Backdate must be type float.")
+        if not isinstance(backdate, clock.time_type):
+            raise TypeError("Backdate must be type {}.".format(clock.time_type.__name__))
         if backdate > t:
             raise BackdateError("Cannot backdate to future time.")
         if backdate < f.t.last_t:
@@ -148,13 +165,71 @@ def stamp(name, backdate=None,
     unique = SET['UN'] if (unique is None and un is None) else bool(unique or un)  # bool(None) becomes False
     keep_subdivisions = SET['KS'] if (keep_subdivisions is None and ks is None) else bool(keep_subdivisions or ks)
     quick_print = SET['QP'] if (quick_print is None and qp is None) else bool(quick_print or qp)
-    _stamp(name, elapsed, unique, keep_subdivisions, quick_print)
-    tmp_self = timer() - t
+    _stamp(f, str(name), elapsed, unique, keep_subdivisions, quick_print)
+    if EXPORT['DUE'] is f:
+        export.take_snapshot(f)
+    tmp_self = clock.timer() - t
     f.t.self_cut += tmp_self
     f.t.last_t = t_stamp + tmp_self
     return t
 
 
+def stamp_handle(name,
+                 unique=None, keep_subdivisions=None, quick_print=None,
+                 un=None, ks=None, qp=None):
+    """
+    Prepare a stamp for repeated use, such as in a hot loop.  Returns a
+    function which, called with no arguments, marks the end of a timing
+    interval exactly as stamp() would with the same arguments.
+
+    Example::
+
+        h_fwd = gtimer.stamp_handle('fwd', unique=False)
+        for batch in data:
+            <forward pass>
+            h_fwd()
+
+    Notes:
+        The name is passed through str() and interned, and the settings are
+        resolved against the current global defaults, once here instead of on
+        every call.  Later changes to the global defaults do not affect an
+        existing handle.  Backdating is not available through a handle.
+
+    Args:
+        name (any): The identifier for this interval, processed through str()
+        unique (bool, optional): see stamp()
+        keep_subdivisions (bool, optional): see stamp()
+        quick_print (bool, optional): see stamp()
+        un (bool, optional): see stamp()
+        ks (bool, optional): see stamp()
+        qp (bool, optional): see stamp()
+
+    Returns:
+        callable: Takes no arguments, returns the current time (as stamp()).
+    """
+    name = intern(str(name))
+    unique = SET['UN'] if (unique is None and un is None) else bool(unique or un)
+    keep_subdivisions = SET['KS'] if (keep_subdivisions is None and ks is None) else bool(keep_subdivisions or ks)
+    quick_print = SET['QP'] if (quick_print is None and qp is None) else bool(quick_print or qp)
+
+    def gtimer_stamp_handle():
+        f = focus.get_focus()
+        t = clock.timer()
+        if f.t.stopped:
+            raise StoppedError("Cannot stamp stopped timer.")
+        if f.t.paused:
+            raise PausedError("Cannot stamp paused timer.")
+        _stamp(f, name, t - f.t.last_t, unique, keep_subdivisions, quick_print)
+        if EXPORT['DUE'] is f:
+            export.take_snapshot(f)
+        tmp_self = clock.timer() - t
+        f.t.self_cut += tmp_self
+        f.t.last_t = t + tmp_self
+        return t
+
+    return gtimer_stamp_handle
+
+
 def stop(name=None, backdate=None,
          unique=None, keep_subdivisions=None, quick_print=None,
          un=None, ks=None, qp=None):
@@ -189,9 +264,11 @@ def stop(name=None, backdate=None,
         BackdateError: If given backdate is out of range, or if used in root timer.
         PausedError: If attempting stamp in paused timer.
         StoppedError: If timer already stopped.
-        TypeError: If given backdate value is not type float.
+        TypeError: If given backdate value is not type float (int if using the
+            nanosecond clock).
     """
-    t = timer()
+    f = focus.get_focus()
+    t = clock.timer()
     if f.t.stopped:
         raise StoppedError("Timer already stopped.")
     if backdate is None:
@@ -199,8 +276,8 @@ def stop(name=None, backdate=None,
     else:
         if f.t is f.root:
             raise BackdateError("Cannot backdate stop of root timer.")
-        if not isinstance(backdate, float):
-            raise TypeError("Backdate must be type float.")
+        if not isinstance(backdate, clock.time_type):
+            raise TypeError("Backdate must be type {}.".format(clock.time_type.__name__))
         if backdate > t:
             raise BackdateError("Cannot backdate to future time.")
         if backdate < f.t.last_t:
@@ -213,21 +290,22 @@ def stop(name=None, backdate=None,
         if f.t.paused:
             raise PausedError("Cannot stamp paused timer.")
         elapsed = t_stop - f.t.last_t
-        _stamp(name, elapsed, unique, keep_subdivisions, quick_print)
+        _stamp(f, str(name), elapsed, unique, keep_subdivisions, quick_print)
     else:
-        times_priv.assign_subdivisions(UNASGN, keep_subdivisions)
+        times_priv.assign_subdivisions(f, UNASGN, keep_subdivisions)
     for s in f.t.rgstr_stamps:
-        if s not in f.s.cum:
-            f.s.cum[s] = 0.
-            f.s.order.append(s)
+        if s not in f.s.index:
+            f.s.add(s)
     if not f.t.paused:
         f.t.tmp_total += t_stop - f.t.start_t
     f.t.tmp_total -= f.t.self_cut
-    f.t.self_cut += timer() - t  # AFTER subtraction from tmp_total, before dump
-    times_priv.dump_times()
+    f.t.self_cut += clock.timer() - t  # AFTER subtraction from tmp_total, before dump
+    if LOG['F'] is f:
+        eventlog.log_stop(f)
+    times_priv.dump_times(f)
     f.t.stopped = True
     if quick_print:
-        print("({}) Total: {:.4f}".format(f.t.name, f.r.total))
+        print("({}) Total: {:.4f}".format(f.t.name, clock.to_sec(f.r.total)))
     return t
 
 
@@ -243,7 +321,8 @@ def pause():
         PausedError: If timer already paused.
         StoppedError: If timer already stopped.
     """
-    t = timer()
+    f = focus.get_focus()
+    t = clock.timer()
     if f.t.stopped:
         raise StoppedError("Cannot pause stopped timer.")
     if f.t.paused:
@@ -267,7 +346,8 @@ def resume():
         PausedError: If timer was not in paused state.
         StoppedError: If timer was already stopped.
     """
-    t = timer()
+    f = focus.get_focus()
+    t = clock.timer()
     if f.t.stopped:
         raise StoppedError("Cannot resume stopped timer.")
     if not f.t.paused:
@@ -309,12 +389,13 @@ def blank_stamp(name=None, backdate=None,
     Raises:
         StoppedError: If timer is already stopped.
     """
-    t = timer()
+    f = focus.get_focus()
+    t = clock.timer()
     if f.t.stopped:
         raise StoppedError("Cannot blank_stamp stopped timer.")
     keep_subdivisions = (keep_subdivisions or ks)
-    times_priv.assign_subdivisions(UNASGN, keep_subdivisions)
-    f.t.last_t = timer()
+    times_priv.assign_subdivisions(f, UNASGN, keep_subdivisions)
+    f.t.last_t = clock.timer()
     f.t.self_cut += f.t.last_t - t
     return t
 
@@ -337,22 +418,26 @@ def reset():
     Raises:
         LoopError: If in a timed loop.
     """
+    f = focus.get_focus()
     if f.t.in_loop:
         raise LoopError("Cannot reset a timer while it is in timed loop.")
     f.t.reset()
     f.refresh_shortcuts()
+    if LOG['F'] is f:
+        eventlog.log_reset(f)
     return f.t.start_t
 
 
 def current_time():
     """
-    Returns the current time using timeit.default_timer() (same as used
+    Returns the current time using timeit.default_timer(), or
+    time.perf_counter_ns() if the nanosecond clock is selected (same as used
     throughout gtimer).
 
     Returns:
-        float: the current time
+        float: the current time (int nanoseconds if using the nanosecond clock)
     """
-    return timer()
+    return clock.timer()
 
 
 #
@@ -373,6 +458,13 @@ def wrap(func, subdivide=True, name=None, rgstr_stamps=None, save_itrs=None):
 
         If a name is not provided, the function's __name__ is used (recommended).
 
+        Generator, coroutine (async def), and async generator functions
+        (Python 3.6+) are timed across every resumption, into the same
+        subdivision: it is entered whenever the function body runs and exited
+        whenever it yields or awaits, so time spent suspended or in the
+        consumer is left out.  Subdivisions or timed loops entered within such
+        a function must not remain open across a yield or await.
+
         For the other options, see subdivide().
 
     Args:
@@ -391,6 +483,9 @@ def wrap(func, subdivide=True, name=None, rgstr_stamps=None, save_itrs=None):
         name = func.__name__ if name is None else str(name)
         rgstr_stamps = sanitize_rgstr_stamps(rgstr_stamps)
         wrap_save_itrs = save_itrs
+        if _is_resumable(func):
+            from gtimer.private.steps import wrap_resumable
+            return wrap_resumable(func, name, rgstr_stamps, wrap_save_itrs)
 
         def gtimer_wrapped(*args, **kwargs):
             save_itrs = SET['SI'] if wrap_save_itrs is None else wrap_save_itrs
@@ -436,6 +531,7 @@ def subdivide(name, rgstr_stamps=None, save_itrs=SET['SI']):
     Returns:
         None
     """
+    f = focus.get_focus()
     _auto_subdivide(name, rgstr_stamps, save_itrs)
     f.t.is_user_subdvsn = True
 
@@ -453,6 +549,7 @@ def end_subdivision():
         GTimerError: If current subdivision was not induced by user.
         LoopError: If current timer is in a timed loop.
     """
+    f = focus.get_focus()
     if not f.t.is_user_subdvsn:
         raise GTimerError('Attempted to end a subdivision not started by user.')
     if f.t.in_loop:
@@ -475,9 +572,12 @@ def rename_root(name):
     Returns:
         str: Implemented identifier.
     """
+    f = focus.get_focus()
     name = str(name)
     f.root.name = name
     f.root.times.name = name
+    if LOG['F'] is f:
+        eventlog.log_rename(f)
     return name
 
 
@@ -493,6 +593,7 @@ def set_save_itrs_root(setting):
     Returns:
         bool: Implemented setting value.
     """
+    f = focus.get_focus()
     setting = bool(setting)
     f.root.times.save_itrs = setting
     return setting
@@ -509,6 +610,7 @@ def rgstr_stamps_root(rgstr_stamps):
     Returns:
         list: Implemented registered stamp collection.
     """
+    f = focus.get_focus()
     rgstr_stamps = sanitize_rgstr_stamps(rgstr_stamps)
     f.root.rgstr_stamps = rgstr_stamps
     return rgstr_stamps
@@ -526,7 +628,93 @@ def reset_root():
     Returns:
         None
     """
+    f = focus.get_focus()
+    f.hard_reset()
+    if LOG['F'] is f:
+        eventlog.log_open(f.root, None)
+
+
+def set_clock_ns(setting):
+    """
+    Select the clock used for all timing: integer nanoseconds from
+    time.perf_counter_ns() if True, or float seconds from
+    timeit.default_timer() if False (the default).
+
+    Notes:
+        With the nanosecond clock, all times held in the running timer are
+        integers, so accumulation is exact over long runs and no float
+        arithmetic happens while timing.  Data is converted to float seconds
+        only on the way out, in get_times(), report(), and save_pkl().  Times
+        returned by timing functions (and backdate values given to them) are
+        then integer nanoseconds.  Times objects provided by the user (e.g. to
+        attach_subdivision()) are always expected in seconds.
+
+    Warning:
+        Changing the clock re-instantiates the timer data structure, as in
+        reset_root(), discarding all previous state and data.  It also clears
+        any overhead calibration (see calibrate()).
+
+    Args:
+        setting (bool): Use the nanosecond clock, passed through bool().
+
+    Returns:
+        bool: Implemented setting value.
+
+    Raises:
+        RuntimeError: If the nanosecond clock is not available (Python < 3.7).
+    """
+    f = focus.get_focus()
+    setting = clock.set_ns(setting)
+    bias.clear()
     f.hard_reset()
+    return setting
+
+
+def set_asyncio_mode(setting=True, loop=None):
+    """
+    Time each asyncio task in its own hierarchy, joined into the spawning
+    code's hierarchy when the task completes.
+
+    Notes:
+        Without this mode, all tasks in a thread share one hierarchy, so a
+        subdivision entered by one task becomes the focus for any other task
+        which resumes before it ends.  In this mode, a task factory is
+        installed in the event loop: every task created thereafter starts its
+        own root timer (named after the task) and times into it regardless of
+        interleaving.  When the task finishes (including by exception or
+        cancellation), its root is stopped and its times are attached, as by
+        attach_par_subdivision(), to the timer then current in the code which
+        created the task.  The parallel subdivision is named after the
+        coroutine function (qualified name), with one member per task.  Tasks
+        which recorded nothing are not attached.
+
+        Code outside of tasks created in this mode keeps using its thread's
+        hierarchy.  Turn the mode off only once no timed tasks are running.
+
+    Args:
+        setting (bool, optional): Turn asyncio mode on or off.
+        loop (asyncio event loop, optional): Loop to install the task factory
+            in; default is asyncio.get_event_loop().
+
+    Returns:
+        bool: Implemented setting value.
+
+    Raises:
+        RuntimeError: If context variables are not available (Python < 3.7).
+    """
+    setting = bool(setting)
+    if setting and not focus.TASKS_AVAILABLE:
+        raise RuntimeError("asyncio mode requires contextvars (Python 3.7+).")
+    import asyncio
+    if loop is None:
+        loop = asyncio.get_event_loop()
+    if setting:
+        from gtimer.private import aio
+        loop.set_task_factory(aio.task_factory)
+    else:
+        loop.set_task_factory(None)
+    focus.set_task_mode(setting)
+    return setting
 
 
 #
@@ -541,6 +729,7 @@ def is_timer_stopped():
     Returns:
         bool: True if stopped.
     """
+    f = focus.get_focus()
     return f.t.stopped
 
 
@@ -551,6 +740,7 @@ def is_timer_paused():
     Returns:
         bool: True if paused.
     """
+    f = focus.get_focus()
     return f.t.paused
 
 
@@ -562,6 +752,7 @@ def has_subdvsn_awaiting():
     Returns:
         bool: True if any.
     """
+    f = focus.get_focus()
     return bool(f.t.subvsn_awaiting)
 
 
@@ -573,6 +764,7 @@ def has_par_subdvsn_awaiting():
     Returns:
         bool: True if any.
     """
+    f = focus.get_focus()
     return bool(f.t.par_subdvsn_awaiting)
 
 
@@ -584,6 +776,7 @@ def get_active_lineage():
     Returns:
         str: Formatted sequence of timer names in one string.
     """
+    f = focus.get_focus()
     lin_str = ''
     for active_timer in f.timer_stack:
         lin_str += "{}-->".format(active_timer.name)
@@ -614,6 +807,81 @@ def set_def_save_itrs(setting):
     return setting
 
 
+def set_def_itrs_limit(limit, mode='last'):
+    """
+    Set the global default (henceforth) bound on the number of individual
+    iteration times saved per stamp.
+
+    Notes:
+        With a limit, memory stays flat however many iterations run.  Mode
+        'last' keeps the most recent iterations, and mode 'sample' keeps a
+        uniform random sample (reservoir) of all iterations (also across
+        merges of repeated subdivisions).  The iteration count, total, max,
+        and min of each stamp are kept separately and remain exact.
+
+        Applies to iteration data started henceforth (e.g. in new loops or
+        subdivisions).
+
+    Args:
+        limit (int, None): Maximum number of iterations saved per stamp, or
+            None for no limit (the default).
+        mode (str, optional): 'last' or 'sample'.
+
+    Returns:
+        tuple: Implemented limit and mode.
+
+    Raises:
+        ValueError: If limit is less than 1, or mode is not recognized.
+    """
+    if limit is not None:
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError("Iterations limit must be at least 1 (or None).")
+    mode = str(mode)
+    if mode not in itrs.MODES:
+        raise ValueError("Unrecognized iterations mode: {} (use one of {}).".format(mode, itrs.MODES))
+    itrs.POLICY['LIMIT'] = limit
+    itrs.POLICY['MODE'] = mode
+    if LOG['WRITER'] is not None:
+        eventlog.log_policy()
+    return limit, mode
+
+
+def set_def_sketch(setting, rel_acc=0.01):
+    """
+    Set the global default (henceforth) behavior whether to keep a quantile
+    sketch of the iteration times of each stamp in new timed loops.
+
+    Notes:
+        The sketch is a histogram with logarithmic buckets, updated in
+        constant time per iteration and held in bounded memory, independent of
+        save_itrs.  Quantiles it gives are within relative accuracy rel_acc of
+        the true value, and sketches merge exactly along with their times data
+        (e.g. repeated subdivisions, or attached parallel workers).  Then
+        report() and compare() show the p50, p90, and p99 iteration times.
+
+    Args:
+        setting: Passed through bool().
+        rel_acc (float, optional): Relative accuracy of quantiles (sketches of
+            different accuracy cannot be merged).
+
+    Returns:
+        bool: Implemented setting value.
+
+    Raises:
+        ValueError: If rel_acc is not between 0 and 1.
+    """
+    setting = bool(setting)
+    rel_acc = float(rel_acc)
+    if not 0. < rel_acc < 1.:
+        raise ValueError("Sketch relative accuracy must be between 0 and 1.")
+    sketch_loc.POLICY['ON'] = setting
+    sketch_loc.POLICY['REL_ACC'] = rel_acc
+    if LOG['WRITER'] is not None:
+        eventlog.log_policy()
+    return setting
+
+
 def set_def_keep_subdivisions(setting):
     """
     Set the global default (henceforth) behavior whether to keep awaiting
@@ -674,7 +942,10 @@ def clear_subdvsn_awaiting():
     Returns:
         None
     """
+    f = focus.get_focus()
     f.t.subdvsn_awaiting.clear()
+    if LOG['F'] is f:
+        eventlog.log_clear(f, False)
 
 
 def clear_par_subdvsn_awaiting():
@@ -684,7 +955,10 @@ def clear_par_subdvsn_awaiting():
     Returns:
         None
     """
+    f = focus.get_focus()
     f.t.par_subdvsn_awaiting.clear()
+    if LOG['F'] is f:
+        eventlog.log_clear(f, True)
 
 
 #
@@ -692,51 +966,56 @@ def clear_par_subdvsn_awaiting():
 #
 
 
-def _stamp(name, elapsed, unique, keep_subdivisions, quick_print):
-    name = str(name)
+def _stamp(f, name, elapsed, unique, keep_subdivisions, quick_print):
+    if BIAS['ON']:
+        elapsed = bias.correct(f.t, elapsed, BIAS['ST'])
     if f.t.in_loop:
-        _loop_stamp(name, elapsed, unique)
+        _loop_stamp(f, name, elapsed, unique)
     else:
-        if name not in f.s.cum:
-            f.s.cum[name] = elapsed
-            f.s.order.append(name)
+        slot = f.s.index.get(name)
+        if slot is None:
+            f.s.add(name, elapsed)
         elif unique:
             raise UniqueNameError("Duplicate stamp name: {}".format(name))
         else:
-            f.s.cum[name] += elapsed
+            f.s.vals_cum[slot] += elapsed
+        if LOG['F'] is f:
+            eventlog.log_stamp(f, name, elapsed)
     if quick_print:
-        print("({}) {}: {:.4f}".format(f.t.name, name, elapsed))
-    times_priv.assign_subdivisions(name, keep_subdivisions)
+        print("({}) {}: {:.4f}".format(f.t.name, name, clock.to_sec(elapsed)))
+    if f.t.subdvsn_awaiting or f.t.par_subdvsn_awaiting:
+        times_priv.assign_subdivisions(f, name, keep_subdivisions)
 
 
-def _loop_stamp(name, elapsed, unique=True):
-    if name not in f.lp.stamps:  # (first time this loop gets this name)
-        _init_loop_stamp(name, unique)
-    if f.lp.itr_stamp_used[name]:
+def _loop_stamp(f, name, elapsed, unique=True):
+    if name not in f.lp.stamp_set:  # (first time this loop gets this name)
+        _init_loop_stamp(f, name, unique)
+    itr_stamps = f.lp.itr_stamps
+    if name in itr_stamps:
         if unique:
             raise UniqueNameError("Loop stamp name twice in one itr: {}".format(name))
+        itr_stamps[name] += elapsed
     else:
-        f.lp.itr_stamp_used[name] = True
-    f.lp.itr_stamps[name] += elapsed
+        itr_stamps[name] = elapsed
 
 
-def _init_loop_stamp(name, unique=True, do_lp=True):
-    if unique and name in f.s.cum:
+def _init_loop_stamp(f, name, unique=True, do_lp=True):
+    from gtimer.private import loop  # (which imports this module)
+    if unique and name in f.s.index:
         raise UniqueNameError("Duplicate stamp name (in or at loop): {}".format(name))
     if do_lp:
-        f.lp.stamps.append(name)
-        f.lp.itr_stamp_used[name] = False
-        f.lp.itr_stamps[name] = 0.
+        f.lp.add_stamp(name)
         if f.lp.save_itrs:
-            f.s.itrs[name] = []
-    f.s.cum[name] = 0.
-    f.s.itr_num[name] = 0
-    f.s.itr_max[name] = 0.
-    f.s.itr_min[name] = float('Inf')
-    f.s.order.append(name)
+            f.s.itrs[name] = new_itrs()
+        if f.lp.sketch:
+            f.s.sketch[name] = sketch_loc.new_sketch()
+    loop.init_stamp(f.s, name)
+    if do_lp and LOG['F'] is f:
+        eventlog.log_init(f, name, f.lp.save_itrs, f.lp.sketch)
 
 
 def _auto_subdivide(name, rgstr_stamps=None, save_itrs=True):
+    f = focus.get_focus()
     name = str(name)
     rgstr_stamps = sanitize_rgstr_stamps(rgstr_stamps)
     save_itrs = bool(save_itrs)
@@ -749,15 +1028,29 @@ def _auto_subdivide(name, rgstr_stamps=None, save_itrs=True):
         # No previous, write times directly to awaiting sub in parent times.
         f.create_next_timer(name, rgstr_stamps, save_itrs=save_itrs, parent=f.r)
         f.tm1.subdvsn_awaiting[name] = f.r
+    if LOG['F'] is f:
+        eventlog.log_open(f.t, f.tm1)
+    if BIAS['ON']:
+        f.tm1.bias_pending += BIAS['SB'] + BIAS['SP']
+
+
+def _is_resumable(func):
+    if sys.version_info < (3, 6):
+        return False
+    return (inspect.isgeneratorfunction(func) or
+            inspect.iscoroutinefunction(func) or
+            inspect.isasyncgenfunction(func))
 
 
 def _close_subdivision():
+    f = focus.get_focus()
     if not f.t.stopped:
         stop()
     f.remove_last_timer()
 
 
 def _end_auto_subdivision():
+    f = focus.get_focus()
     if f.t.is_user_subdvsn:
         raise GTimerError("gtimer attempted to end user-generated subdivision.")
     assert not f.t.in_loop, "gtimer attempted to close subidivision while in timed loop."
@@ -37,3 +37,8 @@ def compat_py2_py3():
 
 
 iteritems, itervalues = compat_py2_py3()
+
+try:
+    from sys import intern
+except ImportError:  # (Python 2, where it is a builtin)
+    intern = intern
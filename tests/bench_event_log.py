@@ -0,0 +1,48 @@
+
+"""
+Cost of the event log: time per timed loop iteration (five stamps and a
+subdivision stopped in each) with and without the log, the size of the log,
+and the time to replay it.
+"""
+from __future__ import print_function
+import os
+import tempfile
+import timeit
+
+from context import gtimer as gt
+
+
+NUM_ITRS = 2000
+PATH = os.path.join(tempfile.gettempdir(), 'gtimer_bench_event_log')
+
+
+def run():
+    gt.reset_root()
+    for _ in gt.timed_for(range(NUM_ITRS)):
+        gt.subdivide('sub')
+        gt.stamp('a')
+        gt.end_subdivision()
+        for name in ('b', 'c', 'd', 'e'):
+            gt.stamp(name)
+
+
+def run_logged():
+    gt.reset_root()
+    gt.start_event_log(PATH)
+    for _ in gt.timed_for(range(NUM_ITRS)):
+        gt.subdivide('sub')
+        gt.stamp('a')
+        gt.end_subdivision()
+        for name in ('b', 'c', 'd', 'e'):
+            gt.stamp(name)
+    gt.stop_event_log()
+
+
+t_off = min(timeit.repeat(run, number=1, repeat=5))
+t_on = min(timeit.repeat(run_logged, number=1, repeat=5))
+t_replay = min(timeit.repeat(lambda: gt.replay_log(PATH), number=1, repeat=5))
+print("us/itr (no log)   us/itr (log)   bytes/itr   replay (s)")
+print("{:>15.1f}   {:>12.1f}   {:>9.0f}   {:>10.3f}".format(
+    t_off / NUM_ITRS * 1e6, t_on / NUM_ITRS * 1e6,
+    os.path.getsize(PATH) / NUM_ITRS, t_replay))
+os.remove(PATH)
@@ -0,0 +1,58 @@
+
+"""
+Browsing a large binary file loaded lazily, against loading it all: about 100k
+subdivisions and 1.5M iteration times.
+"""
+from __future__ import print_function
+import os
+import tempfile
+import timeit
+
+from context import gtimer as gt
+
+
+def make_times(num_outer=1000, num_inner=100, num_itrs=500000):
+    gt.reset_root()
+    for i in range(num_outer):
+        gt.subdivide('outer_{}'.format(i))
+        for j in range(num_inner):
+            gt.subdivide('inner_{}'.format(j))
+            gt.stamp('a')
+            gt.stamp('b')
+            gt.end_subdivision()
+            gt.stamp('inner_{}'.format(j))
+        gt.end_subdivision()
+        gt.stamp('outer_{}'.format(i))
+    for _ in gt.timed_for(range(num_itrs)):
+        gt.stamp('x')
+        gt.stamp('y')
+        gt.stamp('z')
+    gt.stop()
+    return gt.get_times()
+
+
+def root_total(lazy):
+    return gt.load_bin(filename, lazy=lazy).total
+
+
+def one_subtree(lazy):
+    times = gt.load_bin(filename, lazy=lazy)
+    return gt.report(times.subdvsn['outer_500'][0])
+
+
+def root_itrs(lazy):
+    times = gt.load_bin(filename, lazy=lazy)
+    return sum(times.stamps.itrs['x'])
+
+
+filename = os.path.join(tempfile.mkdtemp(), 'times.bin')
+gt.save_bin(filename, make_times())
+print("file: {:.1f} MB".format(os.path.getsize(filename) / 1e6))
+print("access                 load (s)   lazy (s)")
+for label, func in [('root total', root_total), ('report of one subtree', one_subtree),
+                    ('root iteration times', root_itrs)]:
+    t_load = min(timeit.repeat(lambda: func(False), number=1, repeat=3))
+    t_lazy = min(timeit.repeat(lambda: func(True), number=1, repeat=3))
+    print("{:<21}   {:>8.3f}   {:>8.4f}".format(label, t_load, t_lazy))
+os.remove(filename)
+os.rmdir(os.path.dirname(filename))
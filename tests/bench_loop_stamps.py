@@ -0,0 +1,28 @@
+
+"""
+Per-stamp cost inside a timed loop, as the number of distinct stamp names in
+the loop body grows (should stay flat).
+"""
+from __future__ import print_function
+import timeit
+
+from context import gtimer as gt
+
+
+NUM_ITRS = 200
+
+
+def loop_body(names):
+    def run():
+        gt.reset_root()
+        for _ in gt.timed_for(range(NUM_ITRS)):
+            for name in names:
+                gt.stamp(name)
+    return run
+
+
+print("stamps/loop   ns/stamp")
+for num_stamps in [5, 50, 500]:
+    names = ['stamp_{}'.format(i) for i in range(num_stamps)]
+    t = min(timeit.repeat(loop_body(names), number=1, repeat=5))
+    print("{:>11}   {:>8.0f}".format(num_stamps, t / (NUM_ITRS * num_stamps) * 1e9))
@@ -0,0 +1,31 @@
+
+"""
+Merge throughput of Times by number of stamps (should grow linearly).
+"""
+from __future__ import print_function
+import copy
+import timeit
+
+from context import gtimer as gt
+from gtimer.local import merge
+
+
+def make_times(num_stamps):
+    gt.reset_root()
+    for i in range(num_stamps):
+        gt.stamp('stamp_{}'.format(i))
+    gt.stop()
+    return gt.get_times()
+
+
+print("   stamps   merge (ms)   stamps/s")
+for num_stamps in [10, 1000, 100000]:
+    times = make_times(num_stamps)
+    best = None
+    for _ in range(5):
+        rcvr, new = copy.deepcopy(times), copy.deepcopy(times)
+        t = timeit.default_timer()
+        merge.merge_times(rcvr, new)
+        t = timeit.default_timer() - t
+        best = t if best is None else min(best, t)
+    print("{:>9}   {:>10.3f}   {:>8.2e}".format(num_stamps, best * 1e3, num_stamps / best))
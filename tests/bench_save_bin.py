@@ -0,0 +1,41 @@
+
+"""
+Size and speed of save_bin / load_bin against save_pkl / load_pkl, on a tree
+of about 100k subdivisions.
+"""
+from __future__ import print_function
+import os
+import tempfile
+import timeit
+
+from context import gtimer as gt
+
+
+def make_times(num_outer=1000, num_inner=100):
+    gt.reset_root()
+    for i in range(num_outer):
+        gt.subdivide('outer_{}'.format(i))
+        for j in range(num_inner):
+            gt.subdivide('inner_{}'.format(j))
+            gt.stamp('a')
+            gt.stamp('b')
+            gt.end_subdivision()
+            gt.stamp('inner_{}'.format(j))
+        gt.end_subdivision()
+        gt.stamp('outer_{}'.format(i))
+    gt.stop()
+    return gt.get_times()
+
+
+times = make_times()
+tmp = tempfile.mkdtemp()
+print("format   size (MB)   save (s)   load (s)")
+for fmt, save, load in [('pkl', gt.save_pkl, gt.load_pkl),
+                        ('bin', gt.save_bin, gt.load_bin)]:
+    filename = os.path.join(tmp, 'times.' + fmt)
+    t_save = min(timeit.repeat(lambda: save(filename, times), number=1, repeat=3))
+    t_load = min(timeit.repeat(lambda: load(filename), number=1, repeat=3))
+    size = os.path.getsize(filename) / 1e6
+    print("{:>6}   {:>9.2f}   {:>8.3f}   {:>8.3f}".format(fmt, size, t_save, t_load))
+    os.remove(filename)
+os.rmdir(tmp)
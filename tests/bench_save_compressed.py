@@ -0,0 +1,45 @@
+"""
+Size and speed of save_pkl / load_pkl with each compression, on a tree of
+about 10k subdivisions and 600k iteration times.
+"""
+from __future__ import print_function
+import os
+import tempfile
+import timeit
+
+from context import gtimer as gt
+
+
+def make_times(num_outer=100, num_inner=100, num_itrs=200000):
+    gt.reset_root()
+    for i in range(num_outer):
+        gt.subdivide('outer_{}'.format(i))
+        for j in range(num_inner):
+            gt.subdivide('inner_{}'.format(j))
+            gt.stamp('a')
+            gt.stamp('b')
+            gt.end_subdivision()
+            gt.stamp('inner_{}'.format(j))
+        gt.end_subdivision()
+        gt.stamp('outer_{}'.format(i))
+    for _ in gt.timed_for(range(num_itrs)):
+        gt.stamp('x')
+        gt.stamp('y')
+        gt.stamp('z')
+    gt.stop()
+    return gt.get_times()
+
+
+times = make_times()
+filename = os.path.join(tempfile.mkdtemp(), 'times.pkl')
+print("compress   level   size (MB)   save (s)   load (s)")
+for compress, level in [(None, None), ('zlib', 1), ('zlib', 6), ('zlib', 9),
+                        ('bz2', 1), ('bz2', 9), ('lzma', 0), ('lzma', 6)]:
+    t_save = min(timeit.repeat(lambda: gt.save_pkl(filename, times, compress, level),
+                               number=1, repeat=3))
+    t_load = min(timeit.repeat(lambda: gt.load_pkl(filename), number=1, repeat=3))
+    size = os.path.getsize(filename) / 1e6
+    print("{:>8}   {:>5}   {:>9.2f}   {:>8.3f}   {:>8.3f}".format(
+        str(compress), '-' if level is None else level, size, t_save, t_load))
+os.remove(filename)
+os.rmdir(os.path.dirname(filename))
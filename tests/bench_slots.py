@@ -0,0 +1,87 @@
+
+"""
+Memory per node and time per stamp with __slots__ on Times, Stamps, Timer and
+Loop, against the same classes holding attributes in an instance __dict__.
+"""
+from __future__ import print_function
+import timeit
+import tracemalloc
+
+from context import gtimer as gt
+from gtimer.local import loop as loop_loc
+from gtimer.local import timer as timer_loc
+from gtimer.local import times as times_loc
+from gtimer.private import focus
+
+
+NUM_NODES = 20000
+NUM_ITRS = 10000
+
+
+def unslotted(cls):
+    # (The same class, but attributes in an instance __dict__.)
+    attrs = dict((k, v) for k, v in vars(cls).items()
+                 if k != '__slots__' and k not in cls.__slots__)
+    return type(cls.__name__, cls.__bases__, attrs)
+
+
+SLOTTED = dict(Times=times_loc.Times, Stamps=times_loc.Stamps,
+               Timer=timer_loc.Timer, Loop=loop_loc.Loop)
+UNSLOTTED = dict((name, unslotted(cls)) for name, cls in SLOTTED.items())
+
+
+def use_classes(classes):
+    # (Where the package makes each kind of node.)
+    timer_loc.Times = classes['Times']
+    times_loc.Stamps = classes['Stamps']
+    focus.Timer = classes['Timer']
+    focus.Loop = classes['Loop']
+    gt.reset_root()
+
+
+def bytes_per_node(make):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [make() for _ in range(NUM_NODES)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del nodes
+    return (after - before) / NUM_NODES - 8  # (less the list's pointer)
+
+
+def stamps():
+    gt.reset_root()
+    for _ in range(NUM_ITRS):
+        gt.stamp('a', un=False)
+
+
+def loop_itrs():
+    gt.reset_root()
+    for _ in gt.timed_for(range(NUM_ITRS)):
+        gt.stamp('a')
+        gt.stamp('b')
+
+
+def measure(classes):
+    use_classes(classes)
+    results = [bytes_per_node(lambda: classes['Times']('x')),
+               bytes_per_node(lambda: classes['Timer']('x')),
+               bytes_per_node(lambda: classes['Loop']('x'))]
+    t = classes['Timer']('x')
+    read = min(timeit.repeat(lambda: t.times.stamps.order, number=NUM_ITRS, repeat=5))
+    empty = min(timeit.repeat(lambda: None, number=NUM_ITRS, repeat=5))
+    results.append((read - empty) / NUM_ITRS * 1e9)
+    results.append(min(timeit.repeat(stamps, number=1, repeat=5)) / NUM_ITRS * 1e9)
+    results.append(min(timeit.repeat(loop_itrs, number=1, repeat=5)) / NUM_ITRS * 1e6)
+    return results
+
+
+rows = ["Times + Stamps per node (B)", "Timer (+ Times) per node (B)",
+        "Loop per node (B)", "read t.times.stamps.order (ns)",
+        "stamp() in a timer (ns)", "loop iteration, 2 stamps (us)"]
+before = measure(UNSLOTTED)
+after = measure(SLOTTED)
+print("{:<30}   {:>8}   {:>8}".format("", "dict", "slots"))
+for row, b, a in zip(rows, before, after):
+    print("{:<30}   {:>8.0f}   {:>8.0f}".format(row, b, a) if row.endswith('(B)') else
+          "{:<30}   {:>8.1f}   {:>8.1f}".format(row, b, a))
@@ -0,0 +1,180 @@
+
+"""
+Shared by the test_*.py modules: a deterministic clock, sample timing data,
+and a field by field comparison of Times data objects.
+"""
+from __future__ import absolute_import
+from collections import deque
+import random
+
+import gtimer as gt
+from gtimer.private import clock
+from gtimer.local.itrs import Reservoir
+from gtimer.local.sketch import Sketch
+from gtimer.local.times import SubdvsnList
+
+
+class FakeClock(object):
+    """ Stands in for clock.timer, advanced explicitly by tick()."""
+
+    def __init__(self, seed=0):
+        self.now = 0 if clock.NS else 0.
+        self.rand = random.Random(seed)
+
+    def __call__(self):
+        return self.now
+
+    def tick(self):
+        step = self.rand.randint(1, 1000)
+        self.now += step * 1000 if clock.NS else step * 1e-6
+
+
+def tick(fake, spent):
+    """Advance the fake clock, appending the step to spent."""
+    before = fake()
+    fake.tick()
+    spent.append(fake() - before)
+
+
+def use_fake_clock(seed=0, ns=False):
+    """Switch the clock (resetting the root), then replace it with a
+    FakeClock, which is returned."""
+    gt.set_clock_ns(ns)
+    fake = clock.timer = FakeClock(seed)
+    gt.reset_root()
+    return fake
+
+
+def restore_defaults():
+    gt.set_def_itrs_limit(None)
+    gt.set_def_sketch(False)
+    gt.set_clock_ns(False)  # (also the real clock, and resets the root)
+
+
+def make_times(fake, name='root'):
+    """Timing data of a run with stamps, named and anonymous loops,
+    repeated subdivisions, and a parallel subdivision; the clock must be
+    fake."""
+    workers = [_worker(fake, 'w{}'.format(i)) for i in range(2)]
+    gt.reset_root()
+    gt.rename_root(name)
+    fake.tick()
+    gt.stamp('first')
+    for i in gt.timed_for(range(6), 'outer'):
+        fake.tick()
+        gt.stamp('o1')
+        gt.subdivide('sub')
+        fake.tick()
+        gt.stamp('s1', unique=False)
+        gt.end_subdivision()
+        if i % 2:
+            fake.tick()
+            gt.stamp('o2')
+    for _ in gt.timed_for(range(4)):
+        fake.tick()
+        gt.stamp('l1')
+    gt.subdivide('par_host')
+    gt.attach_par_subdivision('workers', workers)
+    fake.tick()
+    gt.stamp('joined')
+    gt.end_subdivision()
+    fake.tick()
+    gt.stamp('last')
+    gt.stop()
+    return gt.get_times()
+
+
+def _worker(fake, name):
+    gt.reset_root()
+    gt.rename_root(name)
+    for _ in gt.timed_for(range(3), 'work'):
+        fake.tick()
+        gt.stamp('w1')
+        fake.tick()
+        gt.stamp('w2')
+    gt.stop()
+    return gt.get_times()
+
+
+def assert_times_equal(test, x, y, path='root'):
+    """Compare two Times field by field (test is a TestCase)."""
+    for attr in ('name', 'pos_in_parent', 'par_in_parent', 'save_itrs',
+                 'total', 'stamps_sum', 'self_agg', 'bias_agg'):
+        test.assertEqual(getattr(x, attr), getattr(y, attr), (path, attr))
+    sx, sy = x.stamps, y.stamps
+    test.assertEqual(sx.order, sy.order, path)
+    for attr in ('vals_cum', 'vals_num', 'vals_max', 'vals_min', 'vals_m2'):
+        test.assertEqual(list(getattr(sx, attr)), list(getattr(sy, attr)), (path, attr))
+    test.assertEqual(sorted(sx.itrs), sorted(sy.itrs), path)
+    for k in sx.itrs:
+        u, v = sx.itrs[k], sy.itrs[k]
+        test.assertIs(type(u), type(v), (path, k))
+        test.assertEqual(list(u), list(v), (path, k))
+        if isinstance(u, deque):
+            test.assertEqual(u.maxlen, v.maxlen, (path, k))
+        if isinstance(u, Reservoir):
+            test.assertEqual((u.limit, u.seen), (v.limit, v.seen), (path, k))
+    test.assertEqual(sorted(sx.sketch), sorted(sy.sketch), path)
+    for k in sx.sketch:
+        u, v = sx.sketch[k], sy.sketch[k]
+        test.assertIsInstance(v, Sketch)
+        for attr in ('rel_acc', 'unit', 'buckets', 'zeros', 'count'):
+            test.assertEqual(getattr(u, attr), getattr(v, attr), (path, k, attr))
+    test.assertEqual(list(x.subdvsn), list(y.subdvsn), path)
+    for pos in x.subdvsn:
+        test.assertIsInstance(y.subdvsn[pos], SubdvsnList)
+        test.assertEqual(len(x.subdvsn[pos]), len(y.subdvsn[pos]), (path, pos))
+        for u, v in zip(x.subdvsn[pos], y.subdvsn[pos]):
+            test.assertIs(v.parent, y)
+            assert_times_equal(test, u, v, path + '/' + u.name)
+    test.assertEqual(list(x.par_subdvsn), list(y.par_subdvsn), path)
+    for pos in x.par_subdvsn:
+        test.assertEqual(list(x.par_subdvsn[pos]), list(y.par_subdvsn[pos]), (path, pos))
+        for par_name in x.par_subdvsn[pos]:
+            x_list, y_list = x.par_subdvsn[pos][par_name], y.par_subdvsn[pos][par_name]
+            test.assertEqual(len(x_list), len(y_list), (path, par_name))
+            for u, v in zip(x_list, y_list):
+                test.assertIs(v.parent, y)
+                assert_times_equal(test, u, v, path + '/' + par_name + '/' + u.name)
+
+
+def assert_times_close(test, x, y, rel=1e-9, path='root'):
+    """As assert_times_equal(), but floats compared to within rel, e.g. when
+    sums were added up in another order."""
+    def close(u, v, key):
+        if u is None or v is None:
+            test.assertEqual(u, v, key)
+        else:
+            test.assertLessEqual(abs(u - v), rel * max(abs(u), abs(v), 1e-6), key)
+
+    for attr in ('name', 'pos_in_parent', 'par_in_parent', 'save_itrs'):
+        test.assertEqual(getattr(x, attr), getattr(y, attr), (path, attr))
+    for attr in ('total', 'stamps_sum', 'self_agg', 'bias_agg'):
+        close(getattr(x, attr), getattr(y, attr), (path, attr))
+    sx, sy = x.stamps, y.stamps
+    test.assertEqual(sx.order, sy.order, path)
+    test.assertEqual(list(sx.vals_num), list(sy.vals_num), path)
+    for attr in ('vals_cum', 'vals_max', 'vals_min', 'vals_m2'):
+        for s, u, v in zip(sx.order, getattr(sx, attr), getattr(sy, attr)):
+            close(u, v, (path, attr, s))
+    test.assertEqual(sorted(sx.itrs), sorted(sy.itrs), path)
+    for k in sx.itrs:
+        test.assertEqual(len(sx.itrs[k]), len(sy.itrs[k]), (path, k))
+        for u, v in zip(sx.itrs[k], sy.itrs[k]):
+            close(u, v, (path, 'itrs', k))
+    test.assertEqual(list(x.subdvsn), list(y.subdvsn), path)
+    for pos in x.subdvsn:
+        test.assertEqual([u.name for u in x.subdvsn[pos]],
+                         [v.name for v in y.subdvsn[pos]], (path, pos))
+        for u, v in zip(x.subdvsn[pos], y.subdvsn[pos]):
+            test.assertIs(v.parent, y)
+            assert_times_close(test, u, v, rel, path + '/' + u.name)
+    test.assertEqual(list(x.par_subdvsn), list(y.par_subdvsn), path)
+    for pos in x.par_subdvsn:
+        test.assertEqual(list(x.par_subdvsn[pos]), list(y.par_subdvsn[pos]), (path, pos))
+        for par_name in x.par_subdvsn[pos]:
+            x_list, y_list = x.par_subdvsn[pos][par_name], y.par_subdvsn[pos][par_name]
+            test.assertEqual([u.name for u in x_list], [v.name for v in y_list])
+            for u, v in zip(x_list, y_list):
+                test.assertIs(v.parent, y)
+                assert_times_close(test, u, v, rel, path + '/' + par_name + '/' + u.name)
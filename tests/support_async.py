@@ -0,0 +1,106 @@
+
+"""
+Coroutine and async generator functions for test_asyncio.py and test_wrap.py
+(uses Python 3.6+ syntax, so imported only where supported).
+"""
+import asyncio
+
+import gtimer as gt
+from gtimer.private.aio import _task_name  # (as tasks' times are named)
+
+from .support import tick
+
+
+class Suspend(object):
+    """ Awaitable which suspends once (a bare yield: to asyncio's loop, a
+    reschedule)."""
+
+    def __await__(self):
+        yield
+
+
+#
+# Tasks, recording the span of each (clock units) under its task name.
+#
+
+
+async def worker(fake, spans, n):
+    start = fake()
+    for i in range(n):
+        fake.tick()
+        gt.stamp('s{}'.format(i))
+        await Suspend()
+    fake.tick()
+    gt.stop('done')
+    spans[_task_name()] = fake() - start
+
+
+async def failing(fake, spans):
+    start = fake()
+    fake.tick()
+    gt.stamp('before')
+    await Suspend()
+    spans[_task_name()] = fake() - start
+    raise ValueError('failing')
+
+
+async def waiting(fake, spans, future):
+    start = fake()
+    fake.tick()
+    gt.stamp('before')
+    spans[_task_name()] = fake() - start
+    await future  # (cancelled meanwhile)
+
+
+async def idle():
+    await Suspend()
+
+
+async def spawn(fake, spans, coros):
+    start = fake()
+    fake.tick()
+    gt.stamp('spawn')
+    results = await asyncio.gather(*coros, return_exceptions=True)
+    fake.tick()
+    gt.stop('gathered')
+    spans[_task_name()] = fake() - start
+    return results
+
+
+async def spawn_and_cancel(fake, spans):
+    start = fake()
+    future = asyncio.get_event_loop().create_future()
+    task = asyncio.ensure_future(waiting(fake, spans, future))
+    await Suspend()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    fake.tick()
+    gt.stop('cancelled')
+    spans[_task_name()] = fake() - start
+    return task.cancelled()
+
+
+#
+# Resumable functions to wrap, recording the time (clock units) spent in
+# their bodies to spent.
+#
+
+
+async def coro(fake, spent, n):
+    for _ in range(n):
+        tick(fake, spent)
+        gt.stamp('step')
+        await Suspend()
+    tick(fake, spent)
+    gt.stamp('end')
+    return 'result'
+
+
+async def agen(fake, spent, n):
+    for i in range(n):
+        tick(fake, spent)
+        gt.stamp('step')
+        await Suspend()
+        tick(fake, spent)
+        gt.stamp('resumed')
+        yield i
@@ -0,0 +1,87 @@
+
+"""
+asyncio mode: each task times into its own hierarchy, attached as a parallel
+subdivision of its spawner's timer when it finishes.
+"""
+from __future__ import absolute_import
+import sys
+import unittest
+
+import gtimer as gt
+from gtimer.private import clock
+
+from .support import use_fake_clock, restore_defaults
+
+if sys.version_info >= (3, 7):
+    import asyncio
+    from . import support_async as aio
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "asyncio mode requires Python 3.7+")
+class AsyncioTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = use_fake_clock(ns=True)  # (exact sums)
+        self.spans = dict()  # task name --> its time from start to finish
+        self.loop = asyncio.new_event_loop()
+        gt.set_asyncio_mode(True, self.loop)
+
+    def tearDown(self):
+        gt.set_asyncio_mode(False, self.loop)
+        self.loop.close()
+        restore_defaults()
+
+    def check_task_times(self, times, par_name, parent):
+        self.assertEqual(times.par_in_parent, par_name)
+        self.assertIs(times.parent, parent)
+        self.assertEqual(times.total, clock.to_sec(self.spans[times.name]))
+        self.assertEqual(times.stamps_sum, times.total)
+
+    def test_tasks(self):
+        coros = [aio.worker(self.fake, self.spans, n) for n in (1, 2, 3)]
+        self.loop.run_until_complete(aio.spawn(self.fake, self.spans, coros))
+        self.fake.tick()
+        gt.stop('ran')
+        times = gt.get_times()
+        self.assertEqual(times.stamps.order, ['ran'])
+        spawner, = times.par_subdvsn['ran']['spawn']
+        self.check_task_times(spawner, 'spawn', times)
+        self.assertEqual(spawner.stamps.order, ['spawn', 'gathered'])
+        workers = spawner.par_subdvsn['gathered']['worker']
+        self.assertEqual(len(set(w.name for w in workers)), 3)
+        for w in workers:
+            self.check_task_times(w, 'worker', spawner)
+        self.assertEqual(sorted(w.stamps.order for w in workers),
+                         [['s0', 'done'], ['s0', 's1', 'done'], ['s0', 's1', 's2', 'done']])
+
+    def test_failed_cancelled_and_idle(self):
+        # (Joined however they finish, unless they recorded nothing.)
+        coros = [aio.failing(self.fake, self.spans), aio.idle(),
+                 aio.spawn_and_cancel(self.fake, self.spans)]
+        results = self.loop.run_until_complete(aio.spawn(self.fake, self.spans, coros))
+        self.assertIsInstance(results[0], ValueError)
+        self.assertTrue(results[2])
+        gt.stop('ran')
+        spawner, = gt.get_times().par_subdvsn['ran']['spawn']
+        par_dict = spawner.par_subdvsn['gathered']
+        self.assertEqual(sorted(par_dict), ['failing', 'spawn_and_cancel'])
+        failed, = par_dict['failing']
+        self.check_task_times(failed, 'failing', spawner)
+        self.assertEqual(failed.stamps.order, ['before'])
+        canceller, = par_dict['spawn_and_cancel']
+        self.check_task_times(canceller, 'spawn_and_cancel', spawner)
+        cancelled, = canceller.par_subdvsn['cancelled']['waiting']
+        self.check_task_times(cancelled, 'waiting', canceller)
+        self.assertEqual(cancelled.stamps.order, ['before'])
+
+    def test_mode_off(self):
+        # (Then tasks time into the thread's hierarchy.)
+        gt.set_asyncio_mode(False, self.loop)
+        self.loop.run_until_complete(aio.worker(self.fake, self.spans, 2))
+        times = gt.get_times()
+        self.assertEqual(times.stamps.order, ['s0', 's1', 'done'])
+        self.assertEqual(times.par_subdvsn, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
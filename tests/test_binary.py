@@ -0,0 +1,194 @@
+
+"""
+save_bin / load_bin: round-trips through the binary format, eager and lazy,
+and bad data.
+"""
+from __future__ import absolute_import
+import copy
+import os
+import pickle
+import shutil
+import struct
+import tempfile
+import unittest
+
+import gtimer as gt
+from gtimer.local import binary
+from gtimer.local.times import Times, Stamps
+
+from .support import use_fake_clock, restore_defaults, make_times, assert_times_equal
+
+
+def _is_set(times, attr):
+    # (Whether the slot holds a value, without reading it from the file.)
+    try:
+        getattr(Times, attr).__get__(times, Times)
+    except AttributeError:
+        return False
+    return True
+
+
+class BinaryRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp, 'times.bin')
+
+    def tearDown(self):
+        restore_defaults()
+        shutil.rmtree(self.tmp)
+
+    def check_round_trip(self, times):
+        data = gt.save_bin(times=times)
+        assert_times_equal(self, times, binary.loads(data))
+        gt.save_bin(self.filename, times)
+        assert_times_equal(self, times, gt.load_bin(self.filename))
+        self.assertEqual(gt.report(times, include_itrs=True),
+                         gt.report(gt.load_bin(self.filename), include_itrs=True))
+        lazy = gt.load_bin(self.filename, lazy=True)
+        self.assertIsInstance(lazy, binary.LazyTimes)
+        assert_times_equal(self, times, lazy)
+        self.assertEqual(gt.report(times, include_itrs=True),
+                         gt.report(gt.load_bin(self.filename, lazy=True), include_itrs=True))
+
+    def test_plain(self):
+        self.check_round_trip(make_times(use_fake_clock()))
+
+    def test_itrs_limit_last(self):
+        fake = use_fake_clock()
+        gt.set_def_itrs_limit(2, 'last')
+        self.check_round_trip(make_times(fake))
+
+    def test_itrs_limit_sample(self):
+        fake = use_fake_clock()
+        gt.set_def_itrs_limit(2, 'sample')
+        self.check_round_trip(make_times(fake))
+
+    def test_sketch(self):
+        fake = use_fake_clock()
+        gt.set_def_sketch(True)
+        self.check_round_trip(make_times(fake))
+
+    def test_ns_clock(self):
+        self.check_round_trip(make_times(use_fake_clock(ns=True)))
+
+    def test_merged(self):
+        fake = use_fake_clock()
+        merged = gt.merge_many([make_times(fake), make_times(fake)])
+        self.check_round_trip(merged)
+
+    def test_list(self):
+        fake = use_fake_clock()
+        times_list = [make_times(fake, 'a'), make_times(fake, 'b')]
+        gt.save_bin(self.filename, times_list)
+        loaded = gt.load_bin(self.filename)
+        self.assertEqual(len(loaded), 2)
+        for x, y in zip(times_list, loaded):
+            assert_times_equal(self, x, y)
+        loaded = gt.load_bin(self.filename, lazy=True)
+        self.assertEqual(len(loaded), 2)
+        for x, y in zip(times_list, loaded):
+            assert_times_equal(self, x, y)
+
+    def test_several_files(self):
+        fake = use_fake_clock()
+        a, b = make_times(fake, 'a'), make_times(fake, 'b')
+        names = [os.path.join(self.tmp, n) for n in ('a.bin', 'b.bin')]
+        gt.save_bin(names[0], a)
+        gt.save_bin(names[1], b)
+        for lazy in (False, True):
+            loaded = gt.load_bin(names, lazy=lazy)
+            assert_times_equal(self, a, loaded[0])
+            assert_times_equal(self, b, loaded[1])
+
+    def test_lazy_copies_are_times(self):
+        times = make_times(use_fake_clock())
+        gt.save_bin(self.filename, times)
+        for copied in (pickle.loads(pickle.dumps(gt.load_bin(self.filename, lazy=True))),
+                       copy.deepcopy(gt.load_bin(self.filename, lazy=True))):
+            self.check_plain(copied)
+            assert_times_equal(self, times, copied)
+
+    def test_lazy_reads_on_access(self):
+        times = make_times(use_fake_clock())
+        gt.save_bin(self.filename, times)
+        lazy = gt.load_bin(self.filename, lazy=True)
+        self.assertEqual((lazy.name, lazy.total), (times.name, times.total))
+        for attr in ('stamps', 'subdvsn', 'par_subdvsn'):
+            self.assertFalse(_is_set(lazy, attr), attr)
+        lazy.stamps
+        self.assertTrue(_is_set(lazy, 'stamps'))
+        self.assertFalse(_is_set(lazy, 'subdvsn'))
+
+    def check_plain(self, times):
+        self.assertIs(type(times), Times)
+        self.assertIs(type(times.stamps), Stamps)
+        for pos in times.subdvsn:
+            for sub in times.subdvsn[pos]:
+                self.check_plain(sub)
+        for pos in times.par_subdvsn:
+            for par_list in times.par_subdvsn[pos].values():
+                for sub in par_list:
+                    self.check_plain(sub)
+
+
+class BinaryBadDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data = gt.save_bin(times=make_times(use_fake_clock()))
+
+    def tearDown(self):
+        restore_defaults()
+        shutil.rmtree(self.tmp)
+
+    def test_truncated(self):
+        for end in range(len(self.data)):
+            with self.assertRaises(ValueError):
+                binary.loads(self.data[:end])
+
+    def test_trailing_data(self):
+        with self.assertRaises(ValueError):
+            binary.loads(self.data + b'\0')
+
+    def test_not_binary(self):
+        with self.assertRaises(ValueError):
+            binary.loads(b'not gtimer data at all, and long enough for a header')
+
+    def test_later_version(self):
+        data = self.data[:4] + struct.pack('<H', binary.VERSION + 1) + self.data[6:]
+        with self.assertRaises(ValueError):
+            binary.loads(data)
+
+    def test_lazy_truncated(self):
+        filename = os.path.join(self.tmp, 'times.bin')
+        for end in range(0, len(self.data), 7):
+            with open(filename, 'wb') as file:
+                file.write(self.data[:end])
+            with self.assertRaises(ValueError):
+                gt.load_bin(filename, lazy=True)
+
+    def test_lazy_not_binary(self):
+        filename = os.path.join(self.tmp, 'times.bin')
+        with open(filename, 'wb') as file:
+            file.write(b'not gtimer data at all, and long enough for a header')
+        with self.assertRaises(ValueError):
+            gt.load_bin(filename, lazy=True)
+
+    def test_corrupt_counts(self):
+        # (The count of itr values, in the header, says more than there is.)
+        offset = struct.calcsize('<4sHH') + 5 * 4
+        count, = struct.unpack_from('<I', self.data, offset)
+        data = bytearray(self.data)
+        struct.pack_into('<I', data, offset, count + 1000)
+        with self.assertRaises(ValueError):
+            binary.loads(bytes(data))
+        filename = os.path.join(self.tmp, 'times.bin')
+        with open(filename, 'wb') as file:
+            file.write(bytes(data))
+        with self.assertRaises(ValueError):
+            gt.load_bin(filename, lazy=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
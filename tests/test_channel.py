@@ -0,0 +1,154 @@
+
+"""
+MmapChannel and the mmap functions: publishing and reading, growing the
+file, and reads never seeing partial data while another process writes.
+"""
+from __future__ import absolute_import
+import multiprocessing
+import os
+import shutil
+import struct
+import tempfile
+import time
+import unittest
+
+import gtimer as gt
+from gtimer.local import channel as channel_loc
+from gtimer.local.channel import MmapChannel
+
+from .support import use_fake_clock, restore_defaults, make_times, assert_times_equal
+
+
+WRITE_SECONDS = 0.5  # (long enough for many switches between processes)
+FINAL = 2 ** 32 - 1
+PAYLOAD_HEAD = struct.Struct('<II')  # write number, length of the rest
+
+
+def _payload(i):
+    # (Sizes vary, growing the file now and then; the content says which
+    # write it is, so a torn read shows.)
+    size = (i * 7919) % 50000
+    return PAYLOAD_HEAD.pack(i, size) + bytes(bytearray([i % 256])) * size
+
+
+def _write_for(filename, seconds):
+    channel = MmapChannel(filename, init_size=100)
+    end = time.time() + seconds
+    i = 0
+    while time.time() < end:
+        i += 1
+        channel.publish(_payload(i))
+    channel.publish(_payload(FINAL))
+    channel.close()
+
+
+class MmapChannelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp, 'channel')
+
+    def tearDown(self):
+        restore_defaults()
+        shutil.rmtree(self.tmp)
+
+    def test_nothing_published(self):
+        reader = MmapChannel(self.filename, write=False)  # (before the writer)
+        self.assertIsNone(reader.read())
+        writer = MmapChannel(self.filename)
+        self.assertIsNone(reader.read())
+        writer.publish(b'data')
+        self.assertEqual(reader.read(), b'data')
+        writer.close()
+        reader.close()
+
+    def test_grow(self):
+        writer = MmapChannel(self.filename, init_size=100)
+        reader = MmapChannel(self.filename, write=False)
+        for size in (10, 1000, 100000, 5):
+            data = b'x' * size
+            writer.publish(data)
+            self.assertEqual(reader.read(), data)
+        writer.close()
+        reader.close()
+
+    def test_reopen_writer(self):
+        writer = MmapChannel(self.filename)
+        writer.publish(b'first')
+        writer.close()
+        writer = MmapChannel(self.filename)
+        reader = MmapChannel(self.filename, write=False)
+        self.assertEqual(reader.read(), b'first')
+        writer.publish(b'second')
+        self.assertEqual(reader.read(), b'second')
+        writer.close()
+        reader.close()
+
+    def test_read_only(self):
+        MmapChannel(self.filename).close()
+        reader = MmapChannel(self.filename, write=False)
+        with self.assertRaises(ValueError):
+            reader.publish(b'data')
+        reader.close()
+
+    def test_not_channel_file(self):
+        with open(self.filename, 'wb') as file:
+            file.write(b'something else entirely, and long enough')
+        with self.assertRaises(ValueError):
+            MmapChannel(self.filename)
+
+    def test_stalled_writer(self):
+        writer = MmapChannel(self.filename)
+        writer.publish(b'data')
+        channel_loc.SEQ.pack_into(writer.mm, channel_loc.SEQ_OFFSET, writer.seq + 1)
+        reader = MmapChannel(self.filename, write=False)
+        timeout = channel_loc.READ_TIMEOUT
+        channel_loc.READ_TIMEOUT = 0.05
+        try:
+            with self.assertRaises(RuntimeError):
+                reader.read()
+        finally:
+            channel_loc.READ_TIMEOUT = timeout
+        writer.close()
+        reader.close()
+
+    def test_concurrent_writer(self):
+        MmapChannel(self.filename, init_size=100).close()
+        reader = MmapChannel(self.filename, write=False)
+        writer = multiprocessing.Process(target=_write_for,
+                                         args=(self.filename, WRITE_SECONDS))
+        writer.start()
+        last = 0
+        try:
+            while last != FINAL:
+                data = reader.read()
+                if data is None:
+                    continue
+                i = PAYLOAD_HEAD.unpack_from(data)[0]
+                self.assertEqual(data, _payload(i))
+                self.assertGreaterEqual(i, last)
+                last = i
+        finally:
+            writer.join()
+            reader.close()
+        self.assertEqual(writer.exitcode, 0)
+
+    def test_times(self):
+        fake = use_fake_clock()
+        writers = gt.open_mmap([self.filename, self.filename + '_2'], init_size=100)
+        readers = gt.open_mmap([self.filename, self.filename + '_2'], write=False)
+        self.assertEqual(gt.load_mmap(readers), [None, None])
+        a, b = make_times(fake, 'a'), make_times(fake, 'b')
+        gt.save_mmap(writers[0], a)
+        gt.save_mmap(writers[1], [a, b])
+        loaded = gt.load_mmap(readers)
+        assert_times_equal(self, a, loaded[0])
+        assert_times_equal(self, a, loaded[1][0])
+        assert_times_equal(self, b, loaded[1][1])
+        gt.save_mmap(writers[0], b)
+        assert_times_equal(self, b, gt.load_mmap(readers[0]))
+        gt.close_mmap(writers + readers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+
+"""
+The nanosecond clock: data exported in seconds as timed with the float clock,
+conversion of user data in and out, and stamp handles timing as stamp().
+"""
+from __future__ import absolute_import
+import copy
+import sys
+import unittest
+
+import gtimer as gt
+from gtimer.local.exceptions import StoppedError, PausedError, UniqueNameError
+from gtimer.local.times import iter_subdivisions
+from gtimer.private import clock
+from gtimer.private.const import UNASGN
+
+from .support import (use_fake_clock, restore_defaults, make_times,
+                      assert_times_equal, assert_times_close)
+
+SEED = 1
+
+
+def _all_times(times):
+    yield times
+    for sub in iter_subdivisions(times):
+        for t in _all_times(sub):
+            yield t
+
+
+def _snapshot(fake):
+    # (Taken in a loop, inside an open subdivision.)
+    gt.rename_root('root')
+    for i in gt.timed_for(range(3), save_itrs=True):
+        fake.tick()
+        gt.stamp('a')
+        gt.subdivide('sub')
+        fake.tick()
+        gt.stamp('x')
+        if i == 2:
+            return gt.get_times()
+        gt.end_subdivision()
+
+
+def _run(fake, handles):
+    # (The same timing, through stamp handles or stamp(); returns the data
+    # and the times returned by each stamp.)
+    if handles:
+        make = gt.stamp_handle
+    else:
+        def make(name, **kwargs):
+            return lambda: gt.stamp(name, **kwargs)
+    first, a, b, again = make('first'), make('a'), make('b', unique=False), make('again', un=False)
+    returned = list()
+    fake.tick()
+    returned.append(first())
+    for _ in gt.timed_for(range(4), save_itrs=True):
+        fake.tick()
+        returned.append(a())
+        gt.subdivide('sub')
+        for _ in range(2):
+            fake.tick()
+            returned.append(b())
+        gt.end_subdivision()
+    for _ in range(2):
+        fake.tick()
+        returned.append(again())
+    gt.stop()
+    return gt.get_times(), returned
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "nanosecond clock requires Python 3.7+")
+class ClockNsTest(unittest.TestCase):
+
+    def tearDown(self):
+        restore_defaults()
+
+    def check_exported(self, x, y):
+        # (x timed with the float clock, y with the nanosecond clock.)
+        assert_times_close(self, x, y)
+        for u, v in zip(_all_times(x), _all_times(y)):
+            self.assertIsInstance(v.total, float)
+            self.assertTrue(all(isinstance(c, float) for c in v.stamps.vals_cum))
+            for k, itrs in v.stamps.itrs.items():
+                self.assertEqual(itrs.typecode, u.stamps.itrs[k].typecode)
+            self.assertEqual(sorted(u.stamps.sketch), sorted(v.stamps.sketch))
+            for k, sketch in v.stamps.sketch.items():
+                self.assertEqual(sketch.unit, 1.)
+                self.assertEqual(sketch.count, u.stamps.sketch[k].count)
+                for q in (0., 0.5, 1.):
+                    self.assertAlmostEqual(sketch.quantile(q), u.stamps.sketch[k].quantile(q),
+                                           delta=2 * sketch.rel_acc * sketch.quantile(q))
+
+    def test_export_matches_float(self):
+        for sketch in (False, True):
+            times = list()
+            for ns in (False, True):
+                fake = use_fake_clock(SEED, ns)
+                gt.set_def_sketch(sketch)
+                times.append(make_times(fake))
+            self.check_exported(*times)
+            if sketch:
+                self.assertNotEqual(times[1].stamps.sketch, {})
+
+    def test_snapshot_matches_float(self):
+        times = [_snapshot(use_fake_clock(SEED, ns)) for ns in (False, True)]
+        self.check_exported(*times)
+
+    def test_to_sec(self):
+        gt.set_clock_ns(True)
+        self.assertEqual((clock.NS, clock.time_type), (True, int))
+        self.assertIsInstance(clock.timer(), int)
+        self.assertEqual(clock.to_sec(1500), 1.5e-6)
+        gt.set_clock_ns(False)
+        self.assertEqual((clock.NS, clock.time_type), (False, float))
+        self.assertEqual(clock.to_sec(1.5), 1.5)
+
+    def test_import_export(self):
+        times = make_times(use_fake_clock(SEED))
+        self.assertIs(clock.import_times(times), times)  # (float clock: as is)
+        self.assertIs(clock.export_times(times), times)
+        expected = copy.deepcopy(times)
+        gt.set_clock_ns(True)
+        imported = clock.import_times(times)
+        assert_times_equal(self, expected, times)  # (left intact)
+        for u, v in zip(_all_times(times), _all_times(imported)):
+            self.assertEqual(v.total, int(round(u.total * 1e9)))
+            for k, itrs in v.stamps.itrs.items():
+                self.assertEqual(itrs.typecode, 'q')
+                self.assertEqual(list(itrs), [int(round(x * 1e9)) for x in u.stamps.itrs[k]])
+        assert_times_close(self, times, clock.export_times(imported))
+
+    def test_stamp_handle(self):
+        for ns in (False, True):
+            expected, returned = _run(use_fake_clock(SEED, ns), handles=False)
+            times, handle_returned = _run(use_fake_clock(SEED, ns), handles=True)
+            assert_times_equal(self, expected, times)
+            self.assertEqual(handle_returned, returned)
+            self.assertEqual(times.stamps.itr_num['a'], 4)
+            sub, = times.subdvsn[UNASGN]  # (closed at the end of each iteration)
+            self.assertEqual(sub.stamps.itr_num['b'], 4)
+
+    def test_stamp_handle_errors(self):
+        use_fake_clock(SEED)
+        handle = gt.stamp_handle('x')
+        gt.set_def_unique(False)  # (settings resolved when made)
+        self.addCleanup(gt.set_def_unique, True)
+        handle()
+        with self.assertRaises(UniqueNameError):
+            handle()
+        gt.pause()
+        with self.assertRaises(PausedError):
+            handle()
+        gt.resume()
+        gt.stop()
+        with self.assertRaises(StoppedError):
+            handle()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+
+"""
+save_pkl / load_pkl with compression: each codec and level, to file and to
+bytes, files compressed differently in one load, and bad arguments.
+"""
+from __future__ import absolute_import
+import bz2
+import copy
+import gzip
+import io
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+
+import gtimer as gt
+from gtimer.local import compress as compress_loc
+
+from .support import use_fake_clock, restore_defaults, make_times, assert_times_equal
+
+
+if sys.version_info[0] < 3:
+    CODECS = ('zlib', )  # (bz2 and lzma require Python 3, see compress.py)
+else:
+    import lzma
+    CODECS = compress_loc.COMPRESSIONS
+
+
+def _decompress(data, compress):
+    if compress == 'zlib':
+        return gzip.GzipFile(fileobj=io.BytesIO(data), mode='rb').read()
+    if compress == 'bz2':
+        return bz2.decompress(data)
+    return lzma.decompress(data)
+
+
+class CompressTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.times = make_times(use_fake_clock())
+
+    def tearDown(self):
+        restore_defaults()
+        shutil.rmtree(self.tmp)
+
+    def path(self, name):
+        return os.path.join(self.tmp, name)
+
+    def test_round_trip(self):
+        for compress in CODECS:
+            for level in (None, 1, 9):
+                filename = self.path('{}_{}.pkl'.format(compress, level))
+                gt.save_pkl(filename, self.times, compress, level)
+                with open(filename, 'rb') as file:
+                    head = file.read(compress_loc.MAGIC_LEN)
+                self.assertEqual(compress_loc.detect(head), compress)
+                assert_times_equal(self, self.times, gt.load_pkl(filename))
+
+    def test_to_bytes(self):
+        for compress in CODECS:
+            data = gt.save_pkl(times=self.times, compress=compress)
+            self.assertEqual(compress_loc.detect(data[:compress_loc.MAGIC_LEN]), compress)
+            assert_times_equal(self, self.times,
+                               pickle.loads(_decompress(data, compress)))
+
+    def test_same_pickle(self):
+        # (Compressed or not, the same pickle: the default protocol.)
+        plain = gt.save_pkl(times=self.times)
+        for compress in CODECS:
+            data = gt.save_pkl(times=self.times, compress=compress)
+            self.assertEqual(_decompress(data, compress), plain)
+
+    def test_smaller(self):
+        plain = gt.save_pkl(times=self.times)
+        for compress in CODECS:
+            self.assertLess(len(gt.save_pkl(times=self.times, compress=compress)),
+                            len(plain))
+
+    def test_mixed_files(self):
+        fake = use_fake_clock(1)
+        others = [make_times(fake, 'b'), make_times(fake, 'c')]
+        filenames = [self.path('plain.pkl')]
+        gt.save_pkl(filenames[0], self.times)
+        for compress in CODECS:
+            filenames.append(self.path(compress + '.pkl'))
+            gt.save_pkl(filenames[-1], others, compress)
+        loaded = gt.load_pkl(filenames)
+        self.assertEqual(len(loaded), len(filenames))
+        assert_times_equal(self, self.times, loaded[0])
+        for times_list in loaded[1:]:
+            self.assertEqual(len(times_list), 2)
+            for x, y in zip(others, times_list):
+                assert_times_equal(self, x, y)
+
+    def test_load_and_merge(self):
+        fake = use_fake_clock(1)
+        times_list = [make_times(fake) for _ in range(4)]
+        filenames = list()
+        for i, times in enumerate(times_list):
+            filenames.append(self.path('{}.pkl'.format(i)))
+            compress = (None, ) + CODECS
+            gt.save_pkl(filenames[-1], times, compress[i % len(compress)])
+        expected = gt.merge_many(copy.deepcopy(times_list))
+        for processes in (1, 2):
+            assert_times_equal(self, expected,
+                               gt.load_and_merge(filenames, processes=processes))
+
+    def test_concatenated_gzip(self):
+        # (As from a tool joining gzip files: the pickle is in the first member.)
+        filename = self.path('joined.pkl')
+        gt.save_pkl(filename, self.times, 'zlib')
+        with open(filename, 'ab') as file:
+            file.write(gt.save_pkl(times=self.times, compress='zlib'))
+        assert_times_equal(self, self.times, gt.load_pkl(filename))
+
+    def test_bad_compress(self):
+        with self.assertRaises(ValueError):
+            gt.save_pkl(times=self.times, compress='zip')
+        with self.assertRaises(ValueError):
+            gt.save_pkl(self.path('bad.pkl'), self.times, compress='zip')
+        self.assertFalse(os.path.exists(self.path('bad.pkl')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+
+"""
+Event log: replay against the live result, on randomized runs, on logs cut
+off anywhere, and with the itrs and sketch defaults changed while logging.
+"""
+from __future__ import absolute_import
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import gtimer as gt
+from gtimer.private import eventlog
+from gtimer.local import itrs as itrs_loc
+
+from .support import use_fake_clock, restore_defaults, make_times, assert_times_equal
+
+
+def _random_run(fake, rand, depth=0, in_loop=False):
+    # (Stamps, subdivisions, named and anonymous loops, attachments, snapshots,
+    # and changes of the defaults, at random.)
+    for _ in range(rand.randint(1, 4)):
+        fake.tick()
+        r = rand.random()
+        if r < 0.3:
+            gt.stamp('s{}'.format(rand.randint(0, 3)), unique=False)
+        elif r < 0.45 and depth < 4:
+            gt.subdivide('sub{}'.format(rand.randint(0, 2)))
+            _random_run(fake, rand, depth + 1)
+            gt.end_subdivision()
+        elif r < 0.6 and depth < 4:
+            name = None
+            if in_loop or rand.random() < 0.5:
+                name = 'loop{}_{}'.format(depth, rand.randint(0, 10 ** 6))
+            for _ in gt.timed_for(range(rand.randint(1, 3)), name):
+                _random_run(fake, rand, depth + 1, True)
+                gt.stamp('ls{}'.format(rand.randint(0, 1)), unique=False)
+        elif r < 0.66:
+            # (Not mode 'sample', whose random draws a replay does not repeat.)
+            gt.set_def_itrs_limit(rand.choice([None, 2, 3]), 'last')
+            gt.set_def_sketch(rand.random() < 0.5, rand.choice([0.01, 0.05]))
+        elif r < 0.7:
+            gt.get_times()
+        elif r < 0.75:
+            times = gt.get_times()
+            if times.total > 0:
+                if rand.random() < 0.5:
+                    gt.attach_par_subdivision('par{}'.format(rand.randint(0, 1)), [times])
+                else:
+                    gt.attach_subdivision(times)
+        else:
+            gt.stamp('p{}'.format(rand.randint(0, 3)), unique=False)
+
+
+def _record_ends(path):
+    # (Offsets where each complete record ends.)
+    with open(path, 'rb') as file:
+        data = file.read()
+    ends = [eventlog.HEADER.size]
+    while ends[-1] < len(data):
+        _, n, _ = eventlog.RECORD.unpack_from(data, ends[-1])
+        ends.append(ends[-1] + eventlog.RECORD.size + n)
+    return data, ends
+
+
+def _time_and_die(path):
+    fake = use_fake_clock()
+    gt.start_event_log(path, buffer_size=1024)
+    for _ in gt.timed_for(range(10 ** 6)):
+        fake.tick()
+        gt.stamp('a')
+    os._exit(0)  # (never reached: killed while timing)
+
+
+class EventLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'events.log')
+
+    def tearDown(self):
+        gt.stop_event_log()
+        restore_defaults()
+        shutil.rmtree(self.tmp)
+
+    def check_replay(self, fake):
+        gt.start_event_log(self.path)
+        live = make_times(fake)
+        gt.stop_event_log()
+        assert_times_equal(self, live, gt.replay_log(self.path))
+
+    def test_replay(self):
+        self.check_replay(use_fake_clock())
+
+    def test_replay_itrs_limit_and_sketch(self):
+        fake = use_fake_clock()
+        gt.set_def_itrs_limit(2, 'last')
+        gt.set_def_sketch(True)
+        self.check_replay(fake)
+
+    def test_replay_ns_clock(self):
+        self.check_replay(use_fake_clock(ns=True))
+
+    def test_replay_random(self):
+        for seed in range(30):
+            for ns in (False, True):
+                fake = use_fake_clock(seed, ns)
+                gt.set_def_unique(False)
+                gt.start_event_log(self.path)
+                _random_run(fake, random.Random(seed))
+                fake.tick()
+                gt.stop('end')
+                gt.stop_event_log()
+                self.assertEqual(gt.report(gt.get_times(), include_itrs=True),
+                                 gt.report(gt.replay_log(self.path), include_itrs=True),
+                                 (seed, ns))
+                gt.set_def_unique(True)
+                restore_defaults()
+
+    def test_policy_changed_after_start(self):
+        fake = use_fake_clock()
+        gt.start_event_log(self.path)
+        gt.set_def_itrs_limit(3, 'last')
+        for _ in gt.timed_for(range(10)):
+            fake.tick()
+            gt.stamp('a')
+        gt.set_def_itrs_limit(None)
+        gt.set_def_sketch(True, 0.05)
+        for _ in gt.timed_for(range(10)):
+            fake.tick()
+            gt.stamp('b')
+        gt.stop()
+        gt.stop_event_log()
+        live = gt.get_times()
+        replayed = gt.replay_log(self.path)
+        assert_times_equal(self, live, replayed)
+        self.assertEqual(len(replayed.stamps.itrs['a']), 3)
+        self.assertEqual(len(replayed.stamps.itrs['b']), 10)
+        self.assertEqual(replayed.stamps.sketch['b'].rel_acc, 0.05)
+
+    def test_replay_leaves_global_policy(self):
+        fake = use_fake_clock()
+        gt.set_def_itrs_limit(3, 'last')
+        self.check_replay(fake)
+        gt.set_def_itrs_limit(None)
+        policy = dict(itrs_loc.POLICY)
+        gt.replay_log(self.path)
+        self.assertEqual(itrs_loc.POLICY, policy)
+
+    def test_cut_off(self):
+        fake = use_fake_clock()
+        gt.start_event_log(self.path)
+        make_times(fake)
+        gt.stop_event_log()
+        data, ends = _record_ends(self.path)
+        cut = os.path.join(self.tmp, 'cut.log')
+        expected = None
+        # (Through the last records: within any one, the replay is that of
+        # the log up to the record before.)
+        for end in range(ends[-20], len(data) + 1):
+            with open(cut, 'wb') as file:
+                file.write(data[:end])
+            if end in ends:
+                expected = gt.report(gt.replay_log(cut), include_itrs=True)
+            elif expected is not None:
+                self.assertEqual(gt.report(gt.replay_log(cut), include_itrs=True),
+                                 expected, end)
+
+    def test_process_died(self):
+        process = multiprocessing.Process(target=_time_and_die, args=(self.path,))
+        process.start()
+        while not os.path.exists(self.path) or os.path.getsize(self.path) < 10 ** 5:
+            process.join(0.01)
+        process.terminate()
+        process.join()
+        times = gt.replay_log(self.path)
+        self.assertGreater(times.stamps.vals_num[times.stamps.index['a']], 1000)
+        self.assertGreater(times.total, 0)
+
+    def test_not_log(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'something else entirely')
+        with self.assertRaises(ValueError):
+            gt.replay_log(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
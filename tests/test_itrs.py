@@ -0,0 +1,209 @@
+
+"""
+Bounded iteration storage: the limit in timed loops and in merges under each
+itrs policy, and the reservoir's sampling (also when merging).
+"""
+from __future__ import absolute_import, division
+from array import array
+from collections import deque
+import copy
+import pickle
+import random
+import unittest
+
+import gtimer as gt
+from gtimer.local import itrs as itrs_loc
+from gtimer.local import merge
+from gtimer.local.itrs import Reservoir, new_itrs, extend_itrs
+
+from .support import use_fake_clock, restore_defaults
+
+SEED = 3  # (runs with the same seed time the same values)
+LIMIT = 5
+
+
+def _run(n, calls=1, name='root'):
+    # (A loop, and a subdivision called repeatedly with a stamp outside of
+    # loops, which keeps itrs only through merges.)
+    fake = use_fake_clock(SEED)
+    gt.rename_root(name)
+    for _ in gt.timed_for(range(n), save_itrs=True):
+        fake.tick()
+        gt.stamp('a')
+    for _ in range(calls):
+        gt.subdivide('sub', save_itrs=True)
+        fake.tick()
+        gt.stamp('x')
+        gt.end_subdivision()
+    gt.stop('end')
+    return gt.get_times()
+
+
+def _policy(limit=None, mode='last'):
+    return {'LIMIT': limit, 'MODE': mode, 'TYPECODE': 'd'}
+
+
+class BoundedItrsTest(unittest.TestCase):
+
+    def tearDown(self):
+        restore_defaults()
+
+    def test_new_itrs(self):
+        self.assertIsInstance(new_itrs(), array)
+        self.assertEqual(new_itrs(policy=dict(_policy(), TYPECODE='q')).typecode, 'q')
+        itrs = new_itrs(range(10), _policy(LIMIT))
+        self.assertEqual((type(itrs), itrs.maxlen, list(itrs)), (deque, LIMIT, [5, 6, 7, 8, 9]))
+        itrs = new_itrs(range(10), _policy(LIMIT, 'sample'))
+        self.assertEqual((type(itrs), itrs.limit, itrs.seen), (Reservoir, LIMIT, 10))
+        self.assertEqual(len(itrs), LIMIT)
+
+    def test_loop_limit(self):
+        full = _run(20, calls=8)
+        gt.set_def_itrs_limit(LIMIT, 'last')
+        last = _run(20, calls=8)
+        gt.set_def_itrs_limit(LIMIT, 'sample')
+        sample = _run(20, calls=8)
+        for name, n in (('a', 20), ('x', 8)):
+            stamps = last.stamps if name == 'a' else last.subdvsn['end'][0].stamps
+            values = list(full.stamps.itrs[name] if name == 'a' else
+                          full.subdvsn['end'][0].stamps.itrs[name])
+            self.assertEqual(len(values), n)
+            self.assertEqual(list(stamps.itrs[name]), values[-LIMIT:])
+            self.assertEqual(stamps.itrs[name].maxlen, LIMIT)
+            self.assertEqual(stamps.itr_num[name], n)  # (exact regardless)
+            self.assertEqual(stamps.itr_max[name], max(values))
+            stamps = sample.stamps if name == 'a' else sample.subdvsn['end'][0].stamps
+            itrs = stamps.itrs[name]
+            self.assertIsInstance(itrs, Reservoir)
+            self.assertEqual((len(itrs), itrs.seen), (LIMIT, n))
+            self.assertTrue(set(itrs) <= set(values))
+            self.assertEqual(stamps.itr_min[name], min(values))
+
+    def test_merge_policies(self):
+        # (Merged containers keep their kind; those made in the merge, from
+        # stamps outside of loops, follow the policy given.)
+        for mode in itrs_loc.MODES:
+            gt.set_def_itrs_limit(LIMIT, mode)
+            a, b = _run(4, name='run'), _run(7, name='run')
+            expected_a = list(a.stamps.itrs['a']) + list(b.stamps.itrs['a'])
+            merge.merge_times(a, b, _policy(2, 'last'))
+            itrs = a.stamps.itrs['a']
+            self.assertEqual(a.stamps.itr_num['a'], 11)
+            if mode == 'last':
+                self.assertEqual(list(itrs), expected_a[-LIMIT:])
+            else:
+                self.assertEqual((len(itrs), itrs.seen), (LIMIT, 11))
+            self.assertEqual(list(a.stamps.itrs['end']), [a.stamps.cum['end'] - b.stamps.cum['end'],
+                                                          b.stamps.cum['end']])
+            self.assertEqual(a.stamps.itrs['end'].maxlen, 2)
+        restore_defaults()
+        a, b = _run(4, name='run'), _run(7, name='run')
+        merge.merge_times(a, b)  # (default: the global policy, unbounded)
+        self.assertIsInstance(a.stamps.itrs['a'], array)
+        self.assertEqual(len(a.stamps.itrs['a']), 11)
+        self.assertIsInstance(a.stamps.itrs['end'], array)
+
+    def test_merge_counts(self):
+        # (Unbounded, as many values as iterations, however merged: loops of
+        # one iteration, and stamps outside of loops, once or merged before.)
+        for n_a, n_b, pre_a, pre_b in ((1, 3, 0, 0), (3, 1, 0, 0), (1, 1, 0, 0),
+                                       (2, 2, 0, 1), (2, 2, 1, 0), (1, 2, 1, 1)):
+            a, b = _run(n_a, name='run'), _run(n_b, name='run')
+            for times, pre in ((a, pre_a), (b, pre_b)):
+                for _ in range(pre):
+                    merge.merge_times(times, _run(1, name='run'))
+            merge.merge_times(a, b)
+            for s in ('a', 'end'):
+                self.assertEqual(len(a.stamps.itrs[s]), a.stamps.itr_num[s],
+                                 (s, n_a, n_b, pre_a, pre_b))
+            self.assertEqual(a.stamps.itr_num['a'], n_a + n_b + pre_a + pre_b)
+
+    def test_merge_many_sample(self):
+        gt.set_def_itrs_limit(LIMIT, 'sample')
+        runs = [_run(n, name='run') for n in (3, 1, 20, 6)]
+        values = set()
+        for run in runs:
+            values.update(run.stamps.itrs['a'])
+        merged = gt.merge_many(runs)
+        itrs = merged.stamps.itrs['a']
+        self.assertEqual((len(itrs), itrs.seen, itrs.limit), (LIMIT, 30, LIMIT))
+        self.assertTrue(set(itrs) <= values)
+
+    def test_extend_itrs(self):
+        itrs = extend_itrs(array('d', [1.]), deque([2., 3.], maxlen=2))
+        self.assertEqual(itrs, array('d', [1., 2., 3.]))
+        itrs = extend_itrs(deque([1, 2], maxlen=3), [3, 4])
+        self.assertEqual((list(itrs), itrs.maxlen), ([2, 3, 4], 3))
+        itrs = extend_itrs(Reservoir(3), [1, 2])
+        self.assertEqual((sorted(itrs), itrs.seen), ([1, 2], 2))
+
+
+class ReservoirTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = random.getstate()
+        random.seed(0)
+
+    def tearDown(self):
+        random.setstate(self.state)
+
+    def test_append(self):
+        reservoir = Reservoir(LIMIT)
+        for i in range(3):
+            reservoir.append(i)
+        self.assertEqual((list(reservoir), reservoir.seen), ([0, 1, 2], 3))
+        for i in range(3, 100):
+            reservoir.append(i)
+        self.assertEqual((len(reservoir), reservoir.seen), (LIMIT, 100))
+        self.assertEqual(len(set(reservoir)), LIMIT)
+
+    def test_uniform(self):
+        # (Each of 50 values is kept with probability 10 / 50.)
+        trials, counts = 4000, [0] * 50
+        for _ in range(trials):
+            reservoir = Reservoir(10)
+            for i in range(50):
+                reservoir.append(i)
+            for i in reservoir:
+                counts[i] += 1
+        expected = trials * 10 / 50
+        for count in counts:
+            self.assertLess(abs(count - expected), 5 * expected ** 0.5)
+
+    def test_merge(self):
+        # (Size and seen after merging, and the share of each side follows
+        # how many values each has seen.)
+        trials, from_right = 2000, 0
+        for _ in range(trials):
+            left, right = Reservoir(10), Reservoir(10)
+            for i in range(100):
+                left.append(('l', i))
+            for i in range(300):
+                right.append(('r', i))
+            left += right
+            self.assertEqual((len(left), left.seen, left.limit), (10, 400, 10))
+            self.assertEqual(len(set(left)), 10)
+            from_right += sum(1 for side, _ in left if side == 'r')
+        self.assertAlmostEqual(from_right / (10 * trials), 0.75, delta=0.02)
+
+    def test_merge_small(self):
+        left, right = Reservoir(10), Reservoir(10)
+        for i in range(3):
+            left.append(i)
+            right.append(10 + i)
+        left += right
+        self.assertEqual((sorted(left), left.seen), ([0, 1, 2, 10, 11, 12], 6))
+
+    def test_copies(self):
+        reservoir = Reservoir(LIMIT)
+        for i in range(20):
+            reservoir.append(i)
+        for other in (pickle.loads(pickle.dumps(reservoir)), copy.copy(reservoir),
+                      copy.deepcopy(reservoir)):
+            self.assertIsInstance(other, Reservoir)
+            self.assertEqual((list(other), other.limit, other.seen),
+                             (list(reservoir), LIMIT, 20))
+
+
+if __name__ == '__main__':
+    unittest.main()
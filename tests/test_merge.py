@@ -0,0 +1,169 @@
+
+"""
+Merging many times at once: merge_all(), merge_many(), and load_and_merge()
+(also of pickles from older versions) against merging one by one.
+"""
+from __future__ import absolute_import
+import copy
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+try:
+    from copyreg import _reconstructor
+except ImportError:  # (Python 2)
+    from copy_reg import _reconstructor
+
+import gtimer as gt
+from gtimer.local import itrs as itrs_loc
+from gtimer.local import merge
+from gtimer.local.times import Times, Stamps
+
+from .support import use_fake_clock, restore_defaults, make_times, assert_times_close
+
+
+def _run(seed, name='root'):
+    # (Stamps and subdivisions which vary from run to run, so merging adds
+    # them at new positions.)
+    if seed % 3 == 0:
+        return make_times(use_fake_clock(seed), name)
+    fake = use_fake_clock(seed)
+    rand = random.Random(seed)
+    gt.rename_root(name)
+    for _ in gt.timed_for(range(rand.randint(1, 4)), save_itrs=True):
+        fake.tick()
+        gt.stamp('first')
+        if rand.random() < 0.5:
+            fake.tick()
+            gt.stamp('b{}'.format(rand.randint(0, 2)))
+        gt.subdivide('s{}'.format(rand.randint(0, 2)), save_itrs=True)
+        fake.tick()
+        gt.stamp('x')
+        gt.end_subdivision()
+    fake.tick()
+    gt.stamp('c{}'.format(seed % 4))
+    gt.stop()
+    return gt.get_times()
+
+
+def _fold(times_list):
+    # (One by one into the first, with the itrs policy of merge_many().)
+    itrs_policy = dict(itrs_loc.POLICY, TYPECODE='d')
+    rcvr = times_list[0]
+    for times in times_list[1:]:
+        merge.merge_times(rcvr, times, itrs_policy)
+    return rcvr
+
+
+class _Old(object):
+    """ Pickles as a Times or Stamps of older versions: the instance dict,
+    Stamps values in dicts by name, no m2 or sketches."""
+
+    def __init__(self, cls, state):
+        self.cls = cls
+        self.state = state
+
+    def __reduce_ex__(self, protocol):
+        # (As pickled by protocols 0 and 1.)
+        return (_reconstructor, (self.cls, object, None), self.state)
+
+
+def _old(times, parent=None):
+    s = times.stamps
+    stamps = dict(order=list(s.order),
+                  cum=dict(s.cum),
+                  itr_num=dict(s.itr_num),
+                  itr_max=dict(s.itr_max),
+                  itr_min=dict(s.itr_min),
+                  itrs=dict((k, list(v)) for k, v in s.itrs.items()))
+    old = _Old(Times, None)
+    old.state = dict(name=times.name, parent=parent, pos_in_parent=times.pos_in_parent,
+                     save_itrs=times.save_itrs, stamps=_Old(Stamps, stamps),
+                     total=times.total, stamps_sum=times.stamps_sum,
+                     self_agg=times.self_agg, par_in_parent=times.par_in_parent)
+    old.state['subdvsn'] = dict((pos, [_old(sub, old) for sub in sub_list])
+                                for pos, sub_list in times.subdvsn.items())
+    old.state['par_subdvsn'] = dict(
+        (pos, dict((par_name, [_old(sub, old) for sub in par_list])
+                   for par_name, par_list in par_dict.items()))
+        for pos, par_dict in times.par_subdvsn.items())
+    return old
+
+
+class MergeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+        restore_defaults()
+
+    def save(self, times_list, old=False):
+        # (One file each, and the last two in one file as a list.)
+        filenames = list()
+        for i, times in enumerate(times_list[:-2] + [times_list[-2:]]):
+            filenames.append(os.path.join(self.tmp, '{}.pkl'.format(i)))
+            if old:
+                with open(filenames[-1], 'wb') as file:
+                    if isinstance(times, list):
+                        pickle.dump([_old(t) for t in times], file)
+                    else:
+                        pickle.dump(_old(times), file)
+            else:
+                gt.save_pkl(filenames[-1], times)
+        return filenames
+
+    def test_merge_all(self):
+        for n in (1, 2, 3, 5, 8):
+            runs = [_run(seed) for seed in range(n)]
+            folded = _fold(copy.deepcopy(runs))
+            merged = merge.merge_all(runs, dict(itrs_loc.POLICY, TYPECODE='d'))
+            self.assertIs(merged, runs[0])
+            assert_times_close(self, folded, merged)
+
+    def test_merge_many(self):
+        runs = [_run(seed) for seed in range(7)]
+        assert_times_close(self, _fold(copy.deepcopy(runs)), gt.merge_many(runs))
+        names = ['a', 'b', 'a', 'c', 'b', 'a', 'a']
+        runs = [_run(seed, name) for seed, name in enumerate(names)]
+        groups = [[copy.deepcopy(t) for t in runs if t.name == name] for name in 'abc']
+        merged = gt.merge_many(runs, 'par')
+        self.assertEqual([t.name for t in merged], ['a', 'b', 'c'])
+        for group, times in zip(groups, merged):
+            assert_times_close(self, _fold(group), times)
+
+    def test_load_and_merge(self):
+        runs = [_run(seed, 'ab'[seed % 2]) for seed in range(7)]
+        filenames = self.save(runs)
+        folded = _fold(copy.deepcopy(runs))
+        groups = [_fold(copy.deepcopy([t for t in runs if t.name == name])) for name in 'ab']
+        for processes in (1, 2, 3, 8):
+            assert_times_close(self, folded, gt.load_and_merge(filenames, processes=processes))
+            merged = gt.load_and_merge(filenames, 'par', processes)
+            self.assertEqual([t.name for t in merged], ['a', 'b'])
+            for group, times in zip(groups, merged):
+                assert_times_close(self, group, times)
+
+    def test_old_pickles(self):
+        # (Variance recovered from the iterations saved.)
+        runs = [_run(seed) for seed in range(5)]
+        filenames = self.save(runs, old=True)
+        loaded = list()
+        for name in filenames:
+            times = gt.load_pkl(name)
+            loaded += times if isinstance(times, list) else [times]
+        for run, times in zip(runs, loaded):
+            self.assertIsInstance(times, Times)
+            self.assertEqual(times.bias_agg, 0)
+            self.assertEqual(times.stamps.sketch, {})
+            assert_times_close(self, run, times)
+        folded = _fold(copy.deepcopy(runs))
+        for processes in (1, 2):
+            assert_times_close(self, folded, gt.load_and_merge(filenames, processes=processes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+
+"""
+Copy-on-write sharing: snapshots from get_times() share closed subdivisions
+with the running timer, and merges share those of the times merged in;
+writing to either side never alters the other.
+"""
+from __future__ import absolute_import
+import copy
+import unittest
+
+import gtimer as gt
+from gtimer.local import merge
+from gtimer.local.times import Times, iter_subdivisions
+from gtimer.private import focus
+
+from .support import use_fake_clock, restore_defaults, assert_times_equal
+
+N = 3  # (calls of the repeated subdivision)
+
+
+def _workers(fake, n):
+    workers = list()
+    for i in range(n):
+        gt.reset_root()
+        gt.rename_root('w{}'.format(i))
+        fake.tick()
+        gt.stamp('w')
+        gt.stop()
+        workers.append(gt.get_times())
+    gt.reset_root()
+    return workers
+
+
+def _run(fake, snapshot=lambda: None):
+    # (Closed subdivisions, plain and parallel, written to again after each
+    # snapshot: taken at the root, and inside an open subdivision.)
+    workers = [_workers(fake, 2) for _ in range(N)]
+    gt.rename_root('run')
+    for i in range(N):
+        gt.subdivide('sub', save_itrs=True)
+        for _ in gt.timed_for(range(2), save_itrs=True):
+            fake.tick()
+            gt.stamp('s')
+        gt.subdivide('inner')
+        fake.tick()
+        gt.stamp('i')
+        gt.end_subdivision()
+        snapshot()
+        fake.tick()
+        gt.stamp('t')
+        gt.end_subdivision()
+        gt.attach_par_subdivision('workers', workers[i])
+        fake.tick()
+        gt.stamp('a', unique=False)
+        snapshot()
+    gt.stop()
+    return gt.get_times()
+
+
+def _all_times(times):
+    yield times
+    for sub in iter_subdivisions(times):
+        for t in _all_times(sub):
+            yield t
+
+
+class ShareTest(unittest.TestCase):
+
+    def tearDown(self):
+        restore_defaults()
+
+    def test_timer_unaffected(self):
+        # (Writing to snapshots, also merging into them, leaves the run as it
+        # is without them.)
+        def snapshot():
+            snap = gt.get_times()
+            snap.stamps.vals_cum[:] = [-1] * len(snap.stamps.vals_cum)
+            gt.merge_many([snap, copy.deepcopy(snap)])
+
+        for ns in (False, True):
+            reference = _run(use_fake_clock(ns=ns))
+            assert_times_equal(self, reference, _run(use_fake_clock(ns=ns), snapshot))
+
+    def test_snapshot_unaffected(self):
+        # (Writes by the running timer, later on, do not show in snapshots.)
+        for ns in (False, True):
+            snaps = list()
+
+            def snapshot():
+                snap = gt.get_times()
+                live = set(id(t) for t in _all_times(focus.get_focus().root.times))
+                shared = [t for t in _all_times(snap) if id(t) in live]
+                if ns:  # (scaled to seconds, so copied)
+                    self.assertEqual(shared, [])
+                elif snaps:  # (the first has nothing closed before)
+                    self.assertNotEqual(shared, [])
+                snaps.append((snap, copy.deepcopy(snap)))
+
+            _run(use_fake_clock(ns=ns), snapshot)
+            self.assertEqual(len(snaps), 2 * N)
+            for snap, expected in snaps:
+                assert_times_equal(self, snap, expected)
+            if ns:
+                for snap, _ in snaps:
+                    for times in _all_times(snap):
+                        for sub in iter_subdivisions(times):
+                            self.assertIs(sub.parent, times)
+
+    def test_merged_receiver(self):
+        # (A receiver holding shared subdivisions of the times merged in
+        # copies them before writing.)
+        checks = list()
+
+        def snapshot():
+            snap = gt.get_times()
+            if 'a' not in snap.subdvsn:
+                return
+            source, = snap.subdvsn['a']
+            self.assertTrue(source.shared)
+            expected = copy.deepcopy(source)
+            rcvr = Times('sub')
+            merge.merge_times(rcvr, source)
+            self.assertIs(rcvr.subdvsn['t'][0], source.subdvsn['t'][0])  # (adopted)
+            for _ in range(2):
+                merge.merge_times(rcvr, copy.deepcopy(expected))
+            num = source.subdvsn['t'][0].stamps.itr_num['i']
+            self.assertEqual(rcvr.subdvsn['t'][0].stamps.itr_num['i'], 3 * num)
+            assert_times_equal(self, source, expected)
+            checks.append(rcvr)
+
+        reference = _run(use_fake_clock())
+        assert_times_equal(self, reference, _run(use_fake_clock(), snapshot))
+        self.assertEqual(len(checks), 2 * N - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
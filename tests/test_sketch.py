@@ -0,0 +1,105 @@
+
+"""
+Quantile sketches: quantiles within the relative accuracy of the exact ones,
+merging exactly, in timed loops and merged times.
+"""
+from __future__ import absolute_import, division
+import random
+import unittest
+
+import gtimer as gt
+from gtimer.local.sketch import Sketch
+
+from .support import use_fake_clock, restore_defaults
+
+QS = (0., 0.01, 0.25, 0.5, 0.9, 0.99, 1.)
+
+
+def _exact(values, q):
+    # (The value at the rank the sketch uses.)
+    return sorted(values)[int(q * (len(values) - 1))]
+
+
+def _run(ns=False, seed=0, n=300):
+    fake = use_fake_clock(seed, ns)
+    gt.rename_root('run')
+    for _ in gt.timed_for(range(n), save_itrs=True):
+        for _ in range(fake.rand.randint(1, 20)):  # (spread out the values)
+            fake.tick()
+        gt.stamp('a')
+    gt.stop()
+    return gt.get_times()
+
+
+class SketchTest(unittest.TestCase):
+
+    def tearDown(self):
+        restore_defaults()
+
+    def check_quantiles(self, sketch, values):
+        for q in QS:
+            exact = _exact(values, q)
+            self.assertLessEqual(abs(sketch.quantile(q) - exact),
+                                 sketch.rel_acc * exact * (1 + 1e-9), (q, exact))
+
+    def test_quantiles(self):
+        rand = random.Random(0)
+        values = [rand.lognormvariate(-7, 1.5) for _ in range(10000)]
+        for rel_acc in (0.01, 0.05):
+            sketch = Sketch(rel_acc)
+            for value in values:
+                sketch.add(value)
+            self.assertEqual(sketch.count, len(values))
+            self.check_quantiles(sketch, values)
+
+    def test_zeros_and_empty(self):
+        self.assertEqual(Sketch().quantile(0.5), 0.)
+        sketch = Sketch()
+        values = [0.] * 30 + [1e-3 * i for i in range(1, 71)]
+        for value in values:
+            sketch.add(value)
+        self.assertEqual((sketch.zeros, sketch.count), (30, 100))
+        self.check_quantiles(sketch, values)
+
+    def test_unit(self):
+        # (Nanosecond values, quantiles in seconds.)
+        rand = random.Random(1)
+        values = [rand.randint(1, 10 ** 7) for _ in range(1000)]
+        sketch = Sketch(0.01, 1e-9)
+        for value in values:
+            sketch.add(value)
+        self.check_quantiles(sketch, [v / 1e9 for v in values])
+
+    def test_merge(self):
+        rand = random.Random(2)
+        parts = [[rand.expovariate(1e3) for _ in range(n)] for n in (1, 500, 2000)]
+        whole, merged = Sketch(), Sketch()
+        for part in parts:
+            sketch = Sketch()
+            for value in part:
+                sketch.add(value)
+                whole.add(value)
+            merged.merge(sketch)
+        self.assertEqual((merged.buckets, merged.zeros, merged.count),
+                         (whole.buckets, whole.zeros, whole.count))
+        self.check_quantiles(merged, [v for part in parts for v in part])
+        with self.assertRaises(ValueError):
+            merged.merge(Sketch(0.05))
+
+    def test_loops_and_merges(self):
+        for ns in (False, True):
+            gt.set_def_sketch(True, 0.02)
+            runs = [_run(ns, seed) for seed in range(3)]
+            values = list()
+            for run in runs:
+                sketch, itrs = run.stamps.sketch['a'], list(run.stamps.itrs['a'])
+                self.assertEqual((sketch.rel_acc, sketch.count), (0.02, len(itrs)))
+                self.check_quantiles(sketch, itrs)
+                values += itrs
+            merged = gt.merge_many(runs)
+            self.assertEqual(merged.stamps.sketch['a'].count, len(values))
+            self.check_quantiles(merged.stamps.sketch['a'], values)
+
+
+if __name__ == '__main__':
+    unittest.main()
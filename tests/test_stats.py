@@ -0,0 +1,188 @@
+
+"""
+Running iteration statistics (num, max, min, m2, kept as loops go and
+combined when merging) against the same computed from all the values.
+"""
+from __future__ import absolute_import, division
+from collections import defaultdict
+import unittest
+
+import gtimer as gt
+from gtimer.private import clock
+
+from .support import use_fake_clock, restore_defaults
+
+
+class Expected(object):
+    """ Iteration values of each stamp, recorded as the timed code sees them
+    (each stamp one tick of the fake clock after the last)."""
+
+    def __init__(self, fake):
+        self.fake = fake
+        self.vals = defaultdict(list)
+        self.itr = None
+
+    def start_itr(self):
+        self.itr = dict()
+        self.itr_start = self.fake()
+
+    def stamp(self, name):
+        before = self.fake()
+        self.fake.tick()
+        gt.stamp(name, unique=False)
+        elapsed = self.fake() - before
+        self.itr[name] = self.itr[name] + elapsed if name in self.itr else elapsed
+
+    def end_itr(self, loop_name=None):
+        for name, val in self.itr.items():
+            self.vals[name].append(val)
+        if loop_name is not None:
+            self.vals[loop_name].append(self.fake() - self.itr_start)
+
+
+def _sub(times, name):
+    for sub_list in times.subdvsn.values():
+        for sub in sub_list:
+            if sub.name == name:
+                return sub
+    raise KeyError(name)
+
+
+class StatsTest(unittest.TestCase):
+
+    def tearDown(self):
+        restore_defaults()
+
+    def check(self, stamps, name, vals):
+        vals = [clock.to_sec(v) for v in vals]  # (as exported)
+        num = stamps.itr_num[name]
+        self.assertEqual(num, len(vals), name)
+        if not vals:  # (registered, never used)
+            self.assertEqual((stamps.itr_max[name], stamps.itr_min[name],
+                              stamps.itr_m2[name]), (0, 0, 0), name)
+            return
+        self.assertEqual(stamps.itr_max[name], max(vals), name)
+        self.assertEqual(stamps.itr_min[name], min(vals), name)
+        mean = sum(vals) / len(vals)
+        m2 = sum((v - mean) ** 2 for v in vals)
+        self.assertAlmostEqual(stamps.cum[name] / sum(vals), 1, places=9, msg=name)
+        self.assertAlmostEqual(stamps.itr_m2[name], m2, delta=1e-9 * (m2 + mean * mean))
+
+    def modes(self):
+        for ns in (False, True):
+            for save_itrs in (True, False):
+                yield use_fake_clock(ns=ns), save_itrs
+
+    def test_loop(self):
+        for fake, save_itrs in self.modes():
+            expected = Expected(fake)
+            for i in gt.timed_for(range(8), rgstr_stamps=['b', 'never'],
+                                  save_itrs=save_itrs):
+                expected.start_itr()
+                expected.stamp('a')
+                if i % 3:
+                    expected.stamp('b')
+                expected.stamp('c')
+                expected.stamp('c')
+                expected.end_itr()
+            gt.stop()
+            stamps = gt.get_times().stamps
+            for name in ('a', 'b', 'c', 'never'):
+                self.check(stamps, name, expected.vals[name])
+
+    def test_named_loop(self):
+        for fake, save_itrs in self.modes():
+            expected = Expected(fake)
+            for i in gt.timed_for(range(5), 'outer', rgstr_stamps=['y'],
+                                  save_itrs=save_itrs):
+                expected.start_itr()
+                expected.stamp('x')
+                if i % 2:
+                    expected.stamp('y')
+                expected.end_itr('outer')
+            gt.stop()
+            times = gt.get_times()
+            self.check(times.stamps, 'outer', expected.vals['outer'])
+            for name in ('x', 'y'):
+                self.check(_sub(times, 'outer').stamps, name, expected.vals[name])
+
+    def test_repeated_subdivision(self):
+        for fake, save_itrs in self.modes():
+            expected, inner = Expected(fake), Expected(fake)
+
+            @gt.wrap
+            def func(n):
+                for i in gt.timed_for(range(n), rgstr_stamps=['opt'], save_itrs=save_itrs):
+                    expected.start_itr()
+                    expected.stamp('a')
+                    if (i + n) % 2:
+                        expected.stamp('opt')
+                    expected.end_itr()
+                for _ in gt.timed_for(range(n), 'inner', save_itrs=save_itrs):
+                    inner.start_itr()
+                    inner.stamp('z')
+                    inner.end_itr('inner')
+
+            for n in (1, 4, 2, 3):
+                func(n)
+            gt.stamp('after')
+            func_times = _sub(gt.get_times(), 'func')
+            for name in ('a', 'opt'):
+                self.check(func_times.stamps, name, expected.vals[name])
+            self.check(func_times.stamps, 'inner', inner.vals['inner'])
+            self.check(_sub(func_times, 'inner').stamps, 'z', inner.vals['z'])
+
+    def test_merged_runs(self):
+        # (Runs of one, none, and several iterations with the registered
+        # stamp, merged in a balanced reduction and one into another.)
+        for fake, save_itrs in self.modes():
+            expected = Expected(fake)
+            runs = list()
+            for n, use in ((1, True), (6, False), (5, True), (2, True), (3, False)):
+                gt.reset_root()
+                gt.rename_root('run')
+                for i in gt.timed_for(range(n), rgstr_stamps=['opt'], save_itrs=save_itrs):
+                    expected.start_itr()
+                    expected.stamp('a')
+                    if use and i % 2 == 0:
+                        expected.stamp('opt')
+                    expected.end_itr()
+                gt.stop()
+                runs.append(gt.get_times())
+            gt.reset_root()
+            for times in runs:
+                gt.attach_subdivision(times)
+            gt.stamp('runs')
+            merged_in_root = _sub(gt.get_times(), 'run').stamps
+            for stamps in (gt.merge_many(runs).stamps, merged_in_root):
+                for name in ('a', 'opt'):
+                    self.check(stamps, name, expected.vals[name])
+
+    def test_unused_in_some_calls(self):
+        # (A repeated subdivision with a registered stamp used in none of the
+        # iterations of some calls: those do not count toward max or min.)
+        for save_itrs in (True, False):
+            for used in ([False, True, True], [True, False, True], [True, True, False]):
+                fake = use_fake_clock()
+                expected = Expected(fake)
+
+                @gt.wrap
+                def func(use):
+                    for _ in gt.timed_for(range(2), rgstr_stamps=['opt'],
+                                          save_itrs=save_itrs):
+                        expected.start_itr()
+                        expected.stamp('a')
+                        if use:
+                            expected.stamp('opt')
+                        expected.end_itr()
+
+                for use in used:
+                    func(use)
+                gt.stamp('after')
+                stamps = _sub(gt.get_times(), 'func').stamps
+                for name in ('a', 'opt'):
+                    self.check(stamps, name, expected.vals[name])
+
+
+if __name__ == '__main__':
+    unittest.main()
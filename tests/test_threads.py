@@ -0,0 +1,164 @@
+
+"""
+Threads: each times into its own hierarchy, and join_thread_times() attaches
+those of finished threads as a parallel subdivision (closing a root left
+running as of the thread's exit).
+"""
+from __future__ import absolute_import
+import gc
+import threading
+import unittest
+import weakref
+
+import gtimer as gt
+from gtimer.private import clock
+from gtimer.private import focus
+
+from .support import use_fake_clock, restore_defaults
+
+
+class ThreadsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = use_fake_clock(ns=True)  # (exact sums)
+        self.totals = dict()  # thread name --> time it spent timing
+
+    def tearDown(self):
+        gt.join_thread_times('leftover')  # (drop any not joined)
+        restore_defaults()
+
+    def work(self, end='stop'):
+        # (Run in a thread: a subdivision, a stamp, then stop, pause, or
+        # neither before exiting.)
+        start = self.fake()
+        gt.subdivide('work')
+        for name in ('a', 'b'):
+            self.fake.tick()
+            gt.stamp(name)
+        gt.end_subdivision()
+        self.fake.tick()
+        gt.stamp('worked')
+        if end == 'stop':
+            gt.stop()
+        elif end == 'pause':
+            gt.pause()
+        self.totals[threading.current_thread().name] = clock.to_sec(self.fake() - start)
+
+    def run_thread(self, name, target=None, args=()):
+        # (One at a time, for the fake clock.)
+        thread = threading.Thread(target=target or self.work, args=args, name=name)
+        thread.start()
+        thread.join()
+        return thread
+
+    def check_thread_times(self, times, par_name):
+        self.assertEqual(times.par_in_parent, par_name)
+        self.assertEqual(times.stamps.order, ['worked'])
+        self.assertEqual(times.total, self.totals[times.name])
+        self.assertEqual(times.stamps_sum, times.total)
+        work = times.subdvsn['worked'][0]
+        self.assertEqual(work.name, 'work')
+        self.assertIs(work.parent, times)
+        self.assertEqual(work.stamps.order, ['a', 'b'])
+        self.assertEqual(work.total, work.stamps_sum)
+        self.assertEqual(times.stamps.cum['worked'], times.total)
+
+    def test_join(self):
+        gt.subdivide('master')  # (open in this thread meanwhile)
+        threads = [self.run_thread('w{}'.format(i)) for i in range(3)]
+        gt.end_subdivision()
+        self.assertEqual(sorted(gt.join_thread_times('threads', threads)),
+                         ['w0', 'w1', 'w2'])
+        self.fake.tick()
+        gt.stop('joined')
+        times = gt.get_times()
+        self.assertEqual(times.stamps.order, ['joined'])
+        self.assertEqual(list(times.par_subdvsn), ['joined'])
+        par_list = times.par_subdvsn['joined']['threads']
+        self.assertEqual(sorted(t.name for t in par_list), ['w0', 'w1', 'w2'])
+        for thread_times in par_list:
+            self.assertIs(thread_times.parent, times)
+            self.check_thread_times(thread_times, 'threads')
+        self.assertEqual([t.name for t in times.subdvsn['joined']], ['master'])
+        self.assertEqual(times.subdvsn['joined'][0].stamps.order, [])
+
+    def test_root_closed_at_exit(self):
+        # (Not stopped, or paused, by the thread: the time after it exited,
+        # until joined, is left out.)
+        threads = [self.run_thread('running', args=('none', )),
+                   self.run_thread('paused', args=('pause', ))]
+        for _ in range(10):
+            self.fake.tick()
+        self.assertEqual(sorted(gt.join_thread_times('threads', threads)),
+                         ['paused', 'running'])
+        gt.stamp('joined')
+        for thread_times in gt.get_times().par_subdvsn['joined']['threads']:
+            self.check_thread_times(thread_times, 'threads')
+
+    def test_join_some(self):
+        threads = [self.run_thread('w{}'.format(i)) for i in range(3)]
+        idle = self.run_thread('idle', target=gt.reset_root)  # (times nothing)
+        self.assertEqual(gt.join_thread_times('first', threads[:1]), ['w0'])
+        gt.stamp('one')
+        self.assertEqual(sorted(gt.join_thread_times('rest')), ['w1', 'w2'])
+        self.assertEqual(gt.join_thread_times('again', threads + [idle]), [])
+        gt.stamp('two')
+        times = gt.get_times()
+        self.assertEqual([t.name for t in times.par_subdvsn['one']['first']], ['w0'])
+        self.assertEqual(sorted(t.name for t in times.par_subdvsn['two']['rest']),
+                         ['w1', 'w2'])
+
+    def test_focus_released(self):
+        refs = list()
+
+        def work():
+            refs.append(weakref.ref(focus.get_focus()))
+            self.work()
+
+        joined = self.run_thread('joined', work)
+        self.run_thread('dropped', work)  # (never joined, thread not kept)
+        gt.join_thread_times('threads', [joined])
+        gc.collect()
+        self.assertEqual([ref() for ref in refs], [None, None])
+        self.assertEqual(len(focus._threads), 0)
+
+    def test_concurrent(self):
+        # (The real clock, threads stamping at the same time.)
+        restore_defaults()
+        num_itrs = 300
+        go = threading.Event()
+
+        def work():
+            go.wait()
+            for _ in gt.timed_for(range(num_itrs)):
+                gt.stamp('a')
+                gt.subdivide('inner')
+                gt.stamp('b')
+                gt.end_subdivision()
+                gt.stamp('c')
+            gt.stop('done')
+
+        threads = [threading.Thread(target=work, name='w{}'.format(i)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        go.set()
+        gt.stamp('started')
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(gt.join_thread_times('threads', threads)), 4)
+        gt.stamp('joined')
+        times = gt.get_times()
+        self.assertEqual(times.stamps.order, ['started', 'joined'])
+        for thread_times in times.par_subdvsn['joined']['threads']:
+            stamps = thread_times.stamps
+            self.assertEqual(stamps.order, ['a', 'c', 'done'])
+            self.assertEqual((stamps.itr_num['a'], stamps.itr_num['c']),
+                             (num_itrs, num_itrs))
+            inner = thread_times.subdvsn['c'][0]
+            self.assertEqual(inner.name, 'inner')
+            self.assertEqual(inner.stamps.itr_num['b'], num_itrs)
+            self.assertLessEqual(inner.total, thread_times.total)
+
+
+if __name__ == '__main__':
+    unittest.main()
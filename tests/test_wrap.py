@@ -0,0 +1,123 @@
+
+"""
+wrap() of generator, coroutine, and async generator functions: every
+resumption is timed into the same subdivision, time suspended is left out.
+"""
+from __future__ import absolute_import
+import sys
+import unittest
+
+import gtimer as gt
+from gtimer.private import clock
+from gtimer.private import focus
+
+from .support import use_fake_clock, restore_defaults, tick
+
+if sys.version_info >= (3, 6):
+    from . import support_async as aio
+
+
+def gen(fake, spent, n):
+    for i in range(n):
+        tick(fake, spent)
+        gt.stamp('step')
+        yield i
+    tick(fake, spent)
+    gt.stamp('end')
+
+
+def echo(fake, spent):
+    # (Sent values come back doubled; thrown ValueErrors are caught.)
+    sent = None
+    while True:
+        try:
+            sent = yield None if sent is None else 2 * sent
+        except ValueError:
+            tick(fake, spent)
+            gt.stamp('caught')
+            sent = None
+
+
+def _drive(awaitable, fake):
+    # (Run to completion, the clock moving while it is suspended.)
+    steps = awaitable.__await__() if hasattr(awaitable, '__await__') else awaitable
+    while True:
+        try:
+            steps.send(None)
+        except StopIteration as stop:
+            return stop.value
+        fake.tick()
+
+
+@unittest.skipIf(sys.version_info < (3, 6), "resumable wrap requires Python 3.6+")
+class WrapResumableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = use_fake_clock(ns=True)  # (exact sums)
+        self.spent = list()
+
+    def tearDown(self):
+        restore_defaults()
+
+    def check(self, name, stamps):
+        # (stamps: name --> number of resumptions stamping it.)
+        self.fake.tick()
+        gt.stop('after')
+        times = gt.get_times()
+        self.assertEqual(times.stamps.cum['after'], clock.to_sec(self.fake()))
+        sub, = times.subdvsn['after']
+        self.assertEqual(sub.name, name)
+        self.assertIs(sub.parent, times)
+        self.assertEqual(sub.total, clock.to_sec(sum(self.spent)))
+        self.assertEqual(sub.stamps_sum, sub.total)
+        self.assertEqual(dict((s, sub.stamps.itr_num[s]) for s in sub.stamps.order), stamps)
+        return sub
+
+    def test_generator(self):
+        wrapped = gt.wrap(gen)
+        items = list()
+        for item in wrapped(self.fake, self.spent, 3):
+            self.fake.tick()  # (in the consumer)
+            items.append(item)
+        self.assertEqual(items, [0, 1, 2])
+        self.check('gen', {'step': 3, 'end': 1})
+
+    def test_send_throw_close(self):
+        steps = gt.wrap(echo)(self.fake, self.spent)
+        self.assertIsNone(next(steps))
+        self.assertEqual(steps.send(2), 4)
+        self.fake.tick()
+        self.assertIsNone(steps.throw(ValueError))
+        self.assertEqual(steps.send(5), 10)
+        steps.close()
+        self.assertIs(focus.get_focus().t, focus.get_focus().root)  # (closed)
+        self.check('echo', {'caught': 1})
+
+    def test_exception_out(self):
+        steps = gt.wrap(gen)(self.fake, self.spent, 2)
+        next(steps)
+        with self.assertRaises(KeyError):
+            steps.throw(KeyError)
+        self.assertIs(focus.get_focus().t, focus.get_focus().root)  # (closed)
+        self.check('gen', {'step': 1})
+
+    def test_coroutine(self):
+        result = _drive(gt.wrap(aio.coro)(self.fake, self.spent, 3), self.fake)
+        self.assertEqual(result, 'result')
+        self.check('coro', {'step': 3, 'end': 1})
+
+    def test_async_generator(self):
+        agen = gt.wrap(aio.agen)(self.fake, self.spent, 3)
+        items = list()
+        while True:
+            try:
+                items.append(_drive(agen.__anext__(), self.fake))
+            except StopAsyncIteration:
+                break
+            self.fake.tick()  # (in the consumer)
+        self.assertEqual(items, [0, 1, 2])
+        self.check('agen', {'step': 3, 'resumed': 3})
+
+
+if __name__ == '__main__':
+    unittest.main()